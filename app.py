@@ -1,15 +1,38 @@
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, request, jsonify, render_template, session, send_file, Response, g, url_for, stream_with_context
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
 import os
 import json
+import mimetypes
 import time
+import uuid
+import threading
 import logging
 from datetime import datetime
+from functools import wraps
 from dotenv import load_dotenv
-from services.deepgram_service import DeepgramService
-from services.murf_service import MurfService
-from services.rag_service import RAGService
+from werkzeug.exceptions import RequestEntityTooLarge
+from services.service_registry import ServiceRegistry
+from services.stt_logging import STTLogger
+from services.audio_store import AudioStore
+from services.lipsync import LipSyncService
+from services.streaming_service import StreamingChatPipeline
+from services.admission_service import AdmissionController, AdmissionRejected
+from services.http_client import get_http_client
+from services.audio_store import AUDIO_ID_PATTERN, audio_url
+from services.speculation import SpeculativeDispatcher, SpeculationStats
+from services.metrics import get_metrics, stage_timer, HTTP_REQUESTS, HTTP_ERRORS, HTTP_IN_FLIGHT, HTTP_LATENCY
+from services.health_service import HealthProber
+from services.ingestion import BulkIngestor, IngestCheckpoint, IngestReport, document_from_record
+from services.emotion_service import get_emotion_classifier
+from services.static_assets import AssetManifest
+from services.model_variants import ModelVariants, parse_capabilities
+from services.audio_preprocess import AudioPreprocessor
+from services.local_stt import LocalSTTService
+from services.stt_router import STTRouter, DeepgramProvider, WhisperProvider, LocalProvider, ERROR_PREFIX
+from services.batch_transcription import BatchTranscriber, BatchInputError
+from services.socket_queue import socketio_options
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -21,21 +44,209 @@ load_dotenv()
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key-here')
 CORS(app, origins=["*"])
-socketio = SocketIO(app, cors_allowed_origins="*")
+# With SOCKETIO_MESSAGE_QUEUE, emits reach clients connected to any server worker
+socketio = SocketIO(app, cors_allowed_origins="*", **socketio_options())
 
-# Initialize services
-deepgram_service = DeepgramService()
-murf_service = MurfService()
-rag_service = RAGService()
+# STT path logging: verbose banners or one structured record per request (STT_LOG_MODE)
+stt_log = STTLogger()
+# Synthesized speech clips and their lip-sync tracks (shared with the Murf service)
+audio_store = AudioStore()
+lipsync = LipSyncService(audio_store)
+# Local CPU model (LOCAL_STT_ENABLED); loaded by the warmup thread or on first use
+local_stt = LocalSTTService(preload=False)
+
+def load_local_stt():
+    if local_stt.enabled:
+        local_stt.load()
+    return local_stt
+
+# Provider services (and their SDKs) are built on first use or by the warmup thread
+service_registry = ServiceRegistry()
+rag_service = service_registry.register('rag', 'services.rag_service:RAGService')
+deepgram_service = service_registry.register('deepgram', 'services.deepgram_service:DeepgramService', stt_log=stt_log)
+murf_service = service_registry.register('murf', 'services.murf_service:MurfService',
+                                         audio_store=audio_store, lipsync=lipsync)
+whisper_service = service_registry.register('whisper', 'services.whisper_service:WhisperService')
+local_stt_service = service_registry.register('local_stt', load_local_stt)
+service_registry.warmup()
+
+# Uploads are sniffed, decoded and silence-trimmed before they are sent to STT
+stt_preprocessor = AudioPreprocessor()
+# Each transcription goes to the fastest healthy provider (optionally hedged)
+stt_router = STTRouter([DeepgramProvider(deepgram_service), WhisperProvider(whisper_service),
+                        LocalProvider(local_stt_service)])
+
+# Open keep-alive connections to outbound providers before the first request
+http_client = get_http_client()
+http_client.warm([os.getenv('RAG_ENDPOINT_URL')])
+
+# Fingerprinted, precompressed static files written by build_assets.py
+assets = AssetManifest()
+# Level-of-detail VRM variants written by optimize_vrm.py
+model_variants = ModelVariants()
+
+# Enforce age and size quotas on stored speech clips
+audio_store.start_janitor()
+
+# Dependency health is probed in the background; health routes read the cache
+health_prober = HealthProber()
+health_prober.register('rag', lambda: rag_service.check_health(health_prober.timeout))
+health_prober.register('murf', lambda: murf_service.check_health())
+health_prober.register('deepgram', lambda: deepgram_service.check_health(health_prober.timeout))
+health_prober.start()
+
+# Bulk document ingestion jobs by job ID (reports are kept for polling; the
+# oldest finished ones are dropped beyond INGEST_JOBS_KEPT)
+ingestor = BulkIngestor(rag_service)
+ingest_jobs = {}
+ingest_jobs_lock = threading.Lock()
+INGEST_JOBS_KEPT = int(os.getenv('INGEST_JOBS_KEPT', 100))
+
+# Live transcription streams by Socket.IO sid
+live_sessions = {}
+
+# Sentence-level RAG -> TTS streaming for the socket chat handler
+STREAMING_CHAT_ENABLED = os.getenv('STREAMING_CHAT_ENABLED', 'false').lower() == 'true'
+streaming_pipeline = StreamingChatPipeline(rag_service, murf_service, lambda text: generate_vrm_response(text))
+
+# Speculative RAG dispatch on stable interim transcripts (live voice turns)
+SPECULATIVE_RAG_ENABLED = os.getenv('SPECULATIVE_RAG_ENABLED', 'false').lower() == 'true'
+speculation_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('SPECULATION_WORKERS', 4)),
+    thread_name_prefix='speculative-rag'
+)
+speculation_stats = SpeculationStats()
+speculators = {}
+
+# Admission control for the long-running chat and STT handlers
+admission = AdmissionController()
+admission.register('chat', max_concurrent=4, max_queue=8, queue_timeout=10)
+admission.register('speech_to_text', max_concurrent=4, max_queue=8, queue_timeout=10)
+admission.register('speech_to_text_batch', max_concurrent=2, max_queue=2, queue_timeout=5)
+admission.register('socket_chat', max_concurrent=4, max_queue=16, queue_timeout=15)
+
+def admission_controlled(route):
+    """Reject HTTP requests with 503 + Retry-After when the route is saturated"""
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            try:
+                with admission.slot(route):
+                    return f(*args, **kwargs)
+            except AdmissionRejected as e:
+                return busy_response(route, e)
+        return wrapper
+    return decorator
+
+def busy_response(route, e):
+    logger.warning(f"🚦 Rejected {route} request: {e.reason}")
+    response = jsonify({
+        "error": "Server busy, please retry",
+        "status": "busy",
+        "retryAfter": e.retry_after
+    })
+    response.status_code = 503
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response
+
+def socket_admission_controlled(route):
+    """Answer socket events with a `busy` event when the route is saturated"""
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            try:
+                with admission.slot(route):
+                    return f(*args, **kwargs)
+            except AdmissionRejected as e:
+                logger.warning(f"🚦 Rejected {route} event: {e.reason}")
+                emit('busy', {
+                    'type': 'busy',
+                    'message': 'Server busy, please retry',
+                    'retryAfter': e.retry_after
+                })
+        return wrapper
+    return decorator
+
+def get_http_session_id(data=None):
+    """
+    Conversation session for an HTTP request: an explicit `sessionId` in the
+    body or `X-Session-Id` header, otherwise a token kept in the Flask session
+    cookie
+    """
+    session_id = (data or {}).get('sessionId') or request.headers.get('X-Session-Id')
+    if session_id:
+        return f"http:{session_id}"
+    if 'chat_session' not in session:
+        session['chat_session'] = uuid.uuid4().hex
+    return f"http:{session['chat_session']}"
+
+@app.before_request
+def start_request_metrics():
+    # Label by URL rule, not path, so audio IDs etc. don't explode cardinality
+    g.metrics_route = request.url_rule.rule if request.url_rule else 'unmatched'
+    g.metrics_start = time.perf_counter()
+    HTTP_IN_FLIGHT.inc(route=g.metrics_route)
+
+@app.after_request
+def record_response_status(response):
+    g.metrics_status = response.status_code
+    return response
+
+@app.teardown_request
+def finish_request_metrics(error=None):
+    route = g.pop('metrics_route', None)
+    if route is None:
+        return
+    status = 500 if error is not None else g.pop('metrics_status', 500)
+    HTTP_IN_FLIGHT.dec(route=route)
+    HTTP_LATENCY.observe(time.perf_counter() - g.pop('metrics_start'), route=route)
+    HTTP_REQUESTS.inc(route=route, method=request.method, status=status)
+    if status >= 500:
+        HTTP_ERRORS.inc(route=route)
+
+def emit_to(sid, event, payload):
+    """Emit a chat response event to one client, timing the emit"""
+    with stage_timer('socket_emit'):
+        socketio.emit(event, payload, to=sid)
+
+def lip_sync_for(audio_id, sid=None, wait=None):
+    """
+    Lip-sync track of a speech clip if it is ready within LIPSYNC_WAIT_MS
+    (or `wait` seconds). With a `sid`, a track that is still being computed
+    is sent to that client as a `lipsync` event once it is done.
+    """
+    future = lipsync.submit(audio_id)
+    try:
+        return future.result(timeout=lipsync.wait if wait is None else wait)
+    except FuturesTimeout:
+        if sid is not None:
+            def send_late(done):
+                track = done.result()
+                if track:
+                    emit_to(sid, 'lipsync', {'type': 'lipsync', 'audioId': audio_id, 'audio': audio_url(audio_id),
+                                              'lipSync': track})
+            future.add_done_callback(send_late)
+        return None
+
+def asset_url(filename):
+    """Fingerprinted URL of a static file, or its plain static URL if it was not built"""
+    return assets.url(filename) or url_for('static', filename=filename)
+
+@app.context_processor
+def inject_asset_url():
+    return {'asset_url': asset_url}
 
 class VRMData:
-    def __init__(self, model_url="", animations=None, expressions=None, position=None, rotation=None, scale=None):
+    def __init__(self, model_url="", animations=None, expressions=None, position=None, rotation=None, scale=None,
+                 timeline=None, lip_sync=None):
         self.model_url = model_url
         self.animations = animations or {}
         self.expressions = expressions or {}
         self.position = position or [0, 0, 0]
         self.rotation = rotation or [0, 0, 0]
         self.scale = scale or [1, 1, 1]
+        self.timeline = timeline or []
+        self.lip_sync = lip_sync
     
     def to_dict(self):
         return {
@@ -44,7 +255,9 @@ class VRMData:
             "expressions": self.expressions,
             "position": self.position,
             "rotation": self.rotation,
-            "scale": self.scale
+            "scale": self.scale,
+            "timeline": self.timeline,
+            "lipSync": self.lip_sync
         }
 
 @app.route('/')
@@ -57,20 +270,42 @@ def test():
 
 @app.route('/api/health')
 def health():
-    # Test RAG endpoint connectivity
-    rag_status = "connected" if rag_service.test_rag_endpoint() else "disconnected"
+    # Dependency status comes from the background prober's cache
+    checks = health_prober.results()
+    rag_status = "connected" if checks['rag']['status'] == 'up' else "disconnected"
+    unhealthy = health_prober.unhealthy(checks)
     
     return jsonify({
-        "status": "healthy",
+        "status": "degraded" if unhealthy else "healthy",
         "message": "AI VRM Chat Server is running",
         "time": time.strftime("%Y-%m-%d %H:%M:%S"),
         "device": "Looking Glass Go compatible",
+        "ready": health_prober.ready(checks),
         "rag_endpoint": {
             "status": rag_status,
             "url": os.getenv('RAG_ENDPOINT_URL', 'Not configured')
-        }
+        },
+        "checks": checks,
+        "services": service_registry.stats()
     })
 
+@app.route('/api/health/live')
+def liveness():
+    """Process is up and the health prober is still running"""
+    if not health_prober.alive():
+        return jsonify({"status": "dead", "reason": "health prober stopped"}), 503
+    return jsonify({"status": "alive"})
+
+@app.route('/api/health/ready')
+def readiness():
+    """Required dependencies were reachable on the last (fresh) probe"""
+    checks = health_prober.results()
+    ready = health_prober.ready(checks)
+    return jsonify({
+        "status": "ready" if ready else "not_ready",
+        "checks": {name: check['status'] for name, check in checks.items()}
+    }), 200 if ready else 503
+
 @app.route('/api/test-rag')
 def test_rag():
     """Test RAG endpoint connectivity"""
@@ -82,7 +317,7 @@ def test_rag():
             }), 400
         
         # Test with a simple query
-        test_response = rag_service.process_query("Hello, this is a test query.")
+        test_response = rag_service.process_query("Hello, this is a test query.", session_id="test-rag", use_cache=False)
         
         return jsonify({
             "status": "success",
@@ -97,7 +332,58 @@ def test_rag():
             "message": f"RAG endpoint test failed: {str(e)}"
         }), 500
 
+@app.route('/api/admission')
+def admission_stats():
+    """Queue depth, in-flight count and wait times per admission-controlled route"""
+    return jsonify(admission.stats())
+
+@app.route('/api/http-stats')
+def http_stats():
+    """Outbound connection pool settings and per-host reuse counters"""
+    return jsonify(http_client.get_stats())
+
+@app.route('/api/cache-stats')
+def cache_stats():
+    """Hit/miss/eviction counters for the response caches"""
+    return jsonify({
+        "rag": rag_service.response_cache.stats(),
+        "tts": audio_store.stats(),
+        "lipsync": lipsync.stats()
+    })
+
+@app.route('/api/stt-stats')
+def stt_stats():
+    """Per-provider STT wins, latency percentiles, error rates and hedging counters"""
+    return jsonify({**stt_router.stats(), "local": local_stt.stats()})
+
+@app.route('/api/circuit-breakers')
+def circuit_breakers():
+    """Breaker state and adaptive timeout for outbound dependencies"""
+    return jsonify({
+        "rag": {
+            "breaker": rag_service.breaker.stats(),
+            "timeout": rag_service.timeouts.stats()
+        },
+        "stt": {provider.name: provider.breaker.stats() for provider in stt_router.providers}
+    })
+
+@app.route('/api/metrics')
+def metrics():
+    """Per-stage latency histograms and per-route request counters (Prometheus text format)"""
+    registry = get_metrics()
+    return Response(registry.render(), content_type=registry.CONTENT_TYPE)
+
+@app.route('/api/speculation-stats')
+def speculation_stats_route():
+    """Speculative RAG hit rate and latency saved on live voice turns"""
+    return jsonify({
+        "enabled": SPECULATIVE_RAG_ENABLED,
+        "active_sessions": len(speculators),
+        **speculation_stats.snapshot()
+    })
+
 @app.route('/api/chat', methods=['POST'])
+@admission_controlled('chat')
 def chat():
     try:
         data = request.get_json()
@@ -107,17 +393,19 @@ def chat():
             return jsonify({"error": "No message provided"}), 400
         
         # Process through RAG pipeline
-        response = rag_service.process_query(message)
+        response = rag_service.process_query(message, get_http_session_id(data))
         
         # Convert to speech
-        audio_url = murf_service.synthesize_speech(response)
+        audio_id = murf_service.synthesize_speech(response)
         
         # Generate VRM data
         vrm_data = generate_vrm_response(response)
+        vrm_data.lip_sync = lip_sync_for(audio_id)
         
         return jsonify({
             "text": response,
-            "audio": audio_url,
+            "audioId": audio_id,
+            "audio": audio_url(audio_id),
             "status": "success",
             "vrm": vrm_data.to_dict()
         })
@@ -125,84 +413,253 @@ def chat():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/documents/bulk', methods=['POST'])
+def bulk_ingest():
+    """
+    Start a background ingestion job for a list of documents. Re-submitting
+    with the same `jobId` resumes from that job's checkpoint.
+    """
+    data = request.get_json(silent=True) or {}
+    records = data.get('documents')
+    if not isinstance(records, list) or not records:
+        return jsonify({"error": "Expected a non-empty 'documents' list"}), 400
+    if not rag_service.rag_endpoint:
+        return jsonify({"error": "RAG_ENDPOINT_URL not configured"}), 400
+    
+    job_id = str(data.get('jobId') or uuid.uuid4().hex[:12])
+    documents = []
+    for i, record in enumerate(records):
+        try:
+            documents.append(document_from_record(record, f"{job_id}:{i}"))
+        except ValueError as e:
+            return jsonify({"error": f"Invalid document at index {i}: {e}", "index": i}), 400
+    
+    with ingest_jobs_lock:
+        running = ingest_jobs.get(job_id)
+        if running is not None and running.finished is None:
+            return jsonify({"error": f"Job {job_id} is already running"}), 409
+        checkpoint = IngestCheckpoint(BulkIngestor.checkpoint_path(job_id))
+        report = ingest_jobs[job_id] = IngestReport()
+        finished = sorted((job.finished, name) for name, job in ingest_jobs.items() if job.finished is not None)
+        for _, name in finished[:max(0, len(finished) - INGEST_JOBS_KEPT)]:
+            del ingest_jobs[name]
+    
+    def run():
+        try:
+            ingestor.run(documents, checkpoint, report)
+            logger.info(f"📚 Ingestion job {job_id} finished: {report.snapshot()}")
+        except Exception as e:
+            logger.error(f"Ingestion job {job_id} failed: {e}")
+        finally:
+            checkpoint.close()
+    
+    threading.Thread(target=run, name=f"ingest-{job_id}", daemon=True).start()
+    return jsonify({
+        "jobId": job_id,
+        "status": "accepted",
+        "documents": len(documents),
+        "statusUrl": f"/api/documents/bulk/{job_id}"
+    }), 202
+
+@app.route('/api/documents/bulk/<job_id>')
+def bulk_ingest_status(job_id):
+    """Progress and throughput of an ingestion job"""
+    report = ingest_jobs.get(job_id)
+    if report is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify({"jobId": job_id, **report.snapshot()})
+
+def transcribe_speech(audio, mimetype, request_log):
+    """Transcript and winning provider; errors come back as text like the providers' own"""
+    if not stt_router.configured():
+        return deepgram_service.transcribe_audio_bytes(audio, mimetype, request_log=request_log), None
+    try:
+        text, routing = stt_router.transcribe(audio, mimetype, request_log)
+        return text, routing["provider"]
+    except Exception as e:
+        request_log.fail(e)
+        logger.error(f"All STT providers failed: {e}")
+        return f"Error transcribing audio: {str(e)}", None
+
 @app.route('/api/speech-to-text', methods=['POST'])
+@admission_controlled('speech_to_text')
 def speech_to_text():
     start_time = time.time()
+    verbose = stt_log.verbose
+    request_log = stt_log.request('speech_to_text', content_length=request.content_length)
     
     try:
-        logger.info("=" * 60)
-        logger.info("🎤 SPEECH-TO-TEXT ENDPOINT CALLED")
-        logger.info("=" * 60)
-        logger.info(f"Timestamp: {datetime.now().isoformat()}")
-        logger.info(f"Request Method: {request.method}")
-        logger.info(f"Content Type: {request.content_type}")
-        logger.info(f"Content Length: {request.content_length} bytes")
+        if verbose:
+            logger.info("=" * 60)
+            logger.info("🎤 SPEECH-TO-TEXT ENDPOINT CALLED")
+            logger.info("=" * 60)
+            logger.info(f"Timestamp: {datetime.now().isoformat()}")
+            logger.info(f"Request Method: {request.method}")
+            logger.info(f"Content Type: {request.content_type}")
+            logger.info(f"Content Length: {request.content_length} bytes")
         
         if 'audio' not in request.files:
             logger.error("No audio file provided in request")
+            request_log.finish('bad_request')
             return jsonify({"error": "No audio file provided"}), 400
         
         audio_file = request.files['audio']
-        logger.info(f"Audio File Name: {audio_file.filename}")
-        logger.info(f"Audio File Content Type: {audio_file.content_type}")
+        if verbose:
+            logger.info(f"Audio File Name: {audio_file.filename}")
+            logger.info(f"Audio File Content Type: {audio_file.content_type}")
         
         # Read audio data first (before saving)
-        audio_data = audio_file.read()
-        logger.info(f"Audio data size: {len(audio_data)} bytes ({len(audio_data)/1024:.2f} KB)")
+        with request_log.stage('read'):
+            audio_data = audio_file.read()
+        request_log.update(bytes=len(audio_data), content_type=audio_file.content_type)
+        if verbose:
+            logger.info(f"Audio data size: {len(audio_data)} bytes ({len(audio_data)/1024:.2f} KB)")
         
         # Check if audio data is not empty
         if len(audio_data) == 0:
             logger.error("Audio data is empty")
+            request_log.finish('bad_request')
             return jsonify({"error": "Audio data is empty"}), 400
         
         # Save temporary file for backup
         temp_filename = f"temp_audio_{int(time.time())}.wav"
-        with open(temp_filename, 'wb') as f:
-            f.write(audio_data)
-        logger.info(f"Saved temporary file: {temp_filename}")
+        with request_log.stage('backup'):
+            with open(temp_filename, 'wb') as f:
+                f.write(audio_data)
+        if verbose:
+            logger.info(f"Saved temporary file: {temp_filename}")
+        
+        # Send only the speech, in its real format
+        with request_log.stage('preprocess'):
+            prepared = stt_preprocessor.process(audio_data, audio_file.content_type)
+        request_log.update(preprocess=prepared.stats())
+        if verbose:
+            logger.info(f"Preprocessed audio: {prepared.stats()}")
         
-        # Convert speech to text using Deepgram
-        logger.info("Calling Deepgram service for transcription...")
-        text = deepgram_service.transcribe_audio_bytes(audio_data)
+        # Convert speech to text with the fastest healthy provider
+        provider = None
+        if not prepared.silent:
+            if verbose:
+                logger.info("Calling STT router for transcription...")
+            text, provider = transcribe_speech(prepared.data, prepared.mimetype, request_log)
+        else:
+            text = ""
         
         # Clean up
         os.remove(temp_filename)
-        logger.info(f"Cleaned up temporary file: {temp_filename}")
+        if verbose:
+            logger.info(f"Cleaned up temporary file: {temp_filename}")
         
         end_time = time.time()
         duration = end_time - start_time
         
-        logger.info("=" * 60)
-        logger.info("✅ SPEECH-TO-TEXT COMPLETED")
-        logger.info("=" * 60)
-        logger.info(f"Total Duration: {duration:.3f} seconds")
-        logger.info(f"Transcription Result: '{text}'")
-        logger.info("-" * 60)
+        if verbose:
+            logger.info("=" * 60)
+            logger.info("✅ SPEECH-TO-TEXT COMPLETED")
+            logger.info("=" * 60)
+            logger.info(f"Total Duration: {duration:.3f} seconds")
+            logger.info(f"Transcription Result: '{text}'")
+            logger.info("-" * 60)
         
         # Check if transcription is empty and provide helpful message
         if not text or text.strip() == "":
             logger.warning("Empty transcription received - this might indicate audio quality issues")
             text = "I couldn't hear anything clearly. Please try speaking again."
         
+        request_log.finish()
         return jsonify({
             "text": text,
-            "status": "success"
+            "status": "success",
+            "provider": provider,
+            "preprocess": prepared.stats()
         })
     
     except Exception as e:
         end_time = time.time()
         duration = end_time - start_time
         
-        logger.error("=" * 60)
-        logger.error("❌ SPEECH-TO-TEXT ERROR")
-        logger.error("=" * 60)
-        logger.error(f"Error Duration: {duration:.3f} seconds")
-        logger.error(f"Error Type: {type(e).__name__}")
-        logger.error(f"Error Message: {str(e)}")
-        logger.error("-" * 60)
+        request_log.fail(e)
+        request_log.finish()
+        if verbose:
+            logger.error("=" * 60)
+            logger.error("❌ SPEECH-TO-TEXT ERROR")
+            logger.error("=" * 60)
+            logger.error(f"Error Duration: {duration:.3f} seconds")
+            logger.error(f"Error Type: {type(e).__name__}")
+            logger.error(f"Error Message: {str(e)}")
+            logger.error("-" * 60)
+        else:
+            logger.error(f"Speech-to-text error: {e}")
         
         return jsonify({"error": str(e)}), 500
 
+def transcribe_batch_file(name, data):
+    """One file of a batch: preprocess, route, and raise on provider errors"""
+    request_log = stt_log.request('speech_to_text_batch', file=name, bytes=len(data))
+    try:
+        prepared = stt_preprocessor.process(data, mimetypes.guess_type(name)[0])
+        request_log.update(preprocess=prepared.stats())
+        text, provider = ("", None) if prepared.silent else \
+            transcribe_speech(prepared.data, prepared.mimetype, request_log)
+        if text.startswith(ERROR_PREFIX):
+            raise RuntimeError(text)
+        return {"text": text, "provider": provider, "preprocess": prepared.stats()}
+    except Exception as e:
+        request_log.fail(e)
+        raise
+    finally:
+        request_log.finish()
+
+# Archive re-transcription: many files fanned out over a shared worker pool
+batch_transcriber = BatchTranscriber(transcribe_batch_file)
+# A full batch plus multipart overhead is the largest body any route accepts;
+# Werkzeug rejects bigger requests (413) before buffering them
+app.config['MAX_CONTENT_LENGTH'] = batch_transcriber.max_bytes + 1024 * 1024
+
+@app.route('/api/speech-to-text/batch', methods=['POST'])
+def speech_to_text_batch():
+    """
+    Transcribe many files (multipart ``files``/``audio`` fields, zip archives
+    expanded, or a zip request body) concurrently; results stream back as
+    NDJSON lines as each file completes, then a summary line
+    """
+    # Taken before the body is read, so a busy server does not buffer uploads it
+    # rejects; held until the stream ends, not just until this handler returns
+    limiter = admission.limiters['speech_to_text_batch']
+    try:
+        limiter.acquire()
+    except AdmissionRejected as e:
+        return busy_response('speech_to_text_batch', e)
+    start = time.monotonic()
+
+    try:
+        if request.mimetype in ('application/zip', 'application/x-zip-compressed'):
+            uploads = [("upload.zip", request.get_data())]
+        else:
+            uploads = [(upload.filename or f"file{index}", upload.read())
+                       for index, upload in enumerate(request.files.getlist('files') + request.files.getlist('audio'))]
+        files = batch_transcriber.collect(uploads)
+    except Exception as e:
+        limiter.release(time.monotonic() - start)
+        if isinstance(e, RequestEntityTooLarge):
+            return jsonify({"error": f"Request is larger than "
+                                     f"{app.config['MAX_CONTENT_LENGTH'] // (1024 * 1024)} MB"}), 413
+        if isinstance(e, BatchInputError):
+            return jsonify({"error": str(e)}), 400
+        raise
+    logger.info(f"📚 Batch transcription of {len(files)} files "
+                f"({batch_transcriber.concurrency} at a time)")
+
+    def generate():
+        try:
+            for result in batch_transcriber.run(files):
+                yield json.dumps(result, separators=(",", ":")) + "\n"
+        finally:
+            limiter.release(time.monotonic() - start)
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/api/text-to-speech', methods=['POST'])
 def text_to_speech():
     try:
@@ -214,20 +671,66 @@ def text_to_speech():
             return jsonify({"error": "No text provided"}), 400
         
         # Convert text to speech
-        audio_url = murf_service.synthesize_speech(text, voice_id)
+        audio_id = murf_service.synthesize_speech(text, voice_id)
         
         return jsonify({
-            "audio": audio_url,
+            "audioId": audio_id,
+            "audio": audio_url(audio_id),
             "status": "success"
         })
     
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/assets/<path:filename>')
+def fingerprinted_asset(filename):
+    """
+    Serve a build_assets.py output, choosing the Brotli or gzip variant the
+    client accepts. Names contain the content hash, so they never change.
+    """
+    asset = assets.resolve(filename, request.headers.get('Accept-Encoding', ''))
+    if asset is None:
+        return jsonify({"error": "Asset not found"}), 404
+    
+    response = send_file(asset.path, mimetype=asset.mimetype, conditional=True, etag=asset.etag)
+    if asset.encoding:
+        response.headers['Content-Encoding'] = asset.encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+@app.route('/api/audio/<audio_id>')
+def get_audio(audio_id):
+    """
+    Serve a stored speech clip by ID. Clips are content addressed, so they are
+    cacheable forever; Range and conditional requests are honoured for both
+    the in-memory and the disk tier.
+    """
+    if not AUDIO_ID_PATTERN.match(audio_id):
+        return jsonify({"error": "Invalid audio id"}), 400
+    
+    blob = audio_store.get(audio_id)
+    if blob is None:
+        return jsonify({"error": "Audio not found"}), 404
+    
+    if blob.data is not None:
+        response = Response(blob.data, mimetype=blob.mimetype)
+        response.set_etag(audio_id)
+        response.last_modified = blob.mtime
+        response = response.make_conditional(request, accept_ranges=True, complete_length=blob.size)
+    else:
+        # send_file hands the open file to the server's sendfile support
+        response = send_file(blob.path, mimetype=blob.mimetype, conditional=True, etag=audio_id)
+    
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
 @app.route('/api/vrm-model')
 def get_vrm_model():
+    model = "AvatarSample_C.vrm"
+    variant = model_variants.select(model, parse_capabilities(request.args))
     vrm_data = VRMData(
-        model_url="/static/models/AvatarSample_C.vrm",
+        model_url=asset_url(variant["path"] if variant else f"models/{model}"),
         animations={
             "idle": "/static/animations/idle.fbx",
             "talk": "/static/animations/talk.fbx",
@@ -239,32 +742,55 @@ def get_vrm_model():
             "thinking": "thinking"
         }
     )
-    
-    return jsonify(vrm_data.to_dict())
+
+    data = vrm_data.to_dict()
+    data["variant"] = variant["name"] if variant else "original"
+    return jsonify(data)
 
 @socketio.on('connect')
 def handle_connect():
     logger.info(f"Client connected: {request.sid}")
-    emit('status', {'message': 'Connected to AI VRM Chat Server'})
+    emit('status', {'message': 'Connected to AI VRM Chat Server', 'worker': os.getpid()})
 
 @socketio.on('disconnect')
 def handle_disconnect():
     logger.info(f"Client disconnected: {request.sid}")
+    close_live_session(request.sid)
+    rag_service.clear_conversation_history(request.sid)
 
 @socketio.on('chat')
+@socket_admission_controlled('socket_chat')
 def handle_chat(data):
+    run_chat_turn(
+        data.get('content', ''),
+        data.get('source', 'text_input'),
+        request.sid,
+        stream=data.get('stream', STREAMING_CHAT_ENABLED)
+    )
+
+def run_chat_turn(message, source, sid, stream=STREAMING_CHAT_ENABLED, response=None):
+    """
+    Answer one chat message for a socket client. Emits go to `sid` explicitly
+    so this also works outside the socket handler (e.g. voice turns started
+    by live transcription). A `response` obtained ahead of time (speculative
+    dispatch) is used instead of querying RAG and recorded in the history.
+    """
     try:
-        message = data.get('content', '')
-        source = data.get('source', 'text_input')
-        
         if source == 'voice_transcription':
             logger.info(f"🎤 Voice transcription received: '{message}'")
             logger.info(f"📡 Sending to RAG pipeline...")
         else:
             logger.info(f"💬 Text chat message received: '{message}'")
         
+        if stream:
+            stream_chat_response(message, source, sid, response)
+            return
+        
         # Process through RAG pipeline
-        response = rag_service.process_query(message)
+        if response is None:
+            response = rag_service.process_query(message, sid)
+        else:
+            rag_service.record_turn(message, response, sid)
         
         if source == 'voice_transcription':
             logger.info(f"🤖 RAG pipeline response for voice input: '{response}'")
@@ -272,23 +798,165 @@ def handle_chat(data):
             logger.info(f"🤖 RAG pipeline response for text input: '{response}'")
         
         # Convert to speech
-        audio_url = murf_service.synthesize_speech(response)
+        audio_id = murf_service.synthesize_speech(response)
         
         # Generate VRM data
         vrm_data = generate_vrm_response(response)
+        vrm_data.lip_sync = lip_sync_for(audio_id, sid)
         
         # Emit response
-        emit('response', {
+        emit_to(sid, 'response', {
             'type': 'response',
             'content': response,
-            'audio': audio_url,
+            'audioId': audio_id,
+            'audio': audio_url(audio_id),
             'vrmData': vrm_data.to_dict(),
             'source': source
         })
     
     except Exception as e:
         logger.error(f"WebSocket chat error: {str(e)}")
-        emit('error', {'message': str(e)})
+        socketio.emit('error', {'message': str(e)}, to=sid)
+
+def stream_chat_response(message, source, sid, response=None):
+    """Emit the RAG answer sentence by sentence as speech becomes available"""
+    start_time = time.time()
+    texts = []
+    
+    if response is not None:
+        rag_service.record_turn(message, response, sid)
+    
+    for chunk in streaming_pipeline.run(message, sid, text=response):
+        if chunk['index'] == 0:
+            logger.info(f"⏱️  First streamed chunk after {time.time() - start_time:.3f} seconds")
+        texts.append(chunk['text'])
+        if chunk['vrmData']['lipSync'] is None:
+            # Waited for on the TTS worker already; deliver late tracks as events
+            chunk['vrmData']['lipSync'] = lip_sync_for(chunk['audioId'], sid, wait=0)
+        emit_to(sid, 'response_chunk', {
+            'type': 'response_chunk',
+            'index': chunk['index'],
+            'content': chunk['text'],
+            'audioId': chunk['audioId'],
+            'audio': chunk['audio'],
+            'vrmData': chunk['vrmData'],
+            'source': source
+        })
+    
+    response = " ".join(texts)
+    logger.info(f"🤖 Streamed RAG response ({len(texts)} chunks, {time.time() - start_time:.3f} seconds): '{response}'")
+    
+    emit_to(sid, 'response_end', {
+        'type': 'response_end',
+        'content': response,
+        'chunks': len(texts),
+        'source': source
+    })
+
+def run_voice_turn(sid, text, dispatcher=None, speculation=None):
+    """
+    Send an endpointed live transcript through the chat pipeline, reusing the
+    answer of a matching speculative query when there is one
+    """
+    try:
+        with admission.slot('socket_chat'):
+            response = None
+            if speculation is not None:
+                try:
+                    response = dispatcher.resolve(speculation)
+                except Exception as e:
+                    logger.warning(f"🔮 Speculative query failed, re-issuing: {e}")
+            run_chat_turn(text, 'voice_transcription', sid, response=response)
+    except AdmissionRejected as e:
+        logger.warning(f"🚦 Rejected voice turn: {e.reason}")
+        socketio.emit('busy', {
+            'type': 'busy',
+            'message': 'Server busy, please retry',
+            'retryAfter': e.retry_after
+        }, to=sid)
+
+@socketio.on('audio_stream_start')
+def handle_audio_stream_start(data=None):
+    """Open a live transcription stream for this client"""
+    data = data or {}
+    sid = request.sid
+    close_live_session(sid)
+    
+    dispatcher = None
+    if SPECULATIVE_RAG_ENABLED:
+        dispatcher = speculators[sid] = SpeculativeDispatcher(
+            lambda query: rag_service.answer_query(query, sid),
+            speculation_executor,
+            speculation_stats
+        )
+    # Registered in live_sessions before it starts, so events reported while it
+    # starts (e.g. a connect error followed by 'closed') are delivered
+    current = {}
+    
+    def on_event(event_type, payload):
+        # A superseded (or already closed) session can still deliver late
+        # events from its receive thread: they must not touch the new session
+        if live_sessions.get(sid) is not current.get('session'):
+            return
+        if event_type == 'interim':
+            if dispatcher is not None:
+                dispatcher.on_interim(payload['text'])
+            socketio.emit('transcript_interim', {'text': payload['text']}, to=sid)
+        elif event_type == 'final':
+            if dispatcher is not None:
+                dispatcher.on_final(payload['text'])
+            socketio.emit('transcript_final', {'text': payload['text'], 'speechFinal': payload['speech_final']}, to=sid)
+        elif event_type == 'utterance':
+            logger.info(f"🎤 Live utterance endpointed: '{payload['text']}'")
+            speculation = dispatcher.claim(payload['text']) if dispatcher is not None else None
+            socketio.emit('voice_turn', {'text': payload['text']}, to=sid)
+            socketio.start_background_task(run_voice_turn, sid, payload['text'], dispatcher, speculation)
+        elif event_type == 'error':
+            socketio.emit('error', {'message': f"Live transcription error: {payload['message']}"}, to=sid)
+        elif event_type == 'closed':
+            live_sessions.pop(sid, None)
+            if dispatcher is not None and speculators.get(sid) is dispatcher:
+                speculators.pop(sid, None)
+                dispatcher.close()
+            socketio.emit('audio_stream_closed', {}, to=sid)
+    
+    try:
+        live_session = current['session'] = deepgram_service.create_live_session(
+            on_event,
+            mimetype=data.get('mimetype'),
+            encoding=data.get('encoding'),
+            sample_rate=data.get('sampleRate'),
+            channels=data.get('channels')
+        )
+        live_sessions[sid] = live_session
+        live_session.start()
+        logger.info(f"🎙️  Live transcription started for {sid}")
+    except Exception as e:
+        logger.error(f"Could not start live transcription: {e}")
+        close_live_session(sid)
+        emit('error', {'message': f"Could not start live transcription: {e}"})
+
+@socketio.on('audio_stream_chunk')
+def handle_audio_stream_chunk(chunk):
+    """Forward one binary mic frame to the client's live stream"""
+    live_session = live_sessions.get(request.sid)
+    if live_session is not None and isinstance(chunk, (bytes, bytearray)):
+        live_session.send(chunk)
+
+@socketio.on('audio_stream_stop')
+def handle_audio_stream_stop(data=None):
+    """Flush the client's live stream; final results still arrive afterwards"""
+    live_session = live_sessions.get(request.sid)
+    if live_session is not None:
+        live_session.finish()
+
+def close_live_session(sid):
+    live_session = live_sessions.pop(sid, None)
+    if live_session is not None:
+        live_session.close()
+    dispatcher = speculators.pop(sid, None)
+    if dispatcher is not None:
+        dispatcher.close()
 
 @socketio.on('vrm_ready')
 def handle_vrm_ready():
@@ -309,44 +977,32 @@ def handle_speech_start():
         'vrmData': vrm_data.to_dict()
     })
 
+@stage_timer('vrm_generate')
 def generate_vrm_response(text):
-    """Generate appropriate VRM animation and expression based on response"""
-    # Simple logic to determine animation and expression based on text content
-    text_lower = text.lower()
-    
-    if any(word in text_lower for word in ['happy', 'great', 'wonderful', 'excellent']):
-        expression = "happy"
-        animation = "talk"
-    elif any(word in text_lower for word in ['sorry', 'unfortunately', 'cannot']):
-        expression = "sad"
-        animation = "talk"
-    elif any(word in text_lower for word in ['thinking', 'let me', 'consider']):
-        expression = "thinking"
-        animation = "idle"
-    else:
-        expression = "neutral"
-        animation = "talk"
+    """Generate VRM animation and expression keyframes for a response"""
+    emotion = get_emotion_classifier().classify(text)
     
     return VRMData(
-        animations={"current": animation},
-        expressions={"current": expression}
+        animations={"current": emotion["animation"]},
+        expressions={"current": emotion["expression"]},
+        timeline=emotion["timeline"]
     )
 
-if __name__ == '__main__':
-    port = int(os.getenv('PORT', 5000))
-    debug = os.getenv('FLASK_ENV') == 'development'
+def run_server(port=None, debug=None):
+    """Serve on the development server (gunicorn.conf.py for production)"""
+    port = port or int(os.getenv('PORT', 5000))
+    debug = debug if debug is not None else os.getenv('FLASK_ENV') == 'development'
     
     print(f"AI VRM Chat Server starting on port {port}")
     print(f"Looking Glass Go device can connect to: ws://localhost:{port}")
     
-    # Print RAG endpoint status
+    # Reachability is probed in the background; see /api/health
     if os.getenv('RAG_ENDPOINT_URL'):
         print(f"✅ RAG endpoint configured: {os.getenv('RAG_ENDPOINT_URL')}")
-        if rag_service.test_rag_endpoint():
-            print("✅ RAG endpoint is accessible")
-        else:
-            print("⚠️  RAG endpoint is not accessible")
     else:
         print("⚠️  RAG_ENDPOINT_URL not configured - using fallback responses")
     
-    socketio.run(app, host='0.0.0.0', port=port, debug=debug) 
\ No newline at end of file
+    socketio.run(app, host='0.0.0.0', port=port, debug=debug)
+
+if __name__ == '__main__':
+    run_server()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for the VRM emotion classifier.
+
+Compares the original lowercase-and-substring-scan classifier with the
+compiled lexicon matcher on synthetic responses of about 500 tokens, and
+reports throughput and per-response latency for each. The compiled matcher
+also builds the per-sentence timeline, so its numbers include that work.
+
+Usage:
+    python benchmark_emotion.py [--responses 2000] [--tokens 500]
+"""
+
+import sys
+import time
+import random
+import argparse
+
+from services.emotion_service import get_emotion_classifier
+
+FILLER = ("the avatar can show you around the gallery and answer questions about each "
+          "exhibit while you walk through the rooms at your own pace").split()
+KEYWORDS = ["great", "wonderful", "unfortunately", "sorry", "let me", "consider",
+            "unhappy", "excellent", "cannot", "hmm", "perhaps", "amazing"]
+
+
+def legacy_classify(text):
+    """The substring scan generate_vrm_response used before the lexicon matcher"""
+    text_lower = text.lower()
+
+    if any(word in text_lower for word in ['happy', 'great', 'wonderful', 'excellent']):
+        return "happy", "talk"
+    elif any(word in text_lower for word in ['sorry', 'unfortunately', 'cannot']):
+        return "sad", "talk"
+    elif any(word in text_lower for word in ['thinking', 'let me', 'consider']):
+        return "thinking", "idle"
+    return "neutral", "talk"
+
+
+def make_response(rng, tokens=500):
+    """Roughly `tokens` words in sentences of 8-20 words, with a few keywords mixed in"""
+    sentences = []
+    count = 0
+    while count < tokens:
+        length = rng.randint(8, 20)
+        words = [rng.choice(FILLER) for _ in range(length)]
+        if rng.random() < 0.3:
+            words.insert(rng.randrange(len(words)), rng.choice(KEYWORDS))
+        sentence = " ".join(words)
+        sentences.append(sentence[0].upper() + sentence[1:] + rng.choice([".", ".", "!", "?"]))
+        count += len(words)
+    return " ".join(sentences)
+
+
+def run(label, classify, responses, tokens):
+    start = time.perf_counter()
+    for text in responses:
+        classify(text)
+    elapsed = time.perf_counter() - start
+    per_response = elapsed / len(responses)
+    print(f"{label:<22} {len(responses) / elapsed:>12,.0f} {tokens / per_response / 1e6:>10.2f} "
+          f"{per_response * 1e6:>12.1f}")
+    return per_response
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the VRM emotion classifier")
+    parser.add_argument("--responses", type=int, default=2000, help="responses per run")
+    parser.add_argument("--tokens", type=int, default=500, help="approximate tokens per response")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    responses = [make_response(rng, args.tokens) for _ in range(args.responses)]
+    classifier = get_emotion_classifier()
+
+    sample = classifier.classify(responses[0])
+    print(f"🎭 {args.responses} responses of ~{args.tokens} tokens, "
+          f"{len(classifier.keywords)} lexicon keywords, "
+          f"{len(sample['timeline'])} keyframes in the first response")
+    print("=" * 60)
+    print(f"{'classifier':<22} {'responses/s':>12} {'Mtok/s':>10} {'µs/response':>12}")
+    print("-" * 60)
+    # Warm up both paths once
+    legacy_classify(responses[0])
+    classifier.classify(responses[0])
+    legacy = run("legacy substring scan", legacy_classify, responses, args.tokens)
+    compiled = run("compiled + timeline", classifier.classify, responses, args.tokens)
+    print("-" * 60)
+    print(f"Compiled matcher: {compiled / legacy:.1f}x the legacy cost, {compiled * 1e6:.0f} µs per response "
+          f"(the legacy scan stops at the first keyword and returns one expression)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the local CPU speech-to-text backend.
+
+Transcribes the sine-wave fixtures (the 3 s 440 Hz tone used by
+test_deepgram_logging.py and static/audio/mock_audio.wav) and speech clips
+with the local model, one at a time, concurrently without batching and
+concurrently through the micro-batcher. Reports real-time factor (compute
+time / audio time) and p50/p95 latency per clip. With --cloud, the same
+clips are sent through each configured cloud provider for comparison.
+
+Pass real recordings with --speech; without them a synthetic voiced clip
+stands in, which exercises the model but not its accuracy.
+
+Usage:
+    LOCAL_STT_MODEL=base.en python benchmark_local_stt.py [--speech clip.wav ...]
+        [--requests 32] [--concurrency 8] [--cloud]
+"""
+
+import sys
+import time
+import argparse
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from services.audio_preprocess import TARGET_RATE, decode_audio, resample, write_wav
+from services.local_stt import LocalSTTService
+
+
+def sine_fixture(duration=3.0):
+    """The 440 Hz tone from test_deepgram_logging.create_test_audio"""
+    t = np.linspace(0, duration, int(TARGET_RATE * duration), False)
+    return (np.sin(2 * np.pi * 440 * t) * 0.3).astype(np.float32)
+
+
+def voiced_fixture(duration=4.0, seed=3):
+    """Harmonic 'syllables' with pitch glides and pauses (speech-shaped, not words)"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(TARGET_RATE * duration)) / TARGET_RATE
+    pitch = 140 + 30 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / TARGET_RATE
+    voice = sum(np.sin(k * phase) / k for k in range(1, 12))
+    envelope = np.clip(np.sin(2 * np.pi * 3.2 * t), 0, None) * (rng.random(len(t)) * 0.1 + 0.9)
+    envelope[(t % 1.3) > 1.0] = 0.0
+    return (0.2 * voice * envelope).astype(np.float32)
+
+
+def load_clip(path):
+    with open(path, "rb") as f:
+        samples, rate = decode_audio(f.read())
+    return resample(samples, rate)
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def run(label, transcribe, clips, requests, concurrency):
+    jobs = [clips[i % len(clips)] for i in range(requests)]
+    latencies = []
+
+    def one(clip):
+        start = time.perf_counter()
+        transcribe(clip)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, jobs))
+    wall = time.perf_counter() - start
+    audio = sum(len(clip) for clip in jobs) / TARGET_RATE
+    print(f"{label:<34} {concurrency:>5} {wall / audio:>8.3f} {requests / wall:>9.1f} "
+          f"{percentile(latencies, 0.5) * 1000:>9.0f} {percentile(latencies, 0.95) * 1000:>9.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--speech", action="append", default=[], help="speech recording (repeatable)")
+    parser.add_argument("--requests", type=int, default=32, help="clips per run")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent requests in the parallel runs")
+    parser.add_argument("--cloud", action="store_true", help="also time the configured cloud providers")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    fixtures = {"sine 3 s": sine_fixture()}
+    try:
+        fixtures["mock_audio.wav"] = load_clip("static/audio/mock_audio.wav")
+    except (OSError, RuntimeError):
+        pass
+    speech = {path: load_clip(path) for path in args.speech} or {"synthetic voiced 4 s": voiced_fixture()}
+
+    local = LocalSTTService(enabled=True)
+    if not local.is_configured():
+        print("❌ Local model not loaded (pip install -r requirements-local-stt.txt and check LOCAL_STT_MODEL)")
+        return 1
+    print(f"🖥️  {local.model_name} ({local.compute_type}), {local.workers} worker(s) x {local.threads} threads, "
+          f"loaded and warmed up in {local.load_seconds:.1f}s")
+
+    providers = []
+    if args.cloud:
+        from services.deepgram_service import DeepgramService
+        from services.whisper_service import WhisperService
+        providers = [(name, service) for name, service in
+                     (("deepgram", DeepgramService()), ("whisper", WhisperService()))
+                     if service.is_configured()]
+        if not providers:
+            print("⚠️  No cloud provider configured; skipping the cloud comparison")
+
+    for group, clips in (("sine-wave fixtures", list(fixtures.values())), ("speech", list(speech.values()))):
+        seconds = sum(len(clip) for clip in clips) / TARGET_RATE / len(clips)
+        print(f"\n{group}: {len(clips)} clip(s), {seconds:.1f} s average")
+        print("=" * 80)
+        print(f"{'path':<34} {'conc':>5} {'RTF':>8} {'clips/s':>9} {'p50 ms':>9} {'p95 ms':>9}")
+        print("-" * 80)
+
+        def local_transcribe(clip):
+            return local.submit(clip).result()
+
+        batch_size = local.batch_size
+        local.batch_size = 1
+        run("local, sequential", local_transcribe, clips, args.requests, 1)
+        run("local, concurrent, no batching", local_transcribe, clips, args.requests, args.concurrency)
+        local.batch_size = batch_size
+        run(f"local, micro-batched (<= {batch_size})", local_transcribe, clips, args.requests, args.concurrency)
+
+        for name, service in providers:
+            payloads = {id(clip): write_wav(clip) for clip in clips}
+            run(f"{name} (cloud), concurrent",
+                lambda clip, service=service: service.transcribe_audio_bytes(payloads[id(clip)], 'audio/wav'),
+                clips, args.requests, args.concurrency)
+        print("-" * 80)
+
+    stats = local.stats()
+    print(f"\nBatch sizes: {stats['batch_sizes']}, mean {stats['mean_batch_size']}; "
+          f"RTF is wall time / audio time for the whole run")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Load test for the multi-worker production mode.
+
+For each worker count, starts the server under gunicorn (gunicorn.conf.py)
+with a Socket.IO message queue, connects WebSocket clients from several
+client processes, and has every client send socket `chat` messages back to
+back for a fixed time. Reports answered messages per second, p50/p95
+round-trip latency, `busy` rejections (admission limits are per worker) and
+how the clients spread over the workers. At the end of each run a broadcast
+is published on the message queue from this process; every client, on
+whichever worker, must receive it.
+
+The server answers with whatever .env configures. Without RAG and Murf keys
+it uses its fallback answers, which measures the server's own Socket.IO and
+chat pipeline overhead.
+
+Usage:
+    python benchmark_socket_chat.py [--workers 1,2,4] [--clients 64] [--duration 10]
+        [--queue redis://localhost:6379/0]
+
+Needs gunicorn, python-socketio and websocket-client (requirements.txt).
+Without --queue a local:// queue in a temporary directory is used.
+"""
+
+import os
+import sys
+import time
+import uuid
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+import multiprocessing
+import urllib.request
+
+import socketio
+
+from services.socket_queue import external_emitter
+
+ANSWER_EVENTS = ("response", "response_end", "busy", "error")
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))] if ordered else 0.0
+
+
+class ChatClient:
+    """One WebSocket client sending chat messages back to back"""
+
+    def __init__(self, url):
+        self.sio = socketio.Client(reconnection=False)
+        self.answered = threading.Event()
+        self.outcome = None
+        self.worker = None
+        self.broadcast = threading.Event()
+        self.token = None
+        self.sio.on("status", self.on_status)
+        for event in ANSWER_EVENTS:
+            self.sio.on(event, lambda data=None, event=event: self.on_answer(event))
+        self.sio.connect(url, transports=["websocket"], wait_timeout=10)
+
+    def on_status(self, data):
+        if data.get("worker"):
+            self.worker = data["worker"]
+        if self.token and data.get("token") == self.token:
+            self.broadcast.set()
+
+    def on_answer(self, event):
+        self.outcome = "ok" if event in ("response", "response_end") else event
+        self.answered.set()
+
+    def chat(self, index, timeout):
+        self.answered.clear()
+        self.outcome = None
+        start = time.perf_counter()
+        self.sio.emit("chat", {"content": f"Load test message {index}", "source": "text_input", "stream": False})
+        if not self.answered.wait(timeout):
+            return "timeout", time.perf_counter() - start
+        return self.outcome, time.perf_counter() - start
+
+
+def client_process(url, clients, duration, timeout, barrier, token, results):
+    connected = []
+    for _ in range(clients):
+        try:
+            connected.append(ChatClient(url))
+        except Exception as e:
+            print(f"❌ Client could not connect: {e}")
+    for client in connected:
+        client.token = token
+
+    latencies, outcomes = [], {}
+    lock = threading.Lock()
+
+    def drive(client, deadline):
+        index = 0
+        while time.monotonic() < deadline:
+            outcome, seconds = client.chat(index, timeout)
+            index += 1
+            with lock:
+                outcomes[outcome] = outcomes.get(outcome, 0) + 1
+                if outcome == "ok":
+                    latencies.append(seconds)
+            if outcome == "busy":
+                time.sleep(0.05)
+
+    barrier.wait()  # all clients connected
+    deadline = time.monotonic() + duration
+    threads = [threading.Thread(target=drive, args=(client, deadline)) for client in connected]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    barrier.wait()  # all done; the parent publishes the broadcast now
+    received = sum(client.broadcast.wait(5) for client in connected)
+
+    results.put({
+        "latencies": latencies,
+        "outcomes": outcomes,
+        "workers": [client.worker for client in connected],
+        "clients": len(connected),
+        "broadcast": received
+    })
+    for client in connected:
+        client.sio.disconnect()
+
+
+def start_server(workers, port, queue, threads):
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), PORT=str(port), GUNICORN_THREADS=str(threads),
+               SOCKETIO_MESSAGE_QUEUE=queue, SOCKETIO_TRANSPORTS="websocket", STREAMING_CHAT_ENABLED="false")
+    server = subprocess.Popen([sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"],
+                              env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"server exited with status {server.returncode}")
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/api/health/live", timeout=1)
+            # Every worker imports the app on its own; give the rest time to come up
+            time.sleep(2 + workers * 0.5)
+            return server
+        except OSError:
+            time.sleep(0.5)
+    server.terminate()
+    raise RuntimeError("server did not become ready")
+
+
+def run(workers, args):
+    queue = args.queue or f"local://{tempfile.mkdtemp(prefix='socketio-loadtest-')}"
+    server = start_server(workers, args.port, queue, args.threads)
+    token = uuid.uuid4().hex
+    per_process = [args.clients // args.client_processes + (i < args.clients % args.client_processes)
+                   for i in range(args.client_processes)]
+    per_process = [count for count in per_process if count]
+    barrier = multiprocessing.Barrier(len(per_process) + 1)
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=client_process,
+                                         args=(f"http://127.0.0.1:{args.port}", count, args.duration,
+                                               args.timeout, barrier, token, results))
+                 for count in per_process]
+    try:
+        for process in processes:
+            process.start()
+        barrier.wait()
+        start = time.monotonic()
+        barrier.wait()
+        elapsed = time.monotonic() - start
+        external_emitter(queue).emit("status", {"message": "Load test broadcast", "token": token}, namespace="/")
+        collected = [results.get(timeout=60) for _ in processes]
+        for process in processes:
+            process.join()
+    finally:
+        server.terminate()
+        server.wait()
+        if not args.queue:
+            shutil.rmtree(queue[len("local://"):], ignore_errors=True)
+
+    latencies = [seconds for result in collected for seconds in result["latencies"]]
+    outcomes = {}
+    for result in collected:
+        for outcome, count in result["outcomes"].items():
+            outcomes[outcome] = outcomes.get(outcome, 0) + count
+    clients = sum(result["clients"] for result in collected)
+    spread = {}
+    for result in collected:
+        for worker in result["workers"]:
+            spread[worker] = spread.get(worker, 0) + 1
+    return {
+        "workers": workers,
+        "clients": clients,
+        "throughput": outcomes.get("ok", 0) / elapsed,
+        "p50": percentile(latencies, 0.5) * 1000,
+        "p95": percentile(latencies, 0.95) * 1000,
+        "busy": outcomes.get("busy", 0),
+        "failed": outcomes.get("error", 0) + outcomes.get("timeout", 0),
+        "spread": sorted(spread.values(), reverse=True),
+        "broadcast": sum(result["broadcast"] for result in collected)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated worker counts to compare")
+    parser.add_argument("--clients", type=int, default=64, help="concurrent WebSocket clients")
+    parser.add_argument("--client-processes", type=int, default=min(4, os.cpu_count() or 1),
+                        help="processes driving the clients (so the load generator is not the bottleneck)")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of load per worker count")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds to wait for one answer")
+    parser.add_argument("--threads", type=int, default=100, help="gunicorn threads per worker")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--queue", help="Socket.IO message queue URL (default: a temporary local:// queue)")
+    args = parser.parse_args()
+
+    if shutil.which("gunicorn") is None:
+        print("❌ gunicorn is not installed (pip install -r requirements.txt)")
+        return 1
+
+    print(f"Socket chat load test: {args.clients} WebSocket clients, {args.duration:.0f} s per run, "
+          f"{os.cpu_count()} CPUs")
+    print("=" * 96)
+    print(f"{'workers':>7} {'clients':>8} {'msgs/s':>9} {'scaling':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'busy':>6} {'failed':>7} {'broadcast':>10}  clients per worker")
+    print("-" * 96)
+    baseline = None
+    for workers in [int(value) for value in args.workers.split(",")]:
+        result = run(workers, args)
+        baseline = baseline or result["throughput"] / result["workers"]
+        scaling = result["throughput"] / baseline if baseline else 0.0
+        print(f"{result['workers']:>7} {result['clients']:>8} {result['throughput']:>9.1f} {scaling:>7.2f}x "
+              f"{result['p50']:>8.1f} {result['p95']:>8.1f} {result['busy']:>6} {result['failed']:>7} "
+              f"{result['broadcast']:>4}/{result['clients']:<5}  {result['spread']}")
+    print("-" * 96)
+    print("scaling: throughput relative to the first run's per-worker throughput; "
+          "broadcast: clients that received the message published on the queue")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
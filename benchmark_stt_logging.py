@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for the speech-to-text logging modes.
+
+Runs DeepgramService.transcribe_audio_bytes end to end on the shared runtime
+loop with the network call replaced by a canned Deepgram response (word
+timings included), and reports the per-request overhead of each logging
+mode relative to a run with logging disabled. Log output is written to
+os.devnull so formatting and I/O are both counted.
+
+Usage:
+    python benchmark_stt_logging.py [--requests 2000] [--words 80]
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+
+# Send all log output to /dev/null before the services configure logging
+devnull = open(os.devnull, "w")
+handler = logging.StreamHandler(devnull)
+handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+logging.basicConfig(level=logging.INFO, handlers=[handler], force=True)
+
+from services.deepgram_service import DeepgramService
+from services.stt_logging import STTLogger
+
+MODES = [
+    # (label, STT_LOG_MODE, log level, dump sample rate)
+    ("verbose / INFO", "verbose", logging.INFO, 1.0),
+    ("verbose / DEBUG", "verbose", logging.DEBUG, 1.0),
+    ("structured / INFO", "structured", logging.INFO, 1.0),
+    ("structured / DEBUG, 10% dumps", "structured", logging.DEBUG, 0.1),
+    ("structured / DEBUG, all dumps", "structured", logging.DEBUG, 1.0),
+]
+
+
+def make_response(words=80):
+    """A prerecorded /listen response shaped like Deepgram's, with word timings"""
+    vocabulary = ["hello", "looking", "glass", "avatar", "please", "tell", "me", "about", "the", "weather"]
+    word_list = []
+    for i in range(words):
+        word = vocabulary[i % len(vocabulary)]
+        word_list.append({
+            "word": word,
+            "start": round(i * 0.35, 2),
+            "end": round(i * 0.35 + 0.3, 2),
+            "confidence": 0.98,
+            "punctuated_word": word.capitalize() if i == 0 else word
+        })
+    transcript = " ".join(w["punctuated_word"] for w in word_list) + "."
+    return {
+        "metadata": {
+            "request_id": "00000000-0000-0000-0000-000000000000",
+            "created": "2024-01-15T10:30:45.123Z",
+            "duration": words * 0.35,
+            "channels": 1,
+            "models": ["nova-2"]
+        },
+        "results": {
+            "channels": [{
+                "alternatives": [{
+                    "transcript": transcript,
+                    "confidence": 0.98,
+                    "words": word_list
+                }]
+            }]
+        }
+    }
+
+
+def run(service, requests, audio):
+    start = time.perf_counter()
+    for _ in range(requests):
+        service.transcribe_audio_bytes(audio)
+    return (time.perf_counter() - start) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="requests per mode")
+    parser.add_argument("--words", type=int, default=80, help="words in the canned transcript")
+    args = parser.parse_args()
+
+    response = make_response(args.words)
+    audio = b"\x00" * 64 * 1024
+
+    service = DeepgramService()
+    # Pretend to be configured and answer every request with the canned response
+    service.api_key = service.api_key or "benchmark"
+    service.deepgram = service.deepgram or object()
+
+    async def canned(audio, mimetype, options):
+        return response
+
+    service._prerecorded = canned
+    root = logging.getLogger()
+
+    # Warm up the runtime loop, then measure the path with logging disabled
+    run(service, 50, audio)
+    logging.disable(logging.CRITICAL)
+    baseline = run(service, args.requests, audio)
+    logging.disable(logging.NOTSET)
+
+    print(f"📊 STT logging overhead ({args.requests} requests per mode, {args.words}-word responses)")
+    print("=" * 72)
+    print(f"{'mode':<34}{'per request':>14}{'overhead':>14}{'ratio':>10}")
+    print("-" * 72)
+    print(f"{'logging disabled':<34}{baseline * 1e6:>11.1f} µs{'-':>14}{'1.00x':>10}")
+    for label, mode, level, sample_rate in MODES:
+        service.stt_log = STTLogger(mode, sample_rate)
+        root.setLevel(level)
+        per_request = run(service, args.requests, audio)
+        overhead = per_request - baseline
+        print(f"{label:<34}{per_request * 1e6:>11.1f} µs{overhead * 1e6:>11.1f} µs{per_request / baseline:>9.2f}x")
+    root.setLevel(logging.INFO)
+    print("-" * 72)
+
+    service.runtime.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
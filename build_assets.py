@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+AI VRM Chat - Static Asset Build
+Writes content-hashed copies of the static JS, CSS and VRM models to
+static/dist/ with gzip and Brotli variants, plus the manifest the server
+uses to resolve template URLs. Unchanged files are not recompressed.
+
+Brotli variants need the `brotli` package; without it only gzip is built.
+
+Usage:
+    python build_assets.py
+    python build_assets.py --out static/dist --exclude js/main.js
+"""
+
+import os
+import sys
+import time
+import argparse
+import logging
+
+from services.static_assets import DEFAULT_EXCLUDE, build_assets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--static", default="static", help="static directory (default static)")
+    parser.add_argument("--out", default=os.getenv('ASSET_DIST_DIR', os.path.join('static', 'dist')),
+                        help="output directory (default ASSET_DIST_DIR or static/dist)")
+    parser.add_argument("--exclude", action="append",
+                        help=f"file to leave unfingerprinted, relative to --static (default {', '.join(DEFAULT_EXCLUDE)})")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    start = time.time()
+    manifest = build_assets(args.static, args.out, exclude=args.exclude)
+    if not manifest["brotli"]:
+        print("⚠️  brotli not installed - only gzip variants were built")
+
+    print(f"\n📦 {len(manifest['assets'])} assets in {args.out} ({time.time() - start:.2f} s)")
+    print("=" * 78)
+    print(f"{'file':<32} {'original':>12} {'gzip':>10} {'br':>10}")
+    print("-" * 78)
+    totals = [0, 0, 0]
+    for filename, entry in sorted(manifest["assets"].items()):
+        gz = entry["encodings"].get("gzip", entry["size"])
+        br = entry["encodings"].get("br", gz)
+        totals = [totals[0] + entry["size"], totals[1] + gz, totals[2] + br]
+        print(f"{filename:<32} {entry['size'] / 1024:>10.1f}KB {gz / 1024:>8.1f}KB {br / 1024:>8.1f}KB")
+    print("-" * 78)
+    print(f"{'total':<32} {totals[0] / 1024:>10.1f}KB {totals[1] / 1024:>8.1f}KB {totals[2] / 1024:>8.1f}KB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
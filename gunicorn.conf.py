@@ -0,0 +1,48 @@
+"""
+Gunicorn settings for the multi-worker production mode:
+
+    SOCKETIO_MESSAGE_QUEUE=redis://localhost:6379/0 gunicorn -c gunicorn.conf.py app:app
+
+Workers use the threaded ``gthread`` class, which matches Flask-SocketIO's
+threading async mode (the services run their own threads, executors and an
+asyncio loop, which eventlet/gevent monkey-patching would break). Each open
+WebSocket holds one worker thread, so ``GUNICORN_THREADS`` bounds the
+connections per worker.
+
+The app is imported in each worker after the fork (no ``preload_app``),
+because the services start background threads at import.
+
+Configuration (environment):
+- ``PORT``: listen port (default 5000)
+- ``WEB_CONCURRENCY``: worker processes (default CPU count)
+- ``GUNICORN_THREADS``: threads (= concurrent requests and sockets) per worker (default 100)
+- ``GUNICORN_WORKER_CLASS``: worker class (default gthread)
+- ``GUNICORN_TIMEOUT``: seconds before a stuck worker is restarted (default 120)
+- ``GUNICORN_ACCESS_LOG``: log every request to stdout (default false)
+"""
+
+import os
+import multiprocessing
+
+bind = f"0.0.0.0:{os.getenv('PORT', 5000)}"
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', 100))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+graceful_timeout = 30
+keepalive = 5
+preload_app = False
+accesslog = '-' if os.getenv('GUNICORN_ACCESS_LOG', 'false').lower() == 'true' else None
+
+
+def on_starting(server):
+    if workers > 1 and not os.getenv('SOCKETIO_MESSAGE_QUEUE'):
+        server.log.warning("⚠️  %d workers without SOCKETIO_MESSAGE_QUEUE: emits only reach clients "
+                           "connected to the emitting worker", workers)
+    if workers > 1 and os.getenv('SOCKETIO_TRANSPORTS', '').strip() != 'websocket':
+        server.log.warning("⚠️  Long-polling Socket.IO clients need sticky sessions; gunicorn cannot "
+                           "provide them across %d workers (see README, Production Server)", workers)
+
+
+def post_fork(server, worker):
+    server.log.info("Worker %s started (%d threads)", worker.pid, threads)
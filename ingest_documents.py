@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+AI VRM Chat - Bulk Document Ingestion
+Uploads a directory of text files or a JSONL file to the RAG knowledge base.
+
+Large documents are split into chunks and uploaded concurrently with retries.
+Progress is checkpointed under data/ingest/, so re-running the same command
+after an interruption skips everything already uploaded.
+
+Usage:
+    python ingest_documents.py corpus/
+    python ingest_documents.py documents.jsonl --workers 8 --chunk-chars 3000
+    python ingest_documents.py corpus/ --reset      # ignore the checkpoint
+"""
+
+import sys
+import time
+import argparse
+import logging
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from services.rag_service import RAGService
+from services.ingestion import BulkIngestor, IngestCheckpoint, iter_documents
+
+
+def progress_printer(interval=2.0):
+    """Progress callback that prints at most every `interval` seconds"""
+    last = time.monotonic()
+
+    def print_progress(report):
+        nonlocal last
+        now = time.monotonic()
+        if now - last < interval:
+            return
+        last = now
+        snapshot = report.snapshot()
+        print(f"   📄 {snapshot['documents']} documents, {snapshot['chunks_uploaded']} chunks uploaded, "
+              f"{snapshot['chunks_failed']} failed ({snapshot['docs_per_second']} docs/s)")
+
+    return print_progress
+
+
+def print_report(snapshot):
+    print("\n📊 Ingestion report")
+    print("=" * 60)
+    print(f"Elapsed:            {snapshot['elapsed_seconds']:.2f} s")
+    print(f"Documents:          {snapshot['documents']} "
+          f"({snapshot['documents_skipped']} already done, {snapshot['documents_failed']} failed)")
+    print(f"Chunks uploaded:    {snapshot['chunks_uploaded']} "
+          f"({snapshot['chunks_skipped']} skipped, {snapshot['chunks_failed']} failed, {snapshot['retries']} retries)")
+    print(f"Bytes uploaded:     {snapshot['bytes_uploaded']} ({snapshot['bytes_uploaded'] / 1024:.1f} KB)")
+    print(f"Throughput:         {snapshot['docs_per_second']} docs/s, "
+          f"{snapshot['bytes_per_second'] / 1024:.1f} KB/s")
+    if snapshot['errors']:
+        print("-" * 60)
+        print("First errors:")
+        for error in snapshot['errors'][:10]:
+            print(f"   ❌ {error['document']}: {error['error']}")
+    print("-" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="directory of text files or a JSONL file")
+    parser.add_argument("--workers", type=int, help="concurrent uploads (default INGEST_WORKERS or 4)")
+    parser.add_argument("--retries", type=int, help="retries per chunk (default INGEST_MAX_RETRIES or 4)")
+    parser.add_argument("--chunk-chars", type=int, help="maximum chunk size (default INGEST_CHUNK_CHARS or 4000)")
+    parser.add_argument("--overlap", type=int, help="characters shared by adjacent chunks (default 200)")
+    parser.add_argument("--checkpoint", help="checkpoint file (default data/ingest/<source>.checkpoint)")
+    parser.add_argument("--reset", action="store_true", help="discard the checkpoint and upload everything")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    rag_service = RAGService()
+    if not rag_service.rag_endpoint:
+        print("❌ RAG_ENDPOINT_URL is not set")
+        return 1
+
+    ingestor = BulkIngestor(rag_service, workers=args.workers, max_retries=args.retries,
+                            chunk_chars=args.chunk_chars, chunk_overlap=args.overlap)
+    checkpoint = IngestCheckpoint(args.checkpoint or BulkIngestor.checkpoint_path(args.source))
+    if args.reset:
+        checkpoint.reset()
+
+    print(f"📚 Ingesting {args.source} with {ingestor.workers} workers")
+    print(f"   Checkpoint: {checkpoint.path} ({len(checkpoint.done)} chunks already uploaded)")
+
+    try:
+        report = ingestor.run(iter_documents(args.source), checkpoint, on_progress=progress_printer())
+    except KeyboardInterrupt:
+        print("\n⚠️  Interrupted - re-run the same command to resume")
+        return 130
+    finally:
+        checkpoint.close()
+
+    snapshot = report.snapshot()
+    print_report(snapshot)
+    return 1 if snapshot['chunks_failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+AI VRM Chat - Offline VRM Optimization
+Writes level-of-detail variants of a VRM model: animation clips and unused
+nodes are stripped, textures are downscaled (and re-encoded as JPEG where
+opaque for the low variant) and mesh geometry is Draco-compressed. The
+variants and their stats are recorded in the manifest /api/vrm-model uses
+to pick a model per client.
+
+Texture passes need Pillow and Draco needs the `DracoPy` package; without
+DracoPy the variants are written uncompressed.
+
+Usage:
+    python optimize_vrm.py static/models/AvatarSample_C.vrm
+    python optimize_vrm.py static/models/AvatarSample_C.vrm --variant low --bandwidth 5
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+
+from services import vrm_optimizer
+from services.model_variants import QUALITY_ORDER
+
+# name -> (max texture edge, JPEG quality for opaque textures, Draco)
+PRESETS = {
+    "high": (2048, None, False),
+    "medium": (1024, None, True),
+    "low": (512, 80, True)
+}
+
+
+def update_manifest(path, model, static_dir, source_stats, variants):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        manifest = {"version": 1, "models": {}}
+    entry = manifest["models"].setdefault(model, {"variants": {}})
+    entry["source"] = source_stats
+    for name, (out_path, settings, stats) in variants.items():
+        entry["variants"][name] = {
+            "path": os.path.relpath(out_path, static_dir).replace(os.sep, "/"),
+            **settings,
+            "stats": stats
+        }
+    temp_path = path + ".part"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("model", help="source .vrm/.glb file")
+    parser.add_argument("--static", default="static", help="static directory (default static)")
+    parser.add_argument("--out", default=os.path.join("static", "models", "lod"),
+                        help="output directory (default static/models/lod)")
+    parser.add_argument("--manifest", default=os.getenv('VRM_VARIANTS_MANIFEST'),
+                        help="variant manifest (default VRM_VARIANTS_MANIFEST or <out>/manifest.json)")
+    parser.add_argument("--variant", action="append", choices=QUALITY_ORDER,
+                        help="variant to build (repeatable, default all)")
+    parser.add_argument("--no-draco", action="store_true", help="never Draco-compress geometry")
+    parser.add_argument("--bandwidth", type=float, default=20.0,
+                        help="reference bandwidth in Mbit/s for the load estimate (default 20)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    with open(args.model, "rb") as f:
+        source = f.read()
+    model = os.path.basename(args.model)
+    stem, extension = os.path.splitext(model)
+    draco_available = vrm_optimizer.DracoPy is not None and not args.no_draco
+    if vrm_optimizer.DracoPy is None and not args.no_draco:
+        print("⚠️  DracoPy not installed - variants are written without Draco compression")
+
+    os.makedirs(args.out, exist_ok=True)
+    source_stats = vrm_optimizer.model_stats(source, args.bandwidth)
+    variants = {}
+    for name in args.variant or reversed(QUALITY_ORDER):
+        max_texture, jpeg_quality, draco = PRESETS[name]
+        draco = draco and draco_available
+        start = time.time()
+        try:
+            data = vrm_optimizer.optimize(source, max_texture=max_texture, jpeg_quality=jpeg_quality, draco=draco)
+        except vrm_optimizer.OptimizationError as e:
+            print(f"❌ {name}: {e}")
+            return 1
+        out_path = os.path.join(args.out, f"{stem}.{name}{extension}")
+        with open(out_path, "wb") as f:
+            f.write(data)
+        settings = {"max_texture": max_texture, "jpeg_quality": jpeg_quality, "draco": draco}
+        variants[name] = (out_path, settings, vrm_optimizer.model_stats(data, args.bandwidth))
+        print(f"✅ {name}: {out_path} ({time.time() - start:.2f} s)")
+
+    manifest_path = args.manifest or os.path.join(args.out, "manifest.json")
+    update_manifest(manifest_path, model, args.static, source_stats, variants)
+
+    print(f"\n🗜️  {model} at {args.bandwidth:g} Mbit/s, manifest {manifest_path}")
+    print("=" * 86)
+    print(f"{'variant':<10} {'size':>10} {'saved':>7} {'texture':>8} {'triangles':>10} "
+          f"{'nodes':>6} {'decode':>10} {'est. load':>11}")
+    print("-" * 86)
+    rows = [("original", source_stats)] + [(name, stats) for name, (_, _, stats) in variants.items()]
+    for name, stats in rows:
+        saved = 1 - stats["size"] / source_stats["size"]
+        print(f"{name:<10} {stats['size'] / 1024:>8.0f}KB {saved:>6.0%} {stats['max_texture']:>8} "
+              f"{stats['triangles']:>10} {stats['nodes']:>6} {stats['decode_ms']:>8.1f}ms "
+              f"{stats['estimated_load_ms']:>9.0f}ms")
+    print("-" * 86)
+    print("Load estimate: download at the reference bandwidth plus measured texture/Draco decode "
+          "and a flat buffer parse rate")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,13 +2,24 @@
 """
 AI VRM Chat - Startup Script
 A simple script to launch the AI VRM Chat application
+
+Usage:
+    python run.py                     # development server, one process
+    python run.py --workers 4         # gunicorn with 4 workers (see gunicorn.conf.py)
+    python run.py --profile-startup   # report import and service init times, then exit
 """
 
 import os
 import sys
-import subprocess
+import time
+import argparse
+import tempfile
+import importlib.util
 from pathlib import Path
 
+# Checked with find_spec, which locates a package without importing it
+REQUIRED_MODULES = ['flask', 'flask_cors', 'flask_socketio', 'openai', 'boto3', 'dotenv', 'deepgram']
+
 def check_python_version():
     """Check if Python version is compatible"""
     if sys.version_info < (3, 8):
@@ -19,20 +30,13 @@ def check_python_version():
 
 def check_dependencies():
     """Check if required dependencies are installed"""
-    try:
-        import flask
-        import flask_cors
-        import flask_socketio
-        import openai
-        import boto3
-        import dotenv
-        import deepgram
-        print("✅ All dependencies are installed")
-        return True
-    except ImportError as e:
-        print(f"❌ Missing dependency: {e}")
+    missing = [name for name in REQUIRED_MODULES if importlib.util.find_spec(name) is None]
+    if missing:
+        print(f"❌ Missing dependencies: {', '.join(missing)}")
         print("Please run: pip install -r requirements.txt")
         return False
+    print("✅ All dependencies are installed")
+    return True
 
 def check_env_file():
     """Check if .env file exists"""
@@ -77,24 +81,124 @@ def create_directories():
     
     print("✅ Directories created")
 
-def start_server():
-    """Start the Flask server"""
+def start_server(workers=None):
+    """Start the Flask server, or gunicorn with `workers` processes"""
+    port = os.getenv('PORT', 5000)
     print("\n🚀 Starting AI VRM Chat Server...")
-    print("📍 Server will be available at: http://localhost:5000")
-    print("🥽 Looking Glass Go WebSocket: ws://localhost:5000")
+    print(f"📍 Server will be available at: http://localhost:{port}")
+    print(f"🥽 Looking Glass Go WebSocket: ws://localhost:{port}")
+    if workers:
+        os.environ['WEB_CONCURRENCY'] = str(workers)
+        queue = os.getenv('SOCKETIO_MESSAGE_QUEUE')
+        print(f"🏭 Production mode: {workers} gunicorn workers, "
+              f"Socket.IO message queue: {queue or 'none (emits stay in their worker)'}")
     print("\nPress Ctrl+C to stop the server")
     print("-" * 50)
     
+    # In this process: no second interpreter to start and import everything again
     try:
-        subprocess.run([sys.executable, 'app.py'], check=True)
+        if workers:
+            from gunicorn.app.wsgiapp import WSGIApplication
+            sys.argv = ['gunicorn', '-c', 'gunicorn.conf.py', 'app:app']
+            WSGIApplication("%(prog)s [OPTIONS] [APP_MODULE]").run()
+        else:
+            from app import run_server
+            run_server()
     except KeyboardInterrupt:
         print("\n👋 Server stopped by user")
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Error starting server: {e}")
-        sys.exit(1)
+
+def parse_import_times(lines):
+    """(module, self ms, cumulative ms, depth) from -X importtime output"""
+    entries = []
+    for line in lines:
+        if not line.startswith("import time:"):
+            continue
+        own, cumulative, name = line[len("import time:"):].rstrip("\n").split("|", 2)
+        try:
+            own_us, cumulative_us = int(own), int(cumulative)
+        except ValueError:
+            continue  # the header line
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        entries.append((name.strip(), own_us / 1000, cumulative_us / 1000, depth))
+    return entries
+
+def profile_startup(top=20):
+    """
+    Import the app and build every service once, reporting where the time
+    goes. Fails (exit status 1) if importing the app built any service.
+    """
+    if 'importtime' not in sys._xoptions:
+        # -X importtime can only be switched on at interpreter start. The new
+        # interpreter's own startup imports go to /dev/null; the report goes
+        # to the original stderr, passed along as an inherited descriptor.
+        stderr = os.dup(2)
+        os.set_inheritable(stderr, True)
+        os.environ['STARTUP_PROFILE_STDERR'] = str(stderr)
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, 2)
+        os.execv(sys.executable, [sys.executable, '-X', 'importtime'] + sys.argv)
+    stderr = int(os.environ.pop('STARTUP_PROFILE_STDERR', 0)) or os.dup(2)
+    # Services are built one after another below rather than on the warmup thread
+    os.environ['SERVICE_WARMUP'] = 'false'
+    
+    with tempfile.TemporaryFile(mode="w+") as trace:
+        os.dup2(trace.fileno(), 2)
+        try:
+            start = time.perf_counter()
+            import app as server
+            import_seconds = time.perf_counter() - start
+            # Anything built on this thread so far was built by importing app.py
+            # (module-level code such as the STT router touching a provider)
+            eager = [name for name, stat in server.service_registry.stats().items()
+                     if stat['thread'] == 'MainThread']
+            start = time.perf_counter()
+            server.service_registry.warmup(background=False)
+            init_seconds = time.perf_counter() - start
+        finally:
+            sys.stderr.flush()
+            os.dup2(stderr, 2)
+        trace.seek(0)
+        lines = trace.readlines()
+    
+    # Log output written during startup, without the import trace
+    sys.stderr.writelines(line for line in lines if not line.startswith("import time:"))
+    
+    # What app.py imports directly, and what services import when they are built
+    entries = [entry for entry in parse_import_times(lines) if entry[3] <= 1 and entry[0] != 'app']
+    entries.sort(key=lambda entry: entry[2], reverse=True)
+    print(f"\n⏱️  Startup profile (top {top} imports by cumulative time)")
+    print("=" * 64)
+    print(f"{'module':<40} {'self ms':>10} {'total ms':>11}")
+    print("-" * 64)
+    for name, own, cumulative, _ in entries[:top]:
+        print(f"{name:<40} {own:>10.1f} {cumulative:>11.1f}")
+    
+    stats = server.service_registry.stats()
+    print(f"\n{'service':<40} {'init ms':>10} {'status':>11}")
+    print("-" * 64)
+    for name, stat in sorted(stats.items(), key=lambda item: item[1]['init_ms'] or 0, reverse=True):
+        status = "ready" if stat['ready'] else "failed"
+        init_ms = f"{stat['init_ms']:.1f}" if stat['init_ms'] is not None else "-"
+        print(f"{name:<40} {init_ms:>10} {status:>11}")
+    print("-" * 64)
+    print(f"import app: {import_seconds * 1000:.0f} ms (server can accept connections), "
+          f"service init: {init_seconds * 1000:.0f} ms (normally on the warmup thread)")
+    if eager:
+        print(f"❌ Built while importing app.py instead of lazily: {', '.join(eager)}")
+        return 1
+    return 0
 
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description="Launch the AI VRM Chat server")
+    parser.add_argument("--workers", type=int, help="run under gunicorn with this many worker processes")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="report per-import and per-service init time, then exit")
+    args = parser.parse_args()
+    
+    if args.profile_startup:
+        sys.exit(profile_startup())
+    
     print("🤖 AI VRM Chat - Startup Script")
     print("=" * 40)
     
@@ -113,7 +217,7 @@ def main():
     create_directories()
     
     # Start server
-    start_server()
+    start_server(args.workers)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,144 @@
+import os
+import math
+import time
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted (queue full or wait timed out)"""
+
+    def __init__(self, route: str, reason: str, retry_after: int):
+        super().__init__(f"{route} is busy ({reason}), retry after {retry_after}s")
+        self.route = route
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionLimiter:
+    """
+    Bounded concurrency plus a bounded wait queue for one route.
+
+    Up to ``max_concurrent`` requests run at once and up to ``max_queue`` more
+    wait (at most ``queue_timeout`` seconds) for a free slot. Anything beyond
+    that is rejected immediately so callers can answer with a fast "busy".
+    """
+
+    def __init__(self, route: str, max_concurrent: int = 4, max_queue: int = 8, queue_timeout: float = 10.0):
+        self.route = route
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+        self._cond = threading.Condition()
+        self.active = 0
+        self.waiting = 0
+
+        # Stats
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_service = 0.0
+        self.completed = 0
+
+    def acquire(self) -> float:
+        """Wait for a slot and return the time spent queued (seconds)"""
+        start = time.monotonic()
+        with self._cond:
+            if self.active >= self.max_concurrent or self.waiting:
+                if self.waiting >= self.max_queue:
+                    self.rejected += 1
+                    raise AdmissionRejected(self.route, "queue full", self.retry_after())
+
+                self.waiting += 1
+                deadline = start + self.queue_timeout
+                try:
+                    while self.active >= self.max_concurrent:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.timed_out += 1
+                            raise AdmissionRejected(self.route, "queue timeout", self.retry_after())
+                        self._cond.wait(remaining)
+                finally:
+                    self.waiting -= 1
+
+            self.active += 1
+            waited = time.monotonic() - start
+            self.admitted += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            return waited
+
+    def release(self, service_time: float = 0.0):
+        """Free a slot and wake the next waiter"""
+        with self._cond:
+            self.active -= 1
+            self.completed += 1
+            self.total_service += service_time
+            self._cond.notify()
+
+    @contextmanager
+    def slot(self):
+        """Hold a slot for the duration of the ``with`` block"""
+        self.acquire()
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - start)
+
+    def retry_after(self) -> int:
+        """Rough number of seconds until a slot should free up"""
+        avg_service = self.total_service / self.completed if self.completed else 1.0
+        backlog = (self.waiting + 1) / max(self.max_concurrent, 1)
+        return max(1, math.ceil(avg_service * backlog))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "queue_timeout": self.queue_timeout,
+                "in_flight": self.active,
+                "queue_depth": self.waiting,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+                "avg_wait_ms": round(self.total_wait / self.admitted * 1000, 2) if self.admitted else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 2),
+                "avg_service_ms": round(self.total_service / self.completed * 1000, 2) if self.completed else 0.0
+            }
+
+
+class AdmissionController:
+    """
+    Registry of per-route admission limiters.
+
+    Limits come from ``ADMISSION_<ROUTE>_MAX_CONCURRENT``,
+    ``ADMISSION_<ROUTE>_MAX_QUEUE`` and ``ADMISSION_<ROUTE>_QUEUE_TIMEOUT``,
+    falling back to the ``ADMISSION_*`` defaults and then to the values
+    passed to ``register``.
+    """
+
+    def __init__(self):
+        self.limiters: Dict[str, AdmissionLimiter] = {}
+
+    def register(self, route: str, max_concurrent: int = 4, max_queue: int = 8, queue_timeout: float = 10.0) -> AdmissionLimiter:
+        prefix = f"ADMISSION_{route.upper()}_"
+        limiter = AdmissionLimiter(
+            route,
+            max_concurrent=int(os.getenv(prefix + 'MAX_CONCURRENT', os.getenv('ADMISSION_MAX_CONCURRENT', max_concurrent))),
+            max_queue=int(os.getenv(prefix + 'MAX_QUEUE', os.getenv('ADMISSION_MAX_QUEUE', max_queue))),
+            queue_timeout=float(os.getenv(prefix + 'QUEUE_TIMEOUT', os.getenv('ADMISSION_QUEUE_TIMEOUT', queue_timeout)))
+        )
+        self.limiters[route] = limiter
+        return limiter
+
+    def slot(self, route: str):
+        return self.limiters[route].slot()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {route: limiter.stats() for route, limiter in self.limiters.items()}
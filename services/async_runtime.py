@@ -0,0 +1,71 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Coroutine, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRuntime:
+    """
+    A long-lived asyncio event loop running on a dedicated daemon thread.
+
+    Synchronous code (Flask handlers) submits coroutines with ``submit`` or
+    ``run``; everything scheduled here shares the same loop, so loop-bound
+    resources such as HTTP client sessions stay warm between requests.
+    """
+
+    def __init__(self, name: str = "async-runtime"):
+        self.name = name
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the loop thread (idempotent)"""
+        if self.loop is not None:
+            return
+        with self._lock:
+            if self.loop is not None:
+                return
+            started = threading.Event()
+            loop = asyncio.new_event_loop()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(started.set)
+                loop.run_forever()
+
+            self._thread = threading.Thread(target=run, name=self.name, daemon=True)
+            self._thread.start()
+            started.wait()
+            self.loop = loop
+            logger.info(f"Async runtime '{self.name}' started")
+
+    def submit(self, coro: Coroutine) -> Future:
+        """Schedule a coroutine on the runtime loop from any thread"""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the runtime loop and block for its result"""
+        return self.submit(coro).result(timeout)
+
+    def in_runtime(self) -> bool:
+        """True when called from a coroutine running on the runtime loop"""
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+
+    def stop(self):
+        """Stop the loop and wait for the thread to exit"""
+        with self._lock:
+            if self.loop is None:
+                return
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout=5)
+            self.loop.close()
+            self.loop = None
+            self._thread = None
@@ -0,0 +1,249 @@
+import io
+import os
+import wave
+import shutil
+import logging
+import subprocess
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from services.metrics import STT_AUDIO_SECONDS_SAVED, STT_BYTES_SAVED, stage_timer
+
+logger = logging.getLogger(__name__)
+
+TARGET_RATE = 16000
+FRAME_MS = 20
+# Frames below this level (dBFS) are never speech, whatever the noise floor
+ABSOLUTE_FLOOR_DB = -50.0
+
+# (offset, magic, MIME type) for the containers browsers and clients send
+SIGNATURES = (
+    (0, b"RIFF", "audio/wav"),
+    (0, b"\x1aE\xdf\xa3", "audio/webm"),
+    (0, b"OggS", "audio/ogg"),
+    (0, b"fLaC", "audio/flac"),
+    (0, b"ID3", "audio/mpeg"),
+    (4, b"ftyp", "audio/mp4")
+)
+CODEC_MIMETYPES = {"flac": "audio/flac", "wav": "audio/wav"}
+
+
+def sniff_mimetype(data: bytes) -> Optional[str]:
+    """Container type from the first bytes, or None if unrecognized"""
+    for offset, magic, mimetype in SIGNATURES:
+        if data[offset:offset + len(magic)] == magic:
+            if mimetype == "audio/wav" and data[8:12] != b"WAVE":
+                continue
+            return mimetype
+    # Bare MPEG audio frames start with an 11-bit sync word
+    if len(data) > 1 and data[0] == 0xFF and data[1] & 0xE0 == 0xE0:
+        return "audio/mpeg"
+    return None
+
+
+def resample(samples: np.ndarray, rate: int, target: int = TARGET_RATE) -> np.ndarray:
+    """FFT resampling; the spectrum is truncated, which also low-passes before decimation"""
+    if rate == target or len(samples) == 0:
+        return samples
+    count = int(round(len(samples) * target / rate))
+    spectrum = np.fft.rfft(samples)
+    return (np.fft.irfft(spectrum, count) * (count / len(samples))).astype(np.float32)
+
+
+def read_wav(data: bytes) -> Tuple[np.ndarray, int]:
+    """Mono float32 samples in [-1, 1] from an integer PCM WAV"""
+    with wave.open(io.BytesIO(data), "rb") as wav:
+        width, channels, rate = wav.getsampwidth(), wav.getnchannels(), wav.getframerate()
+        frames = wav.readframes(wav.getnframes())
+    if width == 1:
+        pcm = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif width in (2, 4):
+        dtype = "<i2" if width == 2 else "<i4"
+        pcm = np.frombuffer(frames, dtype=dtype).astype(np.float32) / float(2 ** (8 * width - 1))
+    else:
+        raise ValueError(f"unsupported WAV sample width {width}")
+    if channels > 1:
+        pcm = pcm[:len(pcm) // channels * channels].reshape(-1, channels).mean(axis=1)
+    return pcm, rate
+
+
+def decode_audio(data: bytes, mimetype: Optional[str] = None, ffmpeg: Optional[str] = None) -> Tuple[np.ndarray, int]:
+    """
+    Mono float32 samples and their rate. Integer PCM WAV is read directly;
+    anything else is decoded by ffmpeg to 16 kHz.
+    """
+    if (mimetype or sniff_mimetype(data)) == "audio/wav":
+        try:
+            return read_wav(data)
+        except (wave.Error, ValueError):
+            pass  # e.g. float or compressed WAV; let ffmpeg handle it
+    if not ffmpeg:
+        raise RuntimeError("ffmpeg not found")
+    result = subprocess.run(
+        [ffmpeg, "-nostdin", "-loglevel", "error", "-i", "pipe:0",
+         "-f", "s16le", "-ac", "1", "-ar", str(TARGET_RATE), "pipe:1"],
+        input=data, capture_output=True, timeout=30
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {result.stderr.decode(errors='replace').strip()[:200]}")
+    return np.frombuffer(result.stdout, dtype="<i2").astype(np.float32) / 32768.0, TARGET_RATE
+
+
+def write_wav(samples: np.ndarray, rate: int = TARGET_RATE) -> bytes:
+    pcm = np.clip(np.rint(samples * 32767.0), -32768, 32767).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+def speech_bounds(samples: np.ndarray, rate: int = TARGET_RATE, margin_db: float = 10.0,
+                  padding_ms: float = 200.0) -> Optional[Tuple[int, int]]:
+    """
+    Sample range holding speech, by frame energy: a frame is voiced when it
+    is ``margin_db`` above the clip's noise floor (10th percentile). A clip
+    with no such contrast is all speech if it is louder than
+    ``ABSOLUTE_FLOOR_DB`` and silent otherwise. Isolated voiced frames
+    (clicks) are ignored and ``padding_ms`` is kept on each side. Returns
+    None if the clip has no speech.
+    """
+    hop = rate * FRAME_MS // 1000
+    count = len(samples) // hop
+    if count == 0:
+        return None
+    frames = samples[:count * hop].reshape(count, hop)
+    energy = 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+    floor, peak = np.percentile(energy, 10), np.percentile(energy, 99)
+    if peak - floor < margin_db:
+        return (0, len(samples)) if peak > ABSOLUTE_FLOOR_DB else None
+    voiced = energy > max(ABSOLUTE_FLOOR_DB, floor + margin_db)
+    # Keep a frame only if at least two of it and its neighbours are voiced
+    voiced &= np.convolve(voiced, np.ones(3), mode="same") >= 2
+    indices = np.flatnonzero(voiced)
+    if indices.size == 0:
+        return None
+    padding = int(rate * padding_ms / 1000)
+    return max(0, int(indices[0]) * hop - padding), min(len(samples), (int(indices[-1]) + 1) * hop + padding)
+
+
+class PreparedAudio:
+    """The payload to send to speech-to-text and what preprocessing saved"""
+
+    __slots__ = ("data", "mimetype", "declared_mimetype", "action",
+                 "bytes_in", "seconds_in", "seconds_out")
+
+    def __init__(self, data: bytes, mimetype: str, declared_mimetype: Optional[str], action: str,
+                 bytes_in: int, seconds_in: Optional[float] = None, seconds_out: Optional[float] = None):
+        self.data = data
+        self.mimetype = mimetype
+        self.declared_mimetype = declared_mimetype
+        self.action = action
+        self.bytes_in = bytes_in
+        self.seconds_in = seconds_in
+        self.seconds_out = seconds_out
+
+    @property
+    def silent(self) -> bool:
+        return self.action == "silent"
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {
+            "action": self.action,
+            "mimetype": self.mimetype,
+            "declared_mimetype": self.declared_mimetype,
+            "bytes_in": self.bytes_in,
+            "bytes_out": len(self.data),
+            "bytes_saved": self.bytes_in - len(self.data)
+        }
+        if self.seconds_in is not None:
+            stats["seconds_in"] = round(self.seconds_in, 3)
+            stats["seconds_out"] = round(self.seconds_out, 3)
+            stats["seconds_saved"] = round(self.seconds_in - self.seconds_out, 3)
+        return stats
+
+
+class AudioPreprocessor:
+    """
+    Prepares recorded speech for speech-to-text.
+
+    The real container is sniffed (browsers often label webm/opus as WAV),
+    the audio is decoded to 16 kHz mono PCM (WAV directly, anything else
+    through ffmpeg) and leading and trailing silence is trimmed with an
+    energy-based VAD. The trimmed audio is re-encoded (FLAC through ffmpeg,
+    or 16-bit WAV) and sent only if it removes at least ``STT_MIN_TRIM_MS``
+    of audio or is smaller than the upload; otherwise the upload is sent
+    unchanged with its sniffed MIME type. Clips without speech are flagged
+    so callers can skip transcription.
+
+    Configuration (environment):
+    - ``STT_PREPROCESS_ENABLED``: preprocess uploads at all (default true)
+    - ``STT_PREPROCESS_CODEC``: ``flac`` or ``wav`` for trimmed audio; FLAC
+      needs ffmpeg and falls back to WAV (default flac)
+    - ``STT_VAD_MARGIN_DB``: how far above the noise floor speech must be (default 10)
+    - ``STT_VAD_PADDING_MS``: audio kept around detected speech (default 200)
+    - ``STT_MIN_TRIM_MS``: smallest trim worth re-encoding for (default 250)
+    - ``STT_FFMPEG``: ffmpeg binary (default: on PATH)
+    """
+
+    def __init__(self, enabled: Optional[bool] = None, codec: Optional[str] = None,
+                 margin_db: Optional[float] = None, padding_ms: Optional[float] = None,
+                 min_trim_ms: Optional[float] = None):
+        self.enabled = enabled if enabled is not None else \
+            os.getenv('STT_PREPROCESS_ENABLED', 'true').lower() == 'true'
+        self.codec = (codec or os.getenv('STT_PREPROCESS_CODEC', 'flac')).lower()
+        if self.codec not in CODEC_MIMETYPES:
+            raise ValueError(f"STT_PREPROCESS_CODEC must be one of {', '.join(CODEC_MIMETYPES)}, got '{self.codec}'")
+        self.margin_db = margin_db if margin_db is not None else float(os.getenv('STT_VAD_MARGIN_DB', 10))
+        self.padding_ms = padding_ms if padding_ms is not None else float(os.getenv('STT_VAD_PADDING_MS', 200))
+        self.min_trim = (min_trim_ms if min_trim_ms is not None else float(os.getenv('STT_MIN_TRIM_MS', 250))) / 1000
+        self.ffmpeg = os.getenv('STT_FFMPEG') or shutil.which('ffmpeg')
+        self._warned = False
+
+    def process(self, data: bytes, declared_mimetype: Optional[str] = None) -> PreparedAudio:
+        declared = declared_mimetype.split(";")[0].strip().lower() if declared_mimetype else None
+        mimetype = sniff_mimetype(data) or declared or "application/octet-stream"
+        if not self.enabled:
+            return PreparedAudio(data, mimetype, declared, "disabled", len(data))
+
+        with stage_timer('stt_preprocess'):
+            try:
+                samples, rate = decode_audio(data, mimetype, self.ffmpeg)
+            except Exception as e:
+                if not self._warned:
+                    logger.warning(f"🎙️ Sending {mimetype} audio unprocessed: {e}")
+                    self._warned = True
+                return PreparedAudio(data, mimetype, declared, "passthrough", len(data))
+
+            seconds_in = len(samples) / rate
+            samples = resample(samples, rate)
+            bounds = speech_bounds(samples, TARGET_RATE, self.margin_db, self.padding_ms)
+            if bounds is None:
+                return PreparedAudio(b"", mimetype, declared, "silent", len(data), seconds_in, 0.0)
+            samples = samples[bounds[0]:bounds[1]]
+            seconds_out = len(samples) / TARGET_RATE
+
+            encoded, encoded_type = self._encode(samples)
+            if seconds_in - seconds_out < self.min_trim and len(encoded) >= len(data):
+                prepared = PreparedAudio(data, mimetype, declared, "passthrough", len(data), seconds_in, seconds_in)
+            else:
+                action = "trimmed" if seconds_out < seconds_in else "reencoded"
+                prepared = PreparedAudio(encoded, encoded_type, declared, action, len(data), seconds_in, seconds_out)
+
+        STT_BYTES_SAVED.inc(max(0, prepared.bytes_in - len(prepared.data)))
+        STT_AUDIO_SECONDS_SAVED.inc(seconds_in - prepared.seconds_out)
+        return prepared
+
+    def _encode(self, samples: np.ndarray) -> Tuple[bytes, str]:
+        wav = write_wav(samples)
+        if self.codec == "flac" and self.ffmpeg:
+            result = subprocess.run(
+                [self.ffmpeg, "-nostdin", "-loglevel", "error", "-i", "pipe:0", "-f", "flac", "pipe:1"],
+                input=wav, capture_output=True, timeout=30
+            )
+            if result.returncode == 0 and result.stdout:
+                return result.stdout, CODEC_MIMETYPES["flac"]
+        return wav, CODEC_MIMETYPES["wav"]
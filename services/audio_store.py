@@ -0,0 +1,443 @@
+import os
+import re
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: a single server process, so there is nobody to coordinate with
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+AUDIO_ID_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+# A clip's file mtime is its last use across all processes; each process
+# refreshes it at most this often per clip
+TOUCH_INTERVAL = 60.0
+# Temp files and clip-less sidecars younger than this may belong to a write in progress
+STALE_SECONDS = 3600.0
+JANITOR_LOCK = ".janitor.lock"
+
+MIMETYPES = {
+    "mp3": "audio/mpeg",
+    "wav": "audio/wav",
+    "ogg": "audio/ogg",
+    "flac": "audio/flac"
+}
+
+
+def audio_id_for(text: str, voice_id: str, audio_format: str) -> str:
+    """Content address for a synthesized clip"""
+    digest = hashlib.sha256()
+    for part in (audio_format.lower(), voice_id, text):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+def audio_url(audio_id: Optional[str]) -> Optional[str]:
+    """URL the client uses to fetch a stored clip"""
+    return f"/api/audio/{audio_id}" if audio_id else None
+
+
+class AudioBlob:
+    """A stored clip: bytes from the hot tier, or a path on the disk tier"""
+
+    __slots__ = ("audio_id", "mimetype", "size", "mtime", "data", "path")
+
+    def __init__(self, audio_id: str, mimetype: str, size: int, mtime: float,
+                 data: Optional[bytes] = None, path: Optional[str] = None):
+        self.audio_id = audio_id
+        self.mimetype = mimetype
+        self.size = size
+        self.mtime = mtime
+        self.data = data
+        self.path = path
+
+
+class AudioStore:
+    """
+    Content-addressed store for synthesized speech, served by ID.
+
+    Clips live on disk as ``<id>.<ext>`` inside ``directory`` (outside
+    ``static/`` so they are only reachable through ``/api/audio/<id>``), with
+    the most recently used ones also kept in a bounded in-memory hot tier.
+    Writes go to a temporary file that is atomically renamed into place, and a
+    per-ID lock lets concurrent requests for the same clip wait for one
+    synthesis. A background janitor deletes clips unused for longer than
+    ``max_age`` and evicts least recently used clips beyond ``max_bytes``.
+    Server workers can share the directory: a clip another process stored is
+    indexed on its first lookup. The janitor therefore works from the
+    directory, not from this process's index: a clip's mtime is refreshed
+    when it is used, and a lock file keeps two workers from sweeping at once.
+
+    Data derived from a clip (e.g. its lip-sync track) can be kept next to it
+    as a ``<id>.<kind>.json`` sidecar, which is deleted together with the clip.
+
+    Configuration (environment):
+    - ``AUDIO_STORE_DIR``: disk tier directory (default data/audio)
+    - ``AUDIO_STORE_MAX_BYTES``: disk quota (default 500 MB)
+    - ``AUDIO_STORE_MAX_AGE``: seconds a clip may go unused (default 7 days)
+    - ``AUDIO_STORE_MEMORY_BYTES``: hot tier size (default 32 MB)
+    - ``AUDIO_STORE_JANITOR_INTERVAL``: seconds between janitor runs (default 300)
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: Optional[int] = None,
+                 max_age: Optional[float] = None, memory_bytes: Optional[int] = None):
+        self.directory = directory or os.getenv('AUDIO_STORE_DIR', 'data/audio')
+        self.max_bytes = max_bytes or int(os.getenv('AUDIO_STORE_MAX_BYTES', 500 * 1024 * 1024))
+        self.max_age = max_age or float(os.getenv('AUDIO_STORE_MAX_AGE', 7 * 24 * 3600))
+        self.memory_bytes = memory_bytes or int(os.getenv('AUDIO_STORE_MEMORY_BYTES', 32 * 1024 * 1024))
+
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        # audio_id -> [extension, size, last_used]; kept in LRU order
+        self._index: "OrderedDict[str, list]" = OrderedDict()
+        self._total_bytes = 0
+        # audio_id -> (bytes, mtime); kept in LRU order
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._memory_total = 0
+        self._sidecar_kinds = set()
+        self._janitor = None
+
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._load_index()
+
+    def path_for(self, audio_id: str, extension: str = "mp3") -> str:
+        return os.path.join(self.directory, f"{audio_id}.{extension}")
+
+    def sidecar_path(self, audio_id: str, kind: str) -> str:
+        return os.path.join(self.directory, f"{audio_id}.{kind}.json")
+
+    def contains(self, audio_id: str) -> bool:
+        """Check for a clip and mark it recently used"""
+        with self._lock:
+            entry = self._index.get(audio_id) or self._adopt(audio_id)
+            if entry is None or not os.path.exists(self.path_for(audio_id, entry[0])):
+                if entry is not None:
+                    # File removed behind our back
+                    self._forget(audio_id)
+                self.misses += 1
+                return False
+            self._touch(audio_id, entry)
+            self.hits += 1
+            return True
+
+    def get(self, audio_id: str) -> Optional[AudioBlob]:
+        """Fetch a clip for serving, preferring the hot tier"""
+        with self._lock:
+            entry = self._index.get(audio_id) or self._adopt(audio_id)
+            if entry is None:
+                return None
+            extension, size, _ = entry
+            self._touch(audio_id, entry)
+            mimetype = MIMETYPES.get(extension, "application/octet-stream")
+
+            cached = self._memory.get(audio_id)
+            if cached is not None:
+                self._memory.move_to_end(audio_id)
+                self.memory_hits += 1
+                data, mtime = cached
+                return AudioBlob(audio_id, mimetype, len(data), mtime, data=data)
+
+        path = self.path_for(audio_id, extension)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            with self._lock:
+                self._forget(audio_id)
+            return None
+        return AudioBlob(audio_id, mimetype, stat.st_size, stat.st_mtime, path=path)
+
+    def read(self, audio_id: str) -> Optional[bytes]:
+        """Raw bytes of a clip (for analysis rather than serving)"""
+        blob = self.get(audio_id)
+        if blob is None or blob.data is not None:
+            return blob.data if blob else None
+        try:
+            with open(blob.path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def store_sidecar(self, audio_id: str, kind: str, data: bytes) -> bool:
+        """Atomically write derived data for a stored clip; False if the clip is gone"""
+        with self._lock:
+            if audio_id not in self._index:
+                return False
+            self._sidecar_kinds.add(kind)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix=".sidecar_", suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, self.sidecar_path(audio_id, kind))
+        except Exception:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        return True
+
+    def load_sidecar(self, audio_id: str, kind: str) -> Optional[bytes]:
+        with self._lock:
+            if audio_id not in self._index and self._adopt(audio_id) is None:
+                return None
+        try:
+            with open(self.sidecar_path(audio_id, kind), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def key_lock(self, audio_id: str) -> threading.Lock:
+        """Lock that serializes synthesis of one clip"""
+        with self._lock:
+            lock = self._key_locks.get(audio_id)
+            if lock is None:
+                lock = self._key_locks[audio_id] = threading.Lock()
+            return lock
+
+    def release_key_lock(self, audio_id: str):
+        with self._lock:
+            lock = self._key_locks.get(audio_id)
+            if lock is not None and not lock.locked():
+                del self._key_locks[audio_id]
+
+    def store(self, audio_id: str, data: bytes, extension: str = "mp3") -> str:
+        """Atomically write a clip, keep it hot, and enforce the size quota"""
+        path = self.path_for(audio_id, extension)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix=".audio_", suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+        now = time.time()
+        with self._lock:
+            if audio_id in self._index:
+                self._forget(audio_id, delete_file=False)
+            self._index[audio_id] = [extension, len(data), now]
+            self._total_bytes += len(data)
+            self._remember(audio_id, data, now)
+            over_quota = self._total_bytes > self.max_bytes
+        if over_quota:
+            self.sweep()
+        return audio_id
+
+    def start_janitor(self, interval: Optional[float] = None):
+        """Run quota enforcement periodically on a daemon thread"""
+        if self._janitor is not None:
+            return
+        interval = interval or float(os.getenv('AUDIO_STORE_JANITOR_INTERVAL', 300))
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.sweep()
+                except Exception as e:
+                    logger.error(f"Audio store janitor failed: {e}")
+
+        self._janitor = threading.Thread(target=run, name="audio-janitor", daemon=True)
+        self._janitor.start()
+
+    def sweep(self):
+        """
+        Delete expired clips and stale temp files, then enforce the size quota.
+
+        Decisions are based on the directory (file sizes and mtimes), which
+        every worker sharing it sees alike; if another process is already
+        sweeping, this call returns without doing anything.
+        """
+        with self._janitor_lock() as acquired:
+            if not acquired:
+                return
+            now = time.time()
+            clips: Dict[str, list] = {}
+            sidecars: Dict[str, list] = {}
+            for name in os.listdir(self.directory):
+                path = os.path.join(self.directory, name)
+                audio_id, _, extension = name.partition(".")
+                try:
+                    if name.endswith(".part"):
+                        # Left over from a write interrupted by a crash
+                        if now - os.path.getmtime(path) > STALE_SECONDS:
+                            os.unlink(path)
+                    elif AUDIO_ID_PATTERN.match(audio_id) and extension in MIMETYPES:
+                        stat = os.stat(path)
+                        clips[audio_id] = [extension, stat.st_size, stat.st_mtime]
+                    elif AUDIO_ID_PATTERN.match(audio_id) and name.endswith(".json"):
+                        sidecars.setdefault(audio_id, []).append((path, os.path.getmtime(path)))
+                except OSError:
+                    pass  # Removed while we looked
+
+            removed = set()
+            expired = evicted = 0
+            total = sum(size for _, size, _ in clips.values())
+            for audio_id, (_, size, last_used) in sorted(clips.items(), key=lambda item: item[1][2]):
+                if now - last_used > self.max_age:
+                    expired += 1
+                elif total > self.max_bytes and len(clips) - len(removed) > 1:
+                    evicted += 1
+                else:
+                    continue
+                removed.add(audio_id)
+                total -= size
+            for audio_id in removed:
+                extension = clips.pop(audio_id)[0]
+                try:
+                    os.unlink(self.path_for(audio_id, extension))
+                except OSError as e:
+                    logger.warning(f"Could not delete stored audio {audio_id}: {e}")
+
+            # Sidecars of removed clips, and of clips removed before a restart
+            for audio_id, files in sidecars.items():
+                if audio_id in clips:
+                    continue
+                for path, mtime in files:
+                    if audio_id in removed or now - mtime > STALE_SECONDS:
+                        try:
+                            os.unlink(path)
+                        except OSError:
+                            pass
+
+            # Bring this process's index in line with the directory (other
+            # workers' clips included, so the quota check in store() is global)
+            with self._lock:
+                for audio_id, entry in list(self._index.items()):
+                    if audio_id in removed or (audio_id not in clips and
+                                               not os.path.exists(self.path_for(audio_id, entry[0]))):
+                        self._forget(audio_id, delete_file=False)
+                for audio_id, entry in clips.items():
+                    if audio_id not in self._index:
+                        self._index[audio_id] = entry
+                self._total_bytes = sum(entry[1] for entry in self._index.values())
+                self.expired += expired
+                self.evictions += evicted
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "files": len(self._index),
+                "total_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "max_age": self.max_age,
+                "memory_files": len(self._memory),
+                "memory_bytes": self._memory_total,
+                "memory_max_bytes": self.memory_bytes,
+                "hits": self.hits,
+                "memory_hits": self.memory_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expired": self.expired,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+    def _remember(self, audio_id: str, data: bytes, mtime: float):
+        if len(data) > self.memory_bytes:
+            return
+        self._memory[audio_id] = (data, mtime)
+        self._memory_total += len(data)
+        while self._memory_total > self.memory_bytes:
+            _, (dropped, _) = self._memory.popitem(last=False)
+            self._memory_total -= len(dropped)
+
+    def _forget(self, audio_id: str, delete_file: bool = True):
+        entry = self._index.pop(audio_id, None)
+        if entry is None:
+            return
+        self._total_bytes -= entry[1]
+        cached = self._memory.pop(audio_id, None)
+        if cached is not None:
+            self._memory_total -= len(cached[0])
+        if delete_file:
+            try:
+                os.unlink(self.path_for(audio_id, entry[0]))
+            except OSError as e:
+                logger.warning(f"Could not delete stored audio {audio_id}: {e}")
+            for kind in self._sidecar_kinds:
+                try:
+                    os.unlink(self.sidecar_path(audio_id, kind))
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.warning(f"Could not delete {kind} data for {audio_id}: {e}")
+
+    def _touch(self, audio_id: str, entry: list):
+        """Mark a clip used; its file mtime carries that to the janitor in whichever process runs it"""
+        now = time.time()
+        if now - entry[2] > TOUCH_INTERVAL:
+            try:
+                os.utime(self.path_for(audio_id, entry[0]))
+            except OSError:
+                pass
+        entry[2] = now
+        self._index.move_to_end(audio_id)
+
+    @contextmanager
+    def _janitor_lock(self):
+        """Non-blocking lock shared by every process using the directory; yields whether it was taken"""
+        if fcntl is None:
+            yield True
+            return
+        with open(os.path.join(self.directory, JANITOR_LOCK), "a") as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _adopt(self, audio_id: str) -> Optional[list]:
+        """
+        Index a clip another process (e.g. another server worker sharing the
+        directory) wrote after our index was built
+        """
+        if not AUDIO_ID_PATTERN.match(audio_id):
+            return None
+        for extension in MIMETYPES:
+            try:
+                stat = os.stat(self.path_for(audio_id, extension))
+            except OSError:
+                continue
+            # Last used when the file was last touched, so the first use here refreshes it
+            entry = self._index[audio_id] = [extension, stat.st_size, stat.st_mtime]
+            self._total_bytes += stat.st_size
+            return entry
+        return None
+
+    def _load_index(self):
+        """Rebuild the LRU index from clips already on disk (oldest first)"""
+        entries = []
+        for name in os.listdir(self.directory):
+            audio_id, _, extension = name.partition(".")
+            if not AUDIO_ID_PATTERN.match(audio_id) or extension not in MIMETYPES:
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, audio_id, extension, stat.st_size))
+        for mtime, audio_id, extension, size in sorted(entries):
+            self._index[audio_id] = [extension, size, mtime]
+            self._total_bytes += size
+        if entries:
+            logger.info(f"Audio store: {len(entries)} clips, {self._total_bytes / 1024 / 1024:.1f} MB")
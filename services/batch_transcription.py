@@ -0,0 +1,127 @@
+import io
+import os
+import time
+import logging
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ZIP_MAGIC = b"PK\x03\x04"
+
+
+class BatchInputError(ValueError):
+    """The uploaded batch is empty, malformed or over its limits"""
+
+
+def collect_batch_files(uploads: Iterable[Tuple[str, bytes]], max_files: int,
+                        max_bytes: int) -> List[Tuple[str, bytes]]:
+    """
+    Flatten uploaded files into ``(name, data)`` pairs; zip archives are
+    expanded (directories, dotfiles and ``__MACOSX`` entries skipped).
+    Limits are checked against the uncompressed sizes before anything is
+    extracted.
+    """
+    files: List[Tuple[str, bytes]] = []
+    count = 0
+    total = 0
+
+    def add(size: int) -> None:
+        nonlocal count, total
+        count += 1
+        total += size
+        if count > max_files:
+            raise BatchInputError(f"batch has more than {max_files} files")
+        if total > max_bytes:
+            raise BatchInputError(f"batch is larger than {max_bytes // (1024 * 1024)} MB")
+
+    for name, data in uploads:
+        if data[:4] != ZIP_MAGIC:
+            add(len(data))
+            files.append((name, data))
+            continue
+        try:
+            with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                entries = []
+                for info in archive.infolist():
+                    base = os.path.basename(info.filename)
+                    if info.is_dir() or not base or base.startswith(".") or "__MACOSX" in info.filename:
+                        continue
+                    add(info.file_size)
+                    entries.append(info)
+                # Only read once the whole archive fits (reads stop at the declared sizes)
+                files.extend((info.filename, archive.read(info)) for info in entries)
+        except zipfile.BadZipFile as e:
+            raise BatchInputError(f"{name}: {e}")
+
+    if not files:
+        raise BatchInputError("no audio files in the batch")
+    return files
+
+
+class BatchTranscriber:
+    """
+    Transcribes many files concurrently and yields each result as soon as it
+    completes (not in upload order), followed by a summary.
+
+    All batches share one pool of ``STT_BATCH_CONCURRENCY`` workers, so
+    concurrent batches cannot overload the providers between them. Each
+    worker runs ``transcribe(name, data)``, which returns a dict merged into
+    the file's result; exceptions become ``"status": "error"`` results.
+    Files that have not started when the client goes away are cancelled.
+
+    Configuration (environment):
+    - ``STT_BATCH_CONCURRENCY``: files transcribed at once (default 8)
+    - ``STT_BATCH_MAX_FILES``: most files per batch (default 500)
+    - ``STT_BATCH_MAX_MB``: largest total (uncompressed) batch size (default 500)
+    """
+
+    def __init__(self, transcribe: Callable[[str, bytes], Dict[str, Any]], concurrency: Optional[int] = None):
+        self.transcribe = transcribe
+        self.concurrency = concurrency or int(os.getenv('STT_BATCH_CONCURRENCY', 8))
+        self.max_files = int(os.getenv('STT_BATCH_MAX_FILES', 500))
+        self.max_bytes = int(float(os.getenv('STT_BATCH_MAX_MB', 500)) * 1024 * 1024)
+        self.executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='stt-batch')
+
+    def collect(self, uploads: Iterable[Tuple[str, bytes]]) -> List[Tuple[str, bytes]]:
+        return collect_batch_files(uploads, self.max_files, self.max_bytes)
+
+    def run(self, files: List[Tuple[str, bytes]]) -> Iterator[Dict[str, Any]]:
+        started = time.monotonic()
+        futures = [self.executor.submit(self._one, index, name, data, time.monotonic())
+                   for index, (name, data) in enumerate(files)]
+        counts = {"ok": 0, "error": 0}
+        try:
+            for future in as_completed(futures):
+                result = future.result()
+                counts[result["status"]] += 1
+                yield result
+        finally:
+            # Stop queued work if the client disconnected mid-stream
+            cancelled = sum(future.cancel() for future in futures)
+            if cancelled:
+                logger.info(f"Batch transcription abandoned: {cancelled} queued files cancelled")
+
+        elapsed = time.monotonic() - started
+        yield {
+            "type": "summary",
+            "files": len(files),
+            "ok": counts["ok"],
+            "errors": counts["error"],
+            "total_ms": round(elapsed * 1000, 1),
+            "files_per_second": round(len(files) / elapsed, 2) if elapsed > 0 else None
+        }
+
+    def _one(self, index: int, name: str, data: bytes, submitted: float) -> Dict[str, Any]:
+        start = time.monotonic()
+        result = {"type": "result", "index": index, "file": name, "bytes": len(data),
+                  "queued_ms": round((start - submitted) * 1000, 1)}
+        try:
+            result.update(self.transcribe(name, data))
+            result["status"] = "ok"
+        except Exception as e:
+            result["status"] = "error"
+            result["error"] = str(e)
+        result["ms"] = round((time.monotonic() - start) * 1000, 1)
+        return result
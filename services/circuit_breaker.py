@@ -0,0 +1,262 @@
+import os
+import math
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+from services.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+CIRCUIT_STATE = get_metrics().gauge(
+    "vrmchat_circuit_state",
+    "Circuit breaker state (0 closed, 1 half-open, 2 open)",
+    ("name",)
+)
+CIRCUIT_REJECTED = get_metrics().counter(
+    "vrmchat_circuit_rejected_total",
+    "Calls short-circuited while a breaker was open",
+    ("name",)
+)
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit is open"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} circuit is open, retry after {retry_after:.1f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After ``failure_threshold`` consecutive failures (errors, or calls slower
+    than ``slow_call_seconds``) the circuit opens and calls fail immediately
+    with ``CircuitOpenError``. After ``reset_timeout`` seconds it goes
+    half-open and lets ``half_open_trials`` calls through; if they all
+    succeed it closes again, and any failure re-opens it.
+
+    Settings come from the constructor or ``<NAME>_BREAKER_FAILURES``,
+    ``<NAME>_BREAKER_SLOW_CALL``, ``<NAME>_BREAKER_RESET_TIMEOUT`` and
+    ``<NAME>_BREAKER_HALF_OPEN_TRIALS``.
+    """
+
+    def __init__(self, name: str, failure_threshold: Optional[int] = None,
+                 slow_call_seconds: Optional[float] = None, reset_timeout: Optional[float] = None,
+                 half_open_trials: Optional[int] = None):
+        prefix = f"{name.upper()}_BREAKER_"
+        self.name = name
+        self.failure_threshold = failure_threshold or int(os.getenv(prefix + 'FAILURES', 5))
+        self.slow_call_seconds = slow_call_seconds or float(os.getenv(prefix + 'SLOW_CALL', 20))
+        self.reset_timeout = reset_timeout or float(os.getenv(prefix + 'RESET_TIMEOUT', 30))
+        self.half_open_trials = half_open_trials or int(os.getenv(prefix + 'HALF_OPEN_TRIALS', 1))
+
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._trials_started = 0
+        self._trials_succeeded = 0
+
+        # Stats
+        self.calls = 0
+        self.successes = 0
+        self.failures = 0
+        self.slow_calls = 0
+        self.rejected = 0
+        self.times_opened = 0
+        CIRCUIT_STATE.set(0, name=name)
+
+    def acquire(self):
+        """Admit a call or raise ``CircuitOpenError``"""
+        with self._lock:
+            if self.state == OPEN:
+                remaining = self.opened_at + self.reset_timeout - time.monotonic()
+                if remaining > 0:
+                    self.rejected += 1
+                    CIRCUIT_REJECTED.inc(name=self.name)
+                    raise CircuitOpenError(self.name, remaining)
+                self._transition(HALF_OPEN)
+
+            if self.state == HALF_OPEN:
+                if self._trials_started >= self.half_open_trials:
+                    self.rejected += 1
+                    CIRCUIT_REJECTED.inc(name=self.name)
+                    raise CircuitOpenError(self.name, self.reset_timeout)
+                self._trials_started += 1
+
+            self.calls += 1
+
+    def record_success(self, duration: float = 0.0):
+        """Report a completed call; slow calls count as failures"""
+        if duration > self.slow_call_seconds:
+            with self._lock:
+                self.slow_calls += 1
+            self.record_failure()
+            return
+        with self._lock:
+            self.successes += 1
+            self.consecutive_failures = 0
+            if self.state == HALF_OPEN:
+                self._trials_succeeded += 1
+                if self._trials_succeeded >= self.half_open_trials:
+                    self._transition(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.consecutive_failures >= self.failure_threshold):
+                self._transition(OPEN)
+
+    def release(self):
+        """Report a call that ended without a verdict (e.g. abandoned by the caller)"""
+        with self._lock:
+            if self.state == HALF_OPEN and self._trials_started > 0:
+                self._trials_started -= 1
+
+    @contextmanager
+    def call(self):
+        """Guard a block: exceptions count as failures, normal exit as success"""
+        self.acquire()
+        start = time.monotonic()
+        try:
+            yield
+        except Exception:
+            self.record_failure()
+            raise
+        except BaseException:
+            self.release()
+            raise
+        else:
+            self.record_success(time.monotonic() - start)
+
+    def _transition(self, state: str):
+        if state != self.state:
+            log = logger.warning if state == OPEN else logger.info
+            log(f"⚡ {self.name} circuit {self.state} -> {state}")
+        self.state = state
+        self._trials_started = 0
+        self._trials_succeeded = 0
+        if state == OPEN:
+            self.opened_at = time.monotonic()
+            self.times_opened += 1
+        elif state == CLOSED:
+            self.consecutive_failures = 0
+        CIRCUIT_STATE.set(_STATE_VALUES[state], name=self.name)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            retry_after = 0.0
+            if self.state == OPEN:
+                retry_after = max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "slow_call_seconds": self.slow_call_seconds,
+                "reset_timeout": self.reset_timeout,
+                "retry_after": round(retry_after, 2),
+                "calls": self.calls,
+                "successes": self.successes,
+                "failures": self.failures,
+                "slow_calls": self.slow_calls,
+                "rejected": self.rejected,
+                "times_opened": self.times_opened
+            }
+
+
+class AdaptiveTimeout:
+    """
+    Per-call timeout derived from recent latencies: ``multiplier`` times the
+    ``percentile`` of the last ``window`` calls, clamped to
+    [``minimum``, ``maximum``]. Until ``min_samples`` calls have been seen the
+    ``initial`` timeout is used.
+
+    Calls that run into the deadline are recorded at the elapsed time, so a
+    backend that has become slower pushes the timeout up instead of timing
+    out forever.
+
+    Settings come from the constructor or ``<NAME>_TIMEOUT_INITIAL``,
+    ``<NAME>_TIMEOUT_MIN``, ``<NAME>_TIMEOUT_MAX``,
+    ``<NAME>_TIMEOUT_PERCENTILE`` and ``<NAME>_TIMEOUT_MULTIPLIER``.
+    """
+
+    def __init__(self, name: str, initial: Optional[float] = None, minimum: Optional[float] = None,
+                 maximum: Optional[float] = None, percentile: Optional[float] = None,
+                 multiplier: Optional[float] = None, window: int = 200, min_samples: int = 20):
+        prefix = f"{name.upper()}_TIMEOUT_"
+        self.name = name
+        self.maximum = maximum or float(os.getenv(prefix + 'MAX', 120))
+        self.minimum = minimum or float(os.getenv(prefix + 'MIN', 5))
+        self.initial = initial or float(os.getenv(prefix + 'INITIAL', 30))
+        self.percentile = percentile or float(os.getenv(prefix + 'PERCENTILE', 0.99))
+        self.multiplier = multiplier or float(os.getenv(prefix + 'MULTIPLIER', 2.0))
+        self.min_samples = min_samples
+
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=window)
+        self._current = self.initial
+        self.deadline_hits = 0
+
+    def current(self) -> float:
+        return self._current
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+            if len(self._samples) >= self.min_samples:
+                self._current = self._compute()
+
+    @contextmanager
+    def track(self):
+        """Yield the timeout for one call and record how long it took"""
+        timeout = self._current
+        start = time.monotonic()
+        try:
+            yield timeout
+        except Exception:
+            elapsed = time.monotonic() - start
+            if elapsed >= timeout * 0.95:
+                with self._lock:
+                    self.deadline_hits += 1
+                self.observe(elapsed)
+            raise
+        else:
+            self.observe(time.monotonic() - start)
+
+    def _compute(self) -> float:
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, math.ceil(self.percentile * len(ordered)) - 1))
+        return min(self.maximum, max(self.minimum, ordered[index] * self.multiplier))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            ordered = sorted(self._samples)
+
+        def pick(q):
+            if not ordered:
+                return None
+            return round(ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))] * 1000, 1)
+
+        return {
+            "current_timeout": round(self._current, 3),
+            "minimum": self.minimum,
+            "maximum": self.maximum,
+            "samples": len(ordered),
+            "p50_ms": pick(0.5),
+            "p95_ms": pick(0.95),
+            "p99_ms": pick(0.99),
+            "deadline_hits": self.deadline_hits
+        }
@@ -7,7 +7,12 @@ import ssl
 import certifi
 from datetime import datetime
 from dotenv import load_dotenv
-from deepgram import Deepgram
+import aiohttp
+from services.async_runtime import AsyncRuntime
+from services.live_transcription import DeepgramLiveSession, LocalLiveSession
+from services.stt_logging import STTLogger, LazyJSON
+from services.metrics import stage_timer
+from services.health_service import DependencyNotConfigured
 
 # Load environment variables
 load_dotenv()
@@ -16,21 +21,38 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+DEEPGRAM_LISTEN_URL = os.getenv('DEEPGRAM_API_URL', 'https://api.deepgram.com/v1/listen')
+# Cheap authenticated GET used by the health prober
+DEEPGRAM_PROJECTS_URL = os.getenv('DEEPGRAM_PROJECTS_URL', DEEPGRAM_LISTEN_URL.rsplit('/', 1)[0] + '/projects')
+
+# Options for prerecorded transcription requests
+PRERECORDED_OPTIONS = {
+    'smart_format': True,
+    'punctuate': True,
+    'diarize': False,
+    'model': 'nova-2',  # Use the latest model
+    'language': 'en-US',
+    'filler_words': False,
+    'profanity_filter': False
+}
+
 class DeepgramService:
-    def __init__(self):
+    def __init__(self, stt_log=None):
         self.api_key = os.getenv('DEEPGRAM_API_KEY')
         
-        # Setup SSL context for certificate verification
-        try:
-            ssl_context = ssl.create_default_context(cafile=certifi.where())
-            os.environ['SSL_CERT_FILE'] = certifi.where()
-            os.environ['REQUESTS_CA_BUNDLE'] = certifi.where()
-            os.environ['CURL_CA_BUNDLE'] = certifi.where()
-            logger.info(f"SSL context configured with certifi bundle: {certifi.where()}")
-        except Exception as e:
-            logger.warning(f"SSL context setup failed: {e}")
+        # Certificate verification for the aiohttp connections to Deepgram
+        self.ssl_context = ssl.create_default_context(cafile=certifi.where())
+        
+        # Long-lived event loop shared by all transcriptions; the HTTP session
+        # and in-flight limit below are created lazily on that loop
+        self.runtime = AsyncRuntime("deepgram-runtime")
+        self.max_in_flight = int(os.getenv('DEEPGRAM_MAX_IN_FLIGHT', 8))
+        self.request_timeout = float(os.getenv('DEEPGRAM_TIMEOUT', 60))
+        self._session = None
+        self._in_flight = None
         
-        self.deepgram = Deepgram(self.api_key) if self.api_key else None
+        # Verbose banners or one structured record per request (STT_LOG_MODE)
+        self.stt_log = stt_log or STTLogger()
         
         # Log initialization
         if self.is_configured():
@@ -40,7 +62,7 @@ class DeepgramService:
         
     def is_configured(self):
         """Check if Deepgram is properly configured"""
-        return self.api_key is not None and self.api_key != 'your_deepgram_api_key_here' and self.deepgram is not None
+        return bool(self.api_key) and self.api_key != 'your_deepgram_api_key_here'
     
     def _log_request_details(self, audio_file_path=None, audio_bytes=None, options=None):
         """Log request details for Deepgram API call"""
@@ -99,16 +121,15 @@ class DeepgramService:
                         logger.info(f"Confidence: {confidence:.3f}")
                         logger.info(f"Word Count: {len(transcript.split()) if transcript else 0}")
                         
-                        # Log detailed response structure
-                        logger.info("Full Response Structure:")
-                        logger.info(json.dumps(response, indent=2, default=str))
+                        # Log detailed response structure (DEBUG only, sampled)
+                        self.stt_log.dump_response(logger, response)
                     else:
                         logger.warning("No alternatives found in response")
                 else:
                     logger.warning("No channels found in response")
             else:
                 logger.warning("No results found in response")
-                logger.info(f"Response Content: {json.dumps(response, indent=2, default=str)}")
+                self.stt_log.dump_response(logger, response, "Response Content")
         else:
             logger.info(f"Response Content: {response}")
         
@@ -135,9 +156,119 @@ class DeepgramService:
         
         logger.error("-" * 60)
     
+    async def _get_session(self):
+        """Shared aiohttp session on the runtime loop (keep-alive connections to Deepgram)"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_in_flight, ssl=self.ssl_context)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout)
+            )
+            self._in_flight = asyncio.Semaphore(self.max_in_flight)
+        return self._session
+    
+    async def _prerecorded(self, audio, mimetype, options):
+        """POST audio to Deepgram's prerecorded /listen endpoint over the shared session"""
+        session = await self._get_session()
+        params = {key: str(value).lower() if isinstance(value, bool) else value for key, value in options.items()}
+        headers = {
+            'Authorization': f'Token {self.api_key}',
+            'Content-Type': mimetype
+        }
+        
+        async with self._in_flight:
+            async with session.post(DEEPGRAM_LISTEN_URL, params=params, data=audio, headers=headers) as response:
+                if response.status != 200:
+                    body = await response.text()
+                    raise Exception(f"Deepgram API returned {response.status}: {body}")
+                return await response.json()
+    
+    def check_health(self, timeout=5):
+        """
+        Health check for the background prober: an authenticated request to
+        Deepgram over the shared session (no audio is transcribed)
+        """
+        if not self.is_configured():
+            raise DependencyNotConfigured("DEEPGRAM_API_KEY not set; using mock transcriptions")
+        return self.runtime.run(self._check_health(), timeout)
+    
+    async def _check_health(self):
+        session = await self._get_session()
+        headers = {'Authorization': f'Token {self.api_key}'}
+        async with session.get(DEEPGRAM_PROJECTS_URL, headers=headers) as response:
+            if response.status != 200:
+                raise Exception(f"Deepgram API returned {response.status}")
+            body = await response.json()
+        return {"projects": len(body.get('projects', []))}
+    
+    def _extract_transcript(self, response):
+        """Pull the transcript out of a Deepgram response, or an error/notice message"""
+        # Check if response is None or empty
+        if response is None:
+            logger.error("Deepgram API returned None response")
+            return "Error: No response from Deepgram API"
+        
+        # Check if response has the expected structure
+        if not isinstance(response, dict) or 'results' not in response:
+            logger.error(f"Unexpected response format: {type(response)}")
+            return "Error: Unexpected response format from Deepgram API"
+        
+        # Check if results exist and have channels
+        results = response.get('results', {})
+        if not results or 'channels' not in results or not results['channels']:
+            logger.error("No channels found in Deepgram response")
+            return "Error: No audio channels found in response"
+        
+        # Check if alternatives exist
+        channel = results['channels'][0]
+        if 'alternatives' not in channel or not channel['alternatives']:
+            logger.error("No alternatives found in Deepgram response")
+            return "Error: No transcription alternatives found"
+        
+        # Extract transcript
+        alternative = channel['alternatives'][0]
+        transcript = alternative.get('transcript', '')
+        
+        # Handle empty transcript
+        if not transcript or transcript.strip() == '':
+            logger.warning("Empty transcript received from Deepgram")
+            return "I couldn't hear anything clearly. Please try speaking again."
+        
+        if self.stt_log.verbose:
+            logger.info(f"✅ Transcription completed successfully: '{transcript}'")
+        return transcript
+    
+    async def _transcribe(self, audio, start_time, mimetype='audio/wav', request_log=None):
+        """Transcribe an audio buffer; must run on the runtime loop"""
+        request_log = request_log or self.stt_log.request('deepgram')
+        try:
+            if self.stt_log.verbose:
+                logger.info("Sending request to Deepgram API...")
+            with request_log.stage('deepgram'), stage_timer('stt'):
+                response = await self._prerecorded(audio, mimetype, PRERECORDED_OPTIONS)
+            
+            # Log response details
+            with request_log.stage('logging'):
+                if self.stt_log.verbose:
+                    self._log_response_details(response, start_time)
+                else:
+                    self.stt_log.dump_response(logger, response)
+            
+            transcript = self._extract_transcript(response)
+            request_log.update(chars=len(transcript))
+            return transcript
+        
+        except Exception as e:
+            request_log.fail(e)
+            if self.stt_log.verbose:
+                self._log_error_details(e, start_time)
+            logger.error(f"Error transcribing audio with Deepgram: {e}")
+            return f"Error transcribing audio: {str(e)}"
+    
     async def transcribe_audio_file(self, audio_file_path):
         """
-        Transcribe audio file using Deepgram API
+        Transcribe audio file using Deepgram API. Can be awaited from any event
+        loop; the request itself always runs on the service's runtime loop.
         """
         start_time = time.time()
         
@@ -146,69 +277,34 @@ class DeepgramService:
             return "Mock transcription: Please set DEEPGRAM_API_KEY environment variable"
         
         # Log request details
-        options = {
-            'smart_format': True,
-            'punctuate': True,
-            'diarize': False,
-            'model': 'nova-2',  # Use the latest model
-            'language': 'en-US',
-            'filler_words': False,
-            'profanity_filter': False
-        }
-        self._log_request_details(audio_file_path=audio_file_path, options=options)
+        if self.stt_log.verbose:
+            self._log_request_details(audio_file_path=audio_file_path, options=PRERECORDED_OPTIONS)
+        request_log = self.stt_log.request('deepgram_file')
         
         try:
-            with open(audio_file_path, "rb") as audio:
-                source = {'buffer': audio, 'mimetype': 'audio/wav'}
-                
-                logger.info("Sending request to Deepgram API...")
-                response = await self.deepgram.transcription.prerecorded(source, options)
-                
-                # Log response details
-                self._log_response_details(response, start_time)
-                
-                # Check if response is None or empty
-                if response is None:
-                    logger.error("Deepgram API returned None response")
-                    return "Error: No response from Deepgram API"
-                
-                # Check if response has the expected structure
-                if not isinstance(response, dict) or 'results' not in response:
-                    logger.error(f"Unexpected response format: {type(response)}")
-                    return "Error: Unexpected response format from Deepgram API"
-                
-                # Check if results exist and have channels
-                results = response.get('results', {})
-                if not results or 'channels' not in results or not results['channels']:
-                    logger.error("No channels found in Deepgram response")
-                    return "Error: No audio channels found in response"
-                
-                # Check if alternatives exist
-                channel = results['channels'][0]
-                if 'alternatives' not in channel or not channel['alternatives']:
-                    logger.error("No alternatives found in Deepgram response")
-                    return "Error: No transcription alternatives found"
-                
-                # Extract transcript
-                alternative = channel['alternatives'][0]
-                transcript = alternative.get('transcript', '')
-                
-                # Handle empty transcript
-                if not transcript or transcript.strip() == '':
-                    logger.warning("Empty transcript received from Deepgram")
-                    return "I couldn't hear anything clearly. Please try speaking again."
-                
-                logger.info(f"✅ Transcription completed successfully: '{transcript}'")
-                return transcript
-                
+            with request_log.stage('read'):
+                with open(audio_file_path, "rb") as audio:
+                    audio_bytes = audio.read()
         except Exception as e:
-            self._log_error_details(e, start_time)
+            request_log.fail(e)
+            request_log.finish()
+            if self.stt_log.verbose:
+                self._log_error_details(e, start_time)
             logger.error(f"Error transcribing audio with Deepgram: {e}")
             return f"Error transcribing audio: {str(e)}"
+        
+        request_log.update(bytes=len(audio_bytes))
+        try:
+            if self.runtime.in_runtime():
+                return await self._transcribe(audio_bytes, start_time, request_log=request_log)
+            return await asyncio.wrap_future(self.runtime.submit(self._transcribe(audio_bytes, start_time, request_log=request_log)))
+        finally:
+            request_log.finish()
     
-    async def transcribe_audio_live(self, audio_bytes):
+    async def transcribe_audio_live(self, audio_bytes, chunk_size=8192):
         """
-        Transcribe audio using Deepgram Live API (/listen endpoint)
+        Transcribe audio using Deepgram Live API (/listen WebSocket), streaming
+        the buffer in chunks and returning the finalized transcript
         """
         start_time = time.time()
         
@@ -216,142 +312,108 @@ class DeepgramService:
             logger.warning("Deepgram not configured - returning mock response")
             return "Mock transcription: Please set DEEPGRAM_API_KEY environment variable"
         
-        # Log request details
-        options = {
-            'smart_format': True,
-            'punctuate': True,
-            'diarize': False,
-            'interim_results': True,
-            'endpointing': 200,
-            'utterance_end_ms': 2000
-        }
-        self._log_request_details(audio_bytes=audio_bytes, options=options)
+        options = self._live_options()
+        if self.stt_log.verbose:
+            self._log_request_details(audio_bytes=audio_bytes, options=options)
         
-        try:
-            # Create temporary file for live streaming
-            import tempfile
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-                temp_file.write(audio_bytes)
-                temp_file_path = temp_file.name
-            
-            logger.info(f"Created temporary file for live streaming: {temp_file_path}")
-            
-            # Use live streaming API - Deepgram v2 uses different method
-            with open(temp_file_path, "rb") as audio:
-                source = {'buffer': audio, 'mimetype': 'audio/wav'}
-                
-                logger.info("Sending request to Deepgram Live API (/listen)...")
-                # For live streaming, we need to use the streaming API
-                # This is a simplified approach - in production you'd want WebSocket streaming
-                response = await self.deepgram.transcription.prerecorded(source, options)
-                
-                # Log response details
-                self._log_response_details(response, start_time)
-                
-                # Extract transcript from response
-                if response is None:
-                    logger.error("Deepgram Live API returned None response")
-                    # Clean up
-                    os.unlink(temp_file_path)
-                    logger.info(f"Cleaned up temporary file: {temp_file_path}")
-                    return "Error: No response from Deepgram Live API"
-                
-                if not isinstance(response, dict) or 'results' not in response:
-                    logger.error(f"Unexpected live response format: {type(response)}")
-                    # Clean up
-                    os.unlink(temp_file_path)
-                    logger.info(f"Cleaned up temporary file: {temp_file_path}")
-                    return "Error: Unexpected response format from Deepgram Live API"
-                
-                # Check if results exist and have channels
-                results = response.get('results', {})
-                if not results or 'channels' not in results or not results['channels']:
-                    logger.error("No channels found in Deepgram Live response")
-                    # Clean up
-                    os.unlink(temp_file_path)
-                    logger.info(f"Cleaned up temporary file: {temp_file_path}")
-                    return "Error: No audio channels found in live response"
-                
-                # Check if alternatives exist
-                channel = results['channels'][0]
-                if 'alternatives' not in channel or not channel['alternatives']:
-                    logger.error("No alternatives found in Deepgram Live response")
-                    # Clean up
-                    os.unlink(temp_file_path)
-                    logger.info(f"Cleaned up temporary file: {temp_file_path}")
-                    return "Error: No transcription alternatives found"
-                
-                # Extract transcript
-                alternative = channel['alternatives'][0]
-                transcript = alternative.get('transcript', '')
-                
-                # Handle empty transcript
-                if not transcript or transcript.strip() == '':
-                    logger.warning("Empty transcript received from Deepgram Live API")
-                    # Clean up
-                    os.unlink(temp_file_path)
-                    logger.info(f"Cleaned up temporary file: {temp_file_path}")
-                    return "I couldn't hear anything clearly. Please try speaking again."
-                
-                logger.info(f"✅ Live transcription completed successfully: '{transcript}'")
-                
-                # Clean up
-                os.unlink(temp_file_path)
-                logger.info(f"Cleaned up temporary file: {temp_file_path}")
-                
-                return transcript
-                    
-        except Exception as e:
-            self._log_error_details(e, start_time)
-            logger.error(f"Error transcribing audio with Deepgram Live API: {e}")
-            return f"Error transcribing audio: {str(e)}"
+        if not self.runtime.in_runtime():
+            return await asyncio.wrap_future(self.runtime.submit(self.transcribe_audio_live(audio_bytes, chunk_size)))
+        
+        finals = []
+        errors = []
+        
+        def on_event(event_type, payload):
+            if event_type == 'final':
+                finals.append(payload['text'])
+            elif event_type == 'error':
+                errors.append(payload['message'])
+        
+        session = DeepgramLiveSession(self, on_event, options)
+        await session.stream_buffer(audio_bytes, chunk_size)
+        
+        transcript = " ".join(finals)
+        logger.info(f"Live transcription finished in {time.time() - start_time:.3f} seconds")
+        
+        if errors and not transcript:
+            return f"Error transcribing audio: {errors[0]}"
+        if not transcript.strip():
+            logger.warning("Empty transcript received from Deepgram Live API")
+            return "I couldn't hear anything clearly. Please try speaking again."
+        
+        logger.info(f"✅ Live transcription completed successfully: '{transcript}'")
+        return transcript
+    
+    def start_live_session(self, on_event, mimetype=None, encoding=None, sample_rate=None, channels=None):
+        """
+        Open a live transcription stream. Audio pushed with ``session.send``
+        is forwarded to Deepgram as it arrives and results are reported through
+        ``on_event``. Falls back to the local stand-in when Deepgram is not
+        configured or ``DEEPGRAM_LIVE_BACKEND=local``.
+        """
+        return self.create_live_session(on_event, mimetype, encoding, sample_rate, channels).start()
     
-    def transcribe_audio_bytes(self, audio_bytes):
+    def create_live_session(self, on_event, mimetype=None, encoding=None, sample_rate=None, channels=None):
         """
-        Transcribe audio bytes using Deepgram API (synchronous wrapper)
+        Like ``start_live_session`` but without opening the stream, so the
+        caller can register the session before its first event (a connect
+        error can be reported before ``start`` returns)
+        """
+        if not self.is_configured() or os.getenv('DEEPGRAM_LIVE_BACKEND', 'deepgram') == 'local':
+            logger.info("Using local live transcription stand-in")
+            return LocalLiveSession(on_event)
+        
+        options = self._live_options()
+        # Containerized audio (webm/ogg) is self-describing; raw PCM needs its format
+        if encoding:
+            options['encoding'] = encoding
+            options['sample_rate'] = sample_rate or 16000
+            options['channels'] = channels or 1
+        
+        logger.info(f"Opening Deepgram live stream (mimetype={mimetype}, encoding={encoding})")
+        return DeepgramLiveSession(self, on_event, options)
+    
+    def _live_options(self):
+        """Query parameters for the live /listen WebSocket"""
+        options = dict(self.get_live_transcription_config())
+        # vad_turnoff is not a live API parameter; endpointing covers it
+        options.pop('vad_turnoff', None)
+        options['model'] = PRERECORDED_OPTIONS['model']
+        options['language'] = PRERECORDED_OPTIONS['language']
+        return options
+    
+    def transcribe_audio_bytes(self, audio_bytes, mimetype='audio/wav', request_log=None):
+        """
+        Transcribe audio bytes using Deepgram API (synchronous wrapper around
+        the shared runtime loop). Stage timings are added to ``request_log``
+        when the caller passes one; otherwise a record is emitted here.
         """
         start_time = time.time()
+        owns_log = request_log is None
+        request_log = request_log or self.stt_log.request('deepgram_bytes', bytes=len(audio_bytes))
         
         if not self.is_configured():
             logger.warning("Deepgram not configured - returning mock response")
+            request_log.update(backend='mock')
+            if owns_log:
+                request_log.finish()
             return "Mock transcription: Please set DEEPGRAM_API_KEY environment variable"
         
         # Log request details
-        options = {
-            'smart_format': True,
-            'punctuate': True,
-            'diarize': False,
-            'model': 'nova-2',  # Use the latest model
-            'language': 'en-US',
-            'filler_words': False,
-            'profanity_filter': False
-        }
-        self._log_request_details(audio_bytes=audio_bytes, options=options)
+        request_log.update(backend='deepgram')
+        if self.stt_log.verbose:
+            self._log_request_details(audio_bytes=audio_bytes, options=PRERECORDED_OPTIONS)
         
         try:
-            # Create temporary file
-            import tempfile
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-                temp_file.write(audio_bytes)
-                temp_file_path = temp_file.name
-            
-            logger.info(f"Created temporary file: {temp_file_path}")
-            
-            # Transcribe using asyncio
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            result = loop.run_until_complete(self.transcribe_audio_file(temp_file_path))
-            loop.close()
-            
-            # Clean up
-            os.unlink(temp_file_path)
-            logger.info(f"Cleaned up temporary file: {temp_file_path}")
-            
-            return result
+            return self.runtime.run(self._transcribe(audio_bytes, start_time, mimetype, request_log))
         except Exception as e:
-            self._log_error_details(e, start_time)
+            request_log.fail(e)
+            if self.stt_log.verbose:
+                self._log_error_details(e, start_time)
             logger.error(f"Error transcribing audio bytes with Deepgram: {e}")
             return f"Error transcribing audio: {str(e)}"
+        finally:
+            if owns_log:
+                request_log.finish()
     
     def get_live_transcription_config(self):
         """
@@ -366,7 +428,6 @@ class DeepgramService:
             'vad_turnoff': 500  # Voice activity detection turnoff
         }
         
-        logger.info("Live transcription config requested:")
-        logger.info(json.dumps(config, indent=2))
+        logger.debug("Live transcription config requested:\n%s", LazyJSON(config))
         
         return config 
\ No newline at end of file
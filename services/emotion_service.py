@@ -0,0 +1,161 @@
+import os
+import re
+import json
+import logging
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.streaming_service import SENTENCE_END
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEXICON_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                    "config", "emotion_lexicon.json")
+
+# Used when the lexicon file is missing or invalid (the original keyword lists)
+FALLBACK_LEXICON = {
+    "default": {"expression": "neutral", "animation": "talk"},
+    "expressions": {
+        "happy": {"animation": "talk", "keywords": {"happy": 1.0, "great": 1.0, "wonderful": 1.0, "excellent": 1.0}},
+        "sad": {"animation": "talk", "keywords": {"sorry": 1.0, "unfortunately": 1.0, "cannot": 1.0}},
+        "thinking": {"animation": "idle", "keywords": {"thinking": 1.0, "let me": 1.0, "consider": 1.0}}
+    }
+}
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().replace("’", "'").split())
+
+
+def _aligned_lower(text: str) -> str:
+    """Lowercase ``text`` without moving any character ("İ" lowercases to two)"""
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        lowered = "".join(char.lower()[0] for char in text)
+    return lowered.replace("’", "'")
+
+
+def _trie_pattern(keywords: List[str]) -> str:
+    """
+    Regex alternation factored by common prefixes ("can't|cannot" becomes
+    "can(?:'t|not)"), so the engine tries at most one branch per character
+    instead of every keyword at every position
+    """
+    trie: Dict[str, Any] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def build(node: Dict[str, Any]) -> str:
+        branches = [(r"\s+" if char == " " else re.escape(char)) + build(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        pattern = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{pattern})?" if "" in node else pattern
+
+    return build(trie)
+
+
+class EmotionClassifier:
+    """
+    Keyword-based expression classifier for avatar responses.
+
+    All keywords of all expressions are compiled into one regex with word
+    boundaries, so a response is scanned once regardless of lexicon size,
+    and "unhappy" no longer counts as "happy". Matching is case-insensitive
+    (the scan runs over a lowercased copy that keeps every offset), phrases
+    match across any whitespace, and curly apostrophes are read as straight
+    ones.
+
+    Each match adds its keyword's weight to the expression of the sentence
+    it falls in; the highest-scoring expression wins (ties go to the
+    expression listed first in the lexicon), and sentences without matches
+    use the default.
+    """
+
+    def __init__(self, lexicon: Dict[str, Any]):
+        default = lexicon.get("default") or {}
+        self.default_expression = default.get("expression", "neutral")
+        self.default_animation = default.get("animation", "talk")
+
+        self.animations: Dict[str, str] = {}
+        self.order: Dict[str, int] = {}
+        self.keywords: Dict[str, Tuple[str, float]] = {}
+        for expression, entry in lexicon.get("expressions", {}).items():
+            self.order[expression] = len(self.order)
+            self.animations[expression] = entry.get("animation", self.default_animation)
+            for keyword, weight in entry.get("keywords", {}).items():
+                self.keywords[_normalize(keyword)] = (expression, float(weight))
+
+        # Matched against lowercased text: IGNORECASE makes the scan several times slower
+        source = r"\b" + _trie_pattern(list(self.keywords)) + r"\b"
+        self.pattern = re.compile(source) if self.keywords else None
+        # Same matches on ASCII text, ~25% less time per response in benchmark_emotion.py
+        self.ascii_pattern = re.compile(source, re.ASCII) if self.keywords and source.isascii() else self.pattern
+
+    @classmethod
+    def from_file(cls, path: Optional[str] = None) -> "EmotionClassifier":
+        """Load the lexicon from ``path``, ``EMOTION_LEXICON_PATH`` or config/emotion_lexicon.json"""
+        path = path or os.getenv('EMOTION_LEXICON_PATH') or DEFAULT_LEXICON_PATH
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                lexicon = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load emotion lexicon {path} ({e}), using built-in keywords")
+            lexicon = FALLBACK_LEXICON
+        return cls(lexicon)
+
+    def _pick(self, scores: Dict[str, float]) -> Tuple[str, str, float]:
+        if not scores:
+            return self.default_expression, self.default_animation, 0.0
+        expression = max(scores, key=lambda name: (scores[name], -self.order[name]))
+        return expression, self.animations[expression], round(scores[expression], 3)
+
+    def classify(self, text: str) -> Dict[str, Any]:
+        """
+        Classify a response. Returns the dominant ``expression`` and
+        ``animation`` plus a ``timeline`` with one keyframe per sentence;
+        ``at`` is the keyframe's start as a fraction of the text, so clients
+        can place it against audio playback.
+        """
+        length = len(text)
+        starts = [0]
+        for match in SENTENCE_END.finditer(text):
+            if match.end() < length:
+                starts.append(match.end())
+
+        sentence_scores: List[Dict[str, float]] = [{} for _ in starts]
+        totals: Dict[str, float] = {}
+        if self.pattern is not None:
+            lowered = _aligned_lower(text)
+            pattern = self.ascii_pattern if lowered.isascii() else self.pattern
+            for match in pattern.finditer(lowered):
+                expression, weight = self.keywords[_normalize(match.group())]
+                scores = sentence_scores[bisect_right(starts, match.start()) - 1]
+                scores[expression] = scores.get(expression, 0.0) + weight
+                totals[expression] = totals.get(expression, 0.0) + weight
+
+        timeline = []
+        for index, (start, scores) in enumerate(zip(starts, sentence_scores)):
+            expression, animation, weight = self._pick(scores)
+            timeline.append({
+                "index": index,
+                "at": round(start / length, 3) if length else 0.0,
+                "expression": expression,
+                "animation": animation,
+                "weight": weight
+            })
+
+        expression, animation, weight = self._pick(totals)
+        return {"expression": expression, "animation": animation, "weight": weight, "timeline": timeline}
+
+
+_classifier = EmotionClassifier.from_file()
+
+
+def get_emotion_classifier() -> EmotionClassifier:
+    """Process-wide classifier, compiled once at import"""
+    return _classifier
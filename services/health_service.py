@@ -0,0 +1,176 @@
+import os
+import time
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+from services.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+DEPENDENCY_UP = get_metrics().gauge(
+    "vrmchat_dependency_up",
+    "1 if the last health probe of a dependency succeeded, 0 otherwise",
+    ("dependency",)
+)
+PROBE_LATENCY = get_metrics().histogram(
+    "vrmchat_health_probe_duration_seconds",
+    "Time taken by background health probes",
+    ("dependency",)
+)
+
+# Probe states
+UP = "up"
+DOWN = "down"
+UNCONFIGURED = "unconfigured"
+UNKNOWN = "unknown"
+
+
+class DependencyNotConfigured(Exception):
+    """Raised by a health check when the dependency is intentionally not set up"""
+
+
+class HealthProber:
+    """
+    Checks external dependencies in parallel on a background thread and
+    caches the results, so health endpoints never wait on a backend.
+
+    A check is a callable that returns a dict of details when the dependency
+    is healthy, and raises otherwise (``DependencyNotConfigured`` when it is
+    simply not configured). Checks still running after ``timeout`` are
+    reported as down; their threads are left to finish on their own.
+
+    Configuration (environment):
+    - ``HEALTH_PROBE_INTERVAL``: seconds between probe rounds (default 15)
+    - ``HEALTH_PROBE_TIMEOUT``: per-round deadline in seconds (default 5)
+    - ``HEALTH_STALE_AFTER``: results older than this are not trusted for
+      readiness (default 3x the interval)
+    - ``HEALTH_READY_REQUIRES``: comma-separated dependencies that must be up
+      (or unconfigured) for readiness (default: all registered)
+    """
+
+    def __init__(self, interval: Optional[float] = None, timeout: Optional[float] = None,
+                 stale_after: Optional[float] = None):
+        self.interval = interval or float(os.getenv('HEALTH_PROBE_INTERVAL', 15))
+        self.timeout = timeout or float(os.getenv('HEALTH_PROBE_TIMEOUT', 5))
+        self.stale_after = stale_after or float(os.getenv('HEALTH_STALE_AFTER', 3 * self.interval))
+        required = os.getenv('HEALTH_READY_REQUIRES', '')
+        self.required = [name.strip() for name in required.split(',') if name.strip()] or None
+
+        self._checks: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.rounds = 0
+        self.started_at = time.time()
+
+    def register(self, name: str, check: Callable[[], Dict[str, Any]]):
+        self._checks[name] = check
+        self._results[name] = {"status": UNKNOWN, "checked_at": None, "latency_ms": None}
+
+    def start(self):
+        """Run probe rounds on a daemon thread (idempotent)"""
+        if self._thread is not None:
+            return
+        self._executor = ThreadPoolExecutor(max_workers=max(len(self._checks), 1) * 2,
+                                            thread_name_prefix='health-probe')
+
+        def run():
+            while not self._stop.is_set():
+                try:
+                    self.probe()
+                except Exception as e:
+                    logger.error(f"Health probe round failed: {e}")
+                self._stop.wait(self.interval)
+
+        self._thread = threading.Thread(target=run, name="health-prober", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    def alive(self) -> bool:
+        """False if the prober thread has died (results would go stale)"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def probe(self):
+        """Run every check once, in parallel, and cache the results"""
+        executor = self._executor or ThreadPoolExecutor(max_workers=max(len(self._checks), 1),
+                                                        thread_name_prefix='health-probe')
+        futures = {}
+        for name, check in self._checks.items():
+            # A check that hung past the last deadline is not stacked up again
+            previous = self._pending.get(name)
+            futures[name] = previous if previous is not None and not previous.done() \
+                else executor.submit(self._run_check, name, check)
+        self._pending = futures
+        wait(futures.values(), timeout=self.timeout)
+
+        for name, future in futures.items():
+            if future.done():
+                result = future.result()
+            else:
+                result = {"status": DOWN, "checked_at": time.time(), "latency_ms": None,
+                          "error": f"timed out after {self.timeout:g}s"}
+            DEPENDENCY_UP.set(1 if result["status"] == UP else 0, dependency=name)
+            with self._lock:
+                self._results[name] = result
+        with self._lock:
+            self.rounds += 1
+
+        if executor is not self._executor:
+            executor.shutdown(wait=False)
+
+    def _run_check(self, name: str, check: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            details = check() or {}
+            result = {"status": UP, **details}
+        except DependencyNotConfigured as e:
+            result = {"status": UNCONFIGURED, "error": str(e)}
+        except Exception as e:
+            logger.warning(f"Health check '{name}' failed: {e}")
+            result = {"status": DOWN, "error": str(e)}
+        duration = time.perf_counter() - start
+        PROBE_LATENCY.observe(duration, dependency=name)
+        result["checked_at"] = time.time()
+        result["latency_ms"] = round(duration * 1000, 1)
+        return result
+
+    def results(self) -> Dict[str, Dict[str, Any]]:
+        """Cached results with their age in seconds"""
+        now = time.time()
+        with self._lock:
+            results = {name: dict(result) for name, result in self._results.items()}
+        for result in results.values():
+            checked_at = result["checked_at"]
+            result["age"] = round(now - checked_at, 1) if checked_at else None
+        return results
+
+    def ready(self, results: Optional[Dict[str, Dict[str, Any]]] = None) -> bool:
+        """
+        True once a probe round has completed and every required dependency
+        is up (or deliberately unconfigured) with a fresh result
+        """
+        results = results or self.results()
+        if not self.rounds:
+            return False
+        for name in self.required or list(results):
+            result = results.get(name)
+            if result is None:
+                continue
+            if result["status"] not in (UP, UNCONFIGURED):
+                return False
+            if result["age"] is None or result["age"] > self.stale_after:
+                return False
+        return True
+
+    def unhealthy(self, results: Optional[Dict[str, Dict[str, Any]]] = None) -> List[str]:
+        results = results or self.results()
+        return [name for name, result in results.items() if result["status"] == DOWN]
@@ -0,0 +1,125 @@
+import os
+import time
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional
+
+
+class _Session:
+    __slots__ = ("messages", "last_access", "size")
+
+    def __init__(self, capacity: int):
+        self.messages = deque(maxlen=capacity)
+        self.last_access = time.monotonic()
+        self.size = 0
+
+
+class ConversationHistoryStore:
+    """
+    Per-session conversation history with bounded memory.
+
+    Each session (Socket.IO ``sid`` or HTTP session token) keeps a fixed-size
+    ring buffer of messages. Sessions idle for longer than ``idle_ttl`` seconds
+    are dropped, and when the approximate total size of all stored message text
+    exceeds ``max_total_chars`` the least recently used sessions are evicted
+    whole. All access goes through a single lock.
+    """
+
+    def __init__(self, max_messages: Optional[int] = None, idle_ttl: Optional[float] = None,
+                 max_total_chars: Optional[int] = None, max_sessions: Optional[int] = None):
+        self.max_messages = max_messages or int(os.getenv('HISTORY_MAX_MESSAGES', 20))
+        self.idle_ttl = idle_ttl or float(os.getenv('HISTORY_IDLE_TTL', 1800))
+        self.max_total_chars = max_total_chars or int(os.getenv('HISTORY_MAX_TOTAL_CHARS', 2_000_000))
+        self.max_sessions = max_sessions or int(os.getenv('HISTORY_MAX_SESSIONS', 1000))
+
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._total_size = 0
+        self.evicted_idle = 0
+        self.evicted_lru = 0
+
+    def append(self, session_id: str, role: str, content: str):
+        """Add a message to a session, creating the session if needed"""
+        message = {"role": role, "content": content, "timestamp": time.time()}
+        with self._lock:
+            now = time.monotonic()
+            self._expire_idle(now)
+
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = _Session(self.max_messages)
+                self._sessions[session_id] = session
+            else:
+                self._sessions.move_to_end(session_id)
+            session.last_access = now
+
+            # The ring buffer drops the oldest message once full
+            if len(session.messages) == session.messages.maxlen:
+                dropped = len(session.messages[0]["content"])
+                session.size -= dropped
+                self._total_size -= dropped
+            session.messages.append(message)
+            session.size += len(content)
+            self._total_size += len(content)
+
+            self._evict_lru(keep=session_id)
+
+    def get(self, session_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Return the most recent ``limit`` messages of a session (oldest first)"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return []
+            now = time.monotonic()
+            if now - session.last_access > self.idle_ttl:
+                self._drop(session_id)
+                self.evicted_idle += 1
+                return []
+            session.last_access = now
+            self._sessions.move_to_end(session_id)
+            messages = list(session.messages)
+        return messages[-limit:] if limit else messages
+
+    def clear(self, session_id: str):
+        """Forget a session's history"""
+        with self._lock:
+            self._drop(session_id)
+
+    def clear_all(self):
+        with self._lock:
+            self._sessions.clear()
+            self._total_size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "total_chars": self._total_size,
+                "max_total_chars": self.max_total_chars,
+                "max_messages": self.max_messages,
+                "idle_ttl": self.idle_ttl,
+                "evicted_idle": self.evicted_idle,
+                "evicted_lru": self.evicted_lru
+            }
+
+    def _drop(self, session_id: str):
+        session = self._sessions.pop(session_id, None)
+        if session is not None:
+            self._total_size -= session.size
+
+    def _expire_idle(self, now: float):
+        # Sessions are kept in access order, so idle ones sit at the front
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_access <= self.idle_ttl:
+                break
+            self._drop(session_id)
+            self.evicted_idle += 1
+
+    def _evict_lru(self, keep: str):
+        while (self._total_size > self.max_total_chars or len(self._sessions) > self.max_sessions) and len(self._sessions) > 1:
+            session_id = next(iter(self._sessions))
+            if session_id == keep:
+                break
+            self._drop(session_id)
+            self.evicted_lru += 1
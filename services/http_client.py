@@ -0,0 +1,165 @@
+import os
+import logging
+import threading
+from typing import Any, Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionStats:
+    """Thread-safe per-host counters for requests and newly opened connections"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests: Dict[str, int] = {}
+        self.new_connections: Dict[str, int] = {}
+
+    def record_request(self, host: str):
+        with self._lock:
+            self.requests[host] = self.requests.get(host, 0) + 1
+
+    def record_new_connection(self, host: str):
+        with self._lock:
+            self.new_connections[host] = self.new_connections.get(host, 0) + 1
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            hosts = set(self.requests) | set(self.new_connections)
+            result = {}
+            for host in sorted(hosts):
+                total = self.requests.get(host, 0)
+                new = self.new_connections.get(host, 0)
+                result[host] = {
+                    "requests": total,
+                    "new_connections": new,
+                    "reused_connections": max(total - new, 0)
+                }
+            return result
+
+
+def _counting_pool(base, stats: ConnectionStats):
+    """Subclass a urllib3 pool so every freshly opened connection is counted"""
+
+    class CountingPool(base):
+        def _new_conn(self):
+            stats.record_new_connection(f"{self.scheme}://{self.host}:{self.port}")
+            return super()._new_conn()
+
+    return CountingPool
+
+
+class PooledAdapter(HTTPAdapter):
+    """HTTPAdapter whose connection pools report new connections to ``stats``"""
+
+    def __init__(self, stats: ConnectionStats, **kwargs):
+        self.stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _counting_pool(HTTPConnectionPool, self.stats),
+            "https": _counting_pool(HTTPSConnectionPool, self.stats)
+        }
+
+    def send(self, request, **kwargs):
+        parts = urlsplit(request.url)
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.stats.record_request(f"{parts.scheme}://{parts.hostname}:{port}")
+        return super().send(request, **kwargs)
+
+
+class HTTPClient:
+    """
+    Shared outbound HTTP client with persistent keep-alive pools per host.
+
+    Configuration (environment):
+    - ``HTTP_POOL_CONNECTIONS``: number of per-host pools kept (default 10)
+    - ``HTTP_POOL_MAXSIZE``: keep-alive connections per host (default 20)
+    - ``HTTP_CONNECT_TIMEOUT``: connect timeout in seconds (default 5)
+    - ``HTTP_READ_TIMEOUT``: default read timeout in seconds (default 30)
+    """
+
+    def __init__(self, pool_connections: Optional[int] = None, pool_maxsize: Optional[int] = None,
+                 connect_timeout: Optional[float] = None, read_timeout: Optional[float] = None):
+        self.pool_connections = pool_connections or int(os.getenv('HTTP_POOL_CONNECTIONS', 10))
+        self.pool_maxsize = pool_maxsize or int(os.getenv('HTTP_POOL_MAXSIZE', 20))
+        self.connect_timeout = connect_timeout or float(os.getenv('HTTP_CONNECT_TIMEOUT', 5))
+        self.read_timeout = read_timeout or float(os.getenv('HTTP_READ_TIMEOUT', 30))
+
+        self.stats = ConnectionStats()
+        self.session = requests.Session()
+        adapter = PooledAdapter(
+            self.stats,
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _timeout(self, timeout):
+        """A scalar timeout overrides only the read timeout; tuples pass through"""
+        if timeout is None:
+            return (self.connect_timeout, self.read_timeout)
+        if isinstance(timeout, (int, float)):
+            return (self.connect_timeout, timeout)
+        return timeout
+
+    def request(self, method: str, url: str, timeout=None, **kwargs) -> requests.Response:
+        return self.session.request(method, url, timeout=self._timeout(timeout), **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def warm(self, urls: Iterable[Optional[str]], background: bool = True):
+        """
+        Open a keep-alive connection to each URL's host ahead of real traffic.
+        Errors are ignored; warming is best effort.
+        """
+        targets = [url for url in urls if url]
+
+        def run():
+            for url in targets:
+                try:
+                    self.session.head(url, timeout=(self.connect_timeout, self.connect_timeout), allow_redirects=False)
+                    logger.info(f"🔥 Warmed HTTP connection to {url}")
+                except Exception as e:
+                    logger.warning(f"HTTP warmup failed for {url}: {e}")
+
+        if not targets:
+            return
+        if background:
+            threading.Thread(target=run, name="http-warmup", daemon=True).start()
+        else:
+            run()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "pool_connections": self.pool_connections,
+            "pool_maxsize": self.pool_maxsize,
+            "connect_timeout": self.connect_timeout,
+            "read_timeout": self.read_timeout,
+            "hosts": self.stats.snapshot()
+        }
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> HTTPClient:
+    """Return the process-wide shared HTTP client"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HTTPClient()
+    return _client
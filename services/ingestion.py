@@ -0,0 +1,335 @@
+import os
+import re
+import json
+import time
+import random
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+import requests
+
+from services.rag_service import DocumentUploadError
+
+logger = logging.getLogger(__name__)
+
+# File types read when ingesting a directory
+TEXT_EXTENSIONS = {".txt", ".md", ".markdown", ".rst", ".html", ".htm", ".csv"}
+
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+")
+
+
+class Document:
+    """One source document to ingest"""
+
+    __slots__ = ("doc_id", "content", "metadata")
+
+    def __init__(self, doc_id: str, content: str, metadata: Optional[Dict[str, Any]] = None):
+        self.doc_id = doc_id
+        self.content = content
+        self.metadata = metadata or {}
+
+
+def iter_documents(source: str) -> Iterator[Document]:
+    """
+    Yield documents from a directory (one per text file, walked in sorted
+    order) or a JSONL file (one ``{"id", "content" | "text", "metadata"}``
+    object per line)
+    """
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                if os.path.splitext(name)[1].lower() not in TEXT_EXTENSIONS:
+                    continue
+                path = os.path.join(root, name)
+                with open(path, "r", encoding="utf-8", errors="replace") as f:
+                    content = f.read()
+                doc_id = os.path.relpath(path, source)
+                yield Document(doc_id, content, {"source": doc_id, "type": "file"})
+        return
+
+    with open(source, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+                document = document_from_record(record, f"{os.path.basename(source)}:{line_number}")
+            except ValueError as e:  # Includes json.JSONDecodeError
+                logger.warning(f"Skipping line {line_number} of {source}: {e}")
+                continue
+            yield document
+
+
+def document_from_record(record: Any, default_id: str) -> Document:
+    """
+    Build a document from a JSON object as used in JSONL files and the bulk
+    API; raises ``ValueError`` for anything else
+    """
+    if not isinstance(record, dict):
+        raise ValueError(f"expected an object with 'content' or 'text', got {type(record).__name__}")
+    content = record.get("content") or record.get("text") or ""
+    if not isinstance(content, str):
+        raise ValueError(f"'content' must be a string, got {type(content).__name__}")
+    if not isinstance(record.get("metadata") or {}, dict):
+        raise ValueError("'metadata' must be an object")
+    doc_id = str(record.get("id") or record.get("document_id") or default_id)
+    return Document(doc_id, content, dict(record.get("metadata") or {}))
+
+
+def chunk_text(text: str, max_chars: int = 4000, overlap: int = 200) -> List[str]:
+    """
+    Split text into chunks of at most ``max_chars``, cutting at paragraph
+    and then sentence boundaries where possible. Consecutive chunks share up
+    to ``overlap`` characters of context.
+    """
+    text = text.strip()
+    if len(text) <= max_chars:
+        return [text] if text else []
+
+    pieces: List[str] = []
+    for paragraph in PARAGRAPH_BREAK.split(text):
+        paragraph = paragraph.strip()
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+            continue
+        for sentence in SENTENCE_BREAK.split(paragraph):
+            # Hard-cut anything still too long (e.g. tables, minified text)
+            for start in range(0, len(sentence), max_chars):
+                pieces.append(sentence[start:start + max_chars])
+
+    chunks: List[str] = []
+    current = ""
+    for piece in pieces:
+        if not piece:
+            continue
+        candidate = f"{current}\n\n{piece}" if current else piece
+        if len(candidate) <= max_chars:
+            current = candidate
+            continue
+        chunks.append(current)
+        tail = current[-overlap:] if overlap else ""
+        current = f"{tail}\n\n{piece}" if tail and len(tail) + len(piece) + 2 <= max_chars else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class IngestCheckpoint:
+    """
+    Append-only record of uploaded chunks, so an interrupted run resumes
+    where it stopped. Keys include a content hash, so edited documents are
+    uploaded again.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.done = set()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        self.done.add(line)
+        self._file = open(path, "a", encoding="utf-8")
+
+    @staticmethod
+    def key(doc_id: str, index: int, chunk: str) -> str:
+        digest = hashlib.sha1(chunk.encode("utf-8")).hexdigest()[:16]
+        return f"{doc_id}#{index}:{digest}"
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.done
+
+    def mark(self, key: str):
+        with self._lock:
+            self.done.add(key)
+            self._file.write(key + "\n")
+            self._file.flush()
+
+    def reset(self):
+        with self._lock:
+            self.done.clear()
+            self._file.close()
+            self._file = open(self.path, "w", encoding="utf-8")
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class IngestReport:
+    """Live counters for one ingestion run; ``snapshot`` is safe to poll"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+        self.documents = 0
+        self.documents_skipped = 0
+        self.documents_failed = 0
+        self.chunks_uploaded = 0
+        self.chunks_skipped = 0
+        self.chunks_failed = 0
+        self.retries = 0
+        self.bytes_uploaded = 0
+        self.errors: List[Dict[str, str]] = []
+
+    def add(self, **counts):
+        with self._lock:
+            for field, amount in counts.items():
+                setattr(self, field, getattr(self, field) + amount)
+
+    def error(self, doc_id: str, message: str):
+        with self._lock:
+            self.chunks_failed += 1
+            if len(self.errors) < 50:
+                self.errors.append({"document": doc_id, "error": message})
+
+    def finish(self):
+        self.finished = time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            elapsed = (self.finished or time.monotonic()) - self.started
+            uploaded_docs = self.documents - self.documents_skipped - self.documents_failed
+            return {
+                "done": self.finished is not None,
+                "elapsed_seconds": round(elapsed, 2),
+                "documents": self.documents,
+                "documents_skipped": self.documents_skipped,
+                "documents_failed": self.documents_failed,
+                "chunks_uploaded": self.chunks_uploaded,
+                "chunks_skipped": self.chunks_skipped,
+                "chunks_failed": self.chunks_failed,
+                "retries": self.retries,
+                "bytes_uploaded": self.bytes_uploaded,
+                "docs_per_second": round(uploaded_docs / elapsed, 2) if elapsed > 0 else 0.0,
+                "bytes_per_second": round(self.bytes_uploaded / elapsed, 1) if elapsed > 0 else 0.0,
+                "errors": list(self.errors)
+            }
+
+
+class BulkIngestor:
+    """
+    Upload documents to the RAG endpoint through a bounded worker pool.
+
+    Documents are split into chunks, each chunk is uploaded with retries and
+    exponential backoff (timeouts, connection errors, 429 and 5xx are
+    retried; other 4xx are not), and every uploaded chunk is recorded in the
+    checkpoint. At most ``workers * 2`` chunks are queued at a time, so large
+    corpora are streamed rather than loaded into memory.
+
+    Configuration (environment):
+    - ``INGEST_WORKERS``: concurrent uploads (default 4)
+    - ``INGEST_MAX_RETRIES``: retries per chunk (default 4)
+    - ``INGEST_CHUNK_CHARS``: maximum chunk size in characters (default 4000)
+    - ``INGEST_CHUNK_OVERLAP``: characters shared by adjacent chunks (default 200)
+    - ``INGEST_DIR``: default checkpoint directory (default data/ingest)
+    """
+
+    def __init__(self, rag_service, workers: Optional[int] = None, max_retries: Optional[int] = None,
+                 chunk_chars: Optional[int] = None, chunk_overlap: Optional[int] = None,
+                 backoff: float = 0.5, upload_timeout: float = 30):
+        self.rag_service = rag_service
+        self.workers = workers or int(os.getenv('INGEST_WORKERS', 4))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv('INGEST_MAX_RETRIES', 4))
+        self.chunk_chars = chunk_chars or int(os.getenv('INGEST_CHUNK_CHARS', 4000))
+        self.chunk_overlap = chunk_overlap if chunk_overlap is not None else int(os.getenv('INGEST_CHUNK_OVERLAP', 200))
+        self.backoff = backoff
+        self.upload_timeout = upload_timeout
+
+    @staticmethod
+    def checkpoint_path(name: str) -> str:
+        """Default checkpoint file for a source or job name"""
+        safe = re.sub(r"[^A-Za-z0-9_.-]+", "_", os.path.basename(os.path.normpath(name))) or "ingest"
+        return os.path.join(os.getenv('INGEST_DIR', 'data/ingest'), f"{safe}.checkpoint")
+
+    def run(self, documents: Iterable[Document], checkpoint: IngestCheckpoint,
+            report: Optional[IngestReport] = None,
+            on_progress: Optional[Callable[[IngestReport], None]] = None) -> IngestReport:
+        report = report or IngestReport()
+        slots = threading.BoundedSemaphore(self.workers * 2)
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='ingest')
+
+        try:
+            for document in documents:
+                report.add(documents=1)
+                chunks = chunk_text(document.content, self.chunk_chars, self.chunk_overlap)
+                pending = [(index, chunk) for index, chunk in enumerate(chunks)
+                           if IngestCheckpoint.key(document.doc_id, index, chunk) not in checkpoint]
+                report.add(chunks_skipped=len(chunks) - len(pending))
+                if not pending:
+                    report.add(documents_skipped=1)
+                    continue
+
+                tracker = _DocumentTracker(len(pending), report)
+                for index, chunk in pending:
+                    slots.acquire()
+                    future = executor.submit(self._upload_chunk, document, index, len(chunks),
+                                             chunk, checkpoint, report)
+                    future.add_done_callback(tracker.callback(slots))
+                if on_progress:
+                    on_progress(report)
+        finally:
+            executor.shutdown(wait=True)
+            report.finish()
+        return report
+
+    def _upload_chunk(self, document: Document, index: int, total: int, chunk: str,
+                      checkpoint: IngestCheckpoint, report: IngestReport) -> bool:
+        metadata = dict(document.metadata)
+        metadata.update({"document_id": document.doc_id, "chunk_index": index, "chunk_count": total})
+        size = len(chunk.encode("utf-8"))
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.rag_service.upload_document(chunk, metadata, timeout=self.upload_timeout)
+                checkpoint.mark(IngestCheckpoint.key(document.doc_id, index, chunk))
+                report.add(chunks_uploaded=1, bytes_uploaded=size)
+                return True
+            except DocumentUploadError as e:
+                error, retryable = str(e), e.retryable
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                error, retryable = f"{type(e).__name__}: {e}", True
+            except Exception as e:
+                error, retryable = f"{type(e).__name__}: {e}", False
+
+            if not retryable or attempt == self.max_retries:
+                logger.warning(f"Failed to upload {document.doc_id}#{index}: {error}")
+                report.error(document.doc_id, error)
+                return False
+            report.add(retries=1)
+            # Exponential backoff with jitter
+            time.sleep(self.backoff * (2 ** attempt) * (0.5 + random.random()))
+        return False
+
+
+class _DocumentTracker:
+    """Counts a document as failed once all its chunks finished and any failed"""
+
+    def __init__(self, chunks: int, report: IngestReport):
+        self._lock = threading.Lock()
+        self.remaining = chunks
+        self.failed = False
+        self.report = report
+
+    def callback(self, slots: threading.BoundedSemaphore):
+        def done(future):
+            slots.release()
+            self.chunk_done(future.exception() is None and future.result())
+        return done
+
+    def chunk_done(self, ok: bool):
+        with self._lock:
+            self.failed = self.failed or not ok
+            self.remaining -= 1
+            if self.remaining == 0 and self.failed:
+                self.report.add(documents_failed=1)
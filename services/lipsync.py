@@ -0,0 +1,229 @@
+import io
+import os
+import json
+import wave
+import shutil
+import logging
+import threading
+import subprocess
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from services.metrics import stage_timer
+
+logger = logging.getLogger(__name__)
+
+SIDECAR_KIND = "lipsync"
+ANALYSIS_RATE = 16000
+
+# Formant-ish bands (Hz): F1 separates open from closed vowels, F2 front from
+# back vowels, and the high band catches sibilants
+F1_BAND = (250, 900)
+F2_BAND = (900, 2500)
+HIGH_BAND = (2500, 6000)
+
+# Frames quieter than this fraction of the clip's loud level are silent
+SILENCE_GATE = 0.08
+
+
+class LipSyncUnavailable(Exception):
+    """Raised when a clip cannot be decoded (e.g. MP3 without ffmpeg)"""
+
+
+def decode_pcm(data: bytes, ffmpeg: Optional[str] = None) -> Tuple[np.ndarray, int]:
+    """
+    Decode a clip to mono float32 samples in [-1, 1]. 16-bit WAV is read
+    directly; anything else is piped through ffmpeg at 16 kHz.
+    """
+    if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+        with wave.open(io.BytesIO(data), "rb") as wav:
+            if wav.getsampwidth() != 2:
+                raise LipSyncUnavailable(f"unsupported WAV sample width {wav.getsampwidth()}")
+            channels, rate = wav.getnchannels(), wav.getframerate()
+            pcm = np.frombuffer(wav.readframes(wav.getnframes()), dtype="<i2")
+        samples = pcm.reshape(-1, channels).mean(axis=1) if channels > 1 else pcm
+        return samples.astype(np.float32) / 32768.0, rate
+
+    if not ffmpeg:
+        raise LipSyncUnavailable("ffmpeg not found")
+    result = subprocess.run(
+        [ffmpeg, "-nostdin", "-loglevel", "error", "-i", "pipe:0",
+         "-f", "s16le", "-ac", "1", "-ar", str(ANALYSIS_RATE), "pipe:1"],
+        input=data, capture_output=True, timeout=30
+    )
+    if result.returncode != 0:
+        raise LipSyncUnavailable(f"ffmpeg failed: {result.stderr.decode(errors='replace').strip()[:200]}")
+    return np.frombuffer(result.stdout, dtype="<i2").astype(np.float32) / 32768.0, ANALYSIS_RATE
+
+
+def analyze(samples: np.ndarray, sample_rate: int, fps: int = 30) -> Dict[str, Any]:
+    """
+    Compute a lip-sync track over fixed, non-overlapping frames of 1/fps s.
+
+    ``mouth`` is the mouth opening per frame (0-100) from the RMS envelope,
+    normalized to the clip's loud level and lightly smoothed. ``visemes`` has
+    one character per frame naming the VRM vowel shape (A, I, U, E, O), or
+    ``-`` for silence, chosen from the F2/F1 band energy ratio.
+    """
+    hop = max(1, sample_rate // fps)
+    count = len(samples) // hop
+    if count == 0:
+        return {"fps": fps, "duration": 0.0, "mouth": [], "visemes": ""}
+    frames = samples[:count * hop].reshape(count, hop)
+
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    reference = np.percentile(rms, 95)
+    level = np.clip(rms / reference, 0.0, 1.0) if reference > 0 else np.zeros(count)
+    level[level < SILENCE_GATE] = 0.0
+    # Perceptual curve, then a short smoothing kernel to avoid jitter
+    mouth = np.convolve(np.sqrt(level), (0.25, 0.5, 0.25), mode="same")
+
+    spectrum = np.abs(np.fft.rfft(frames * np.hanning(hop), axis=1)) ** 2
+    freqs = np.fft.rfftfreq(hop, 1.0 / sample_rate)
+
+    def band(low, high):
+        return spectrum[:, (freqs >= low) & (freqs < high)].sum(axis=1) + 1e-12
+
+    f1, f2, high = band(*F1_BAND), band(*F2_BAND), band(*HIGH_BAND)
+    ratio = np.log10(f2 / f1)
+    codes = np.select(
+        [level == 0.0, high > f1 + f2, ratio > 0.3, ratio > 0.0, ratio > -0.3, ratio > -0.6],
+        [ord("-"), ord("I"), ord("E"), ord("I"), ord("A"), ord("O")],
+        default=ord("U")
+    ).astype(np.uint8)
+
+    return {
+        "fps": fps,
+        "duration": round(count / fps, 3),
+        "mouth": np.rint(mouth * 100).astype(int).tolist(),
+        "visemes": codes.tobytes().decode("ascii")
+    }
+
+
+class LipSyncService:
+    """
+    Lip-sync tracks for synthesized speech, computed in a worker pool.
+
+    ``submit`` returns a future for a clip's track: the in-memory cache or the
+    clip's sidecar in the audio store answers immediately, otherwise the clip
+    is decoded and analyzed on a worker thread and the track is stored next
+    to the audio. Concurrent requests for the same clip share one analysis.
+    A track of ``None`` means the clip could not be analyzed; clients fall
+    back to the plain talk animation.
+
+    Configuration (environment):
+    - ``LIPSYNC_ENABLED``: compute tracks at all (default true)
+    - ``LIPSYNC_FPS``: track frame rate (default 30)
+    - ``LIPSYNC_WORKERS``: analysis threads (default 2)
+    - ``LIPSYNC_WAIT_MS``: how long a response waits for a track before it
+      is sent without one (default 250)
+    - ``LIPSYNC_FFMPEG``: ffmpeg binary for decoding MP3 (default: on PATH)
+    """
+
+    def __init__(self, audio_store, fps: Optional[int] = None, workers: Optional[int] = None,
+                 wait_ms: Optional[float] = None, cache_size: int = 256):
+        self.audio_store = audio_store
+        self.enabled = os.getenv('LIPSYNC_ENABLED', 'true').lower() == 'true'
+        self.fps = fps or int(os.getenv('LIPSYNC_FPS', 30))
+        self.wait = (wait_ms if wait_ms is not None else float(os.getenv('LIPSYNC_WAIT_MS', 250))) / 1000
+        self.ffmpeg = os.getenv('LIPSYNC_FFMPEG') or shutil.which('ffmpeg')
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers or int(os.getenv('LIPSYNC_WORKERS', 2)),
+            thread_name_prefix='lipsync'
+        )
+        self.cache_size = cache_size
+
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, Optional[Dict[str, Any]]]" = OrderedDict()
+        self._pending: Dict[str, Future] = {}
+        self._warned = False
+
+        self.computed = 0
+        self.cache_hits = 0
+        self.sidecar_hits = 0
+        self.failures = 0
+
+    def submit(self, audio_id: Optional[str]) -> Future:
+        """Future resolving to the clip's track (or None)"""
+        if not audio_id or not self.enabled:
+            return _resolved(None)
+        with self._lock:
+            if audio_id in self._cache:
+                self._cache.move_to_end(audio_id)
+                self.cache_hits += 1
+                return _resolved(self._cache[audio_id])
+            future = self._pending.get(audio_id)
+            if future is None:
+                future = self._pending[audio_id] = self.executor.submit(self._compute, audio_id)
+        return future
+
+    def track(self, audio_id: Optional[str], timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Wait up to ``timeout`` (default ``LIPSYNC_WAIT_MS``) for a track; None if not ready"""
+        future = self.submit(audio_id)
+        try:
+            return future.result(timeout=self.wait if timeout is None else timeout)
+        except Exception:
+            return None
+
+    def _compute(self, audio_id: str) -> Optional[Dict[str, Any]]:
+        track = None
+        # A clip that is not stored (yet) is not remembered as unanalyzable
+        remember = True
+        try:
+            stored = self.audio_store.load_sidecar(audio_id, SIDECAR_KIND)
+            if stored is not None:
+                track = json.loads(stored)
+                with self._lock:
+                    self.sidecar_hits += 1
+            else:
+                data = self.audio_store.read(audio_id)
+                if data is None:
+                    remember = False
+                    return None
+                with stage_timer('lipsync'):
+                    samples, rate = decode_pcm(data, self.ffmpeg)
+                    track = analyze(samples, rate, self.fps)
+                self.audio_store.store_sidecar(audio_id, SIDECAR_KIND,
+                                               json.dumps(track, separators=(",", ":")).encode("utf-8"))
+                with self._lock:
+                    self.computed += 1
+        except LipSyncUnavailable as e:
+            if not self._warned:
+                logger.warning(f"👄 Lip-sync analysis unavailable: {e}")
+                self._warned = True
+            with self._lock:
+                self.failures += 1
+        except Exception as e:
+            logger.error(f"Lip-sync analysis failed for {audio_id}: {e}")
+            with self._lock:
+                self.failures += 1
+        finally:
+            with self._lock:
+                self._pending.pop(audio_id, None)
+                if remember:
+                    self._cache[audio_id] = track
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+        return track
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "fps": self.fps,
+                "ffmpeg": bool(self.ffmpeg),
+                "computed": self.computed,
+                "cache_hits": self.cache_hits,
+                "sidecar_hits": self.sidecar_hits,
+                "failures": self.failures,
+                "pending": len(self._pending)
+            }
+
+
+def _resolved(value) -> Future:
+    future = Future()
+    future.set_result(value)
+    return future
@@ -0,0 +1,223 @@
+import os
+import json
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+DEEPGRAM_LIVE_URL = os.getenv('DEEPGRAM_LIVE_URL', 'wss://api.deepgram.com/v1/listen')
+
+# on_event(event_type, payload) with event_type one of:
+#   "interim"   - {"text"}                      partial hypothesis, may still change
+#   "final"     - {"text", "speech_final"}      finalized segment
+#   "utterance" - {"text"}                      endpoint reached; text is the whole utterance
+#   "error"     - {"message"}
+#   "closed"    - {}
+EventCallback = Callable[[str, Dict[str, Any]], None]
+
+
+class LiveTranscriptionSession(ABC):
+    """
+    Common handling for Deepgram live-transcription messages.
+
+    Final segments are accumulated until Deepgram signals an endpoint
+    (``speech_final`` on a result, or an ``UtteranceEnd`` message), at which
+    point the whole utterance is reported once.
+    """
+
+    def __init__(self, on_event: EventCallback):
+        self.on_event = on_event
+        self.final_parts: List[str] = []
+        self.closed = False
+        self.bytes_sent = 0
+
+    def start(self):
+        """Open the stream; events may be reported before this returns"""
+        return self
+
+    @abstractmethod
+    def send(self, chunk: bytes):
+        ...
+
+    @abstractmethod
+    def finish(self):
+        """Flush remaining audio and close the stream once results are in"""
+
+    @abstractmethod
+    def close(self):
+        """Abort the stream immediately"""
+
+    def _emit(self, event_type: str, payload: Dict[str, Any]):
+        try:
+            self.on_event(event_type, payload)
+        except Exception as e:
+            logger.error(f"Live transcription callback failed for '{event_type}': {e}")
+
+    def _handle_message(self, message: Dict[str, Any]):
+        message_type = message.get('type', 'Results')
+
+        if message_type == 'Results':
+            alternatives = message.get('channel', {}).get('alternatives') or [{}]
+            transcript = alternatives[0].get('transcript', '').strip()
+            is_final = message.get('is_final', False)
+            speech_final = message.get('speech_final', False)
+
+            if is_final:
+                if transcript:
+                    self.final_parts.append(transcript)
+                    self._emit('final', {'text': transcript, 'speech_final': speech_final})
+                if speech_final:
+                    self._flush_utterance()
+            elif transcript:
+                self._emit('interim', {'text': transcript})
+
+        elif message_type == 'UtteranceEnd':
+            self._flush_utterance()
+
+        elif message_type == 'Error':
+            self._emit('error', {'message': message.get('description') or message.get('message', 'Unknown error')})
+
+    def _flush_utterance(self):
+        if not self.final_parts:
+            return
+        utterance = " ".join(self.final_parts)
+        self.final_parts = []
+        self._emit('utterance', {'text': utterance})
+
+
+class DeepgramLiveSession(LiveTranscriptionSession):
+    """
+    Streams audio to Deepgram's live WebSocket API on the service's runtime
+    loop. ``send``/``finish``/``close`` are safe to call from any thread.
+    """
+
+    KEEPALIVE_INTERVAL = 5  # Deepgram closes idle streams after ~10 s
+
+    def __init__(self, service, on_event: EventCallback, params: Dict[str, Any]):
+        super().__init__(on_event)
+        self.service = service
+        self.params = params
+        self._queue: Optional[asyncio.Queue] = None
+        self._future = None
+
+    def start(self):
+        runtime = self.service.runtime
+        self._queue = runtime.run(_new_queue())
+        self._future = runtime.submit(self.run())
+        return self
+
+    def send(self, chunk: bytes):
+        if self.closed or not chunk:
+            return
+        self.bytes_sent += len(chunk)
+        self.service.runtime.loop.call_soon_threadsafe(self._queue.put_nowait, bytes(chunk))
+
+    def finish(self):
+        if not self.closed:
+            self.service.runtime.loop.call_soon_threadsafe(self._queue.put_nowait, None)
+
+    def close(self):
+        if self._future is not None and not self._future.done():
+            self._future.cancel()
+
+    async def stream_buffer(self, audio: bytes, chunk_size: int = 8192):
+        """Stream a complete buffer and wait for the results (runs on the runtime loop)"""
+        self._queue = asyncio.Queue()
+        for offset in range(0, len(audio), chunk_size):
+            self._queue.put_nowait(audio[offset:offset + chunk_size])
+        self._queue.put_nowait(None)
+        self.bytes_sent = len(audio)
+        await self.run()
+
+    async def run(self):
+        """Connect, pump audio and dispatch results until the stream closes"""
+        session = await self.service._get_session()
+        headers = {'Authorization': f'Token {self.service.api_key}'}
+        params = {key: str(value).lower() if isinstance(value, bool) else value for key, value in self.params.items()}
+
+        try:
+            async with session.ws_connect(DEEPGRAM_LIVE_URL, params=params, headers=headers) as ws:
+                logger.info("🎙️  Deepgram live stream opened")
+                pump = asyncio.ensure_future(self._pump(ws))
+                try:
+                    async for msg in ws:
+                        if msg.type == aiohttp.WSMsgType.TEXT:
+                            self._handle_message(json.loads(msg.data))
+                        elif msg.type == aiohttp.WSMsgType.ERROR:
+                            raise ws.exception() or Exception("WebSocket error")
+                finally:
+                    pump.cancel()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Deepgram live stream error: {e}")
+            self._emit('error', {'message': str(e)})
+        finally:
+            # Anything finalized but not yet endpointed still counts
+            self._flush_utterance()
+            self.closed = True
+            logger.info(f"🎙️  Deepgram live stream closed ({self.bytes_sent} bytes sent)")
+            self._emit('closed', {})
+
+    async def _pump(self, ws):
+        while True:
+            try:
+                chunk = await asyncio.wait_for(self._queue.get(), self.KEEPALIVE_INTERVAL)
+            except asyncio.TimeoutError:
+                await ws.send_str(json.dumps({'type': 'KeepAlive'}))
+                continue
+            if chunk is None:
+                await ws.send_str(json.dumps({'type': 'CloseStream'}))
+                return
+            await ws.send_bytes(chunk)
+
+
+class LocalLiveSession(LiveTranscriptionSession):
+    """
+    In-process stand-in for the Deepgram live API, used when Deepgram is not
+    configured and in tests. ``script`` is a list of Deepgram-format messages;
+    one is replayed per audio chunk received and the rest on ``finish``. With
+    no script, ``finish`` reports ``fallback_text`` as a single utterance.
+    """
+
+    def __init__(self, on_event: EventCallback, script: Optional[List[Dict[str, Any]]] = None,
+                 fallback_text: str = "Mock transcription: Please set DEEPGRAM_API_KEY environment variable"):
+        super().__init__(on_event)
+        self.script = list(script or [])
+        self.scripted = bool(script)
+        self.fallback_text = fallback_text
+
+    def send(self, chunk: bytes):
+        if self.closed or not chunk:
+            return
+        self.bytes_sent += len(chunk)
+        if self.script:
+            self._handle_message(self.script.pop(0))
+
+    def finish(self):
+        if self.closed:
+            return
+        while self.script:
+            self._handle_message(self.script.pop(0))
+        if not self.scripted and self.bytes_sent:
+            self._handle_message({
+                'type': 'Results',
+                'is_final': True,
+                'speech_final': True,
+                'channel': {'alternatives': [{'transcript': self.fallback_text}]}
+            })
+        self._flush_utterance()
+        self.closed = True
+        self._emit('closed', {})
+
+    def close(self):
+        self.closed = True
+
+
+async def _new_queue() -> asyncio.Queue:
+    """Create a queue bound to the running loop"""
+    return asyncio.Queue()
@@ -0,0 +1,233 @@
+import os
+import time
+import queue
+import importlib.util
+import shutil
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.audio_preprocess import TARGET_RATE, decode_audio, resample
+from services.metrics import stage_timer
+
+# Imported in load(): faster-whisper (CTranslate2, tokenizers) adds ~0.3 s to startup.
+# Without it (requirements-local-stt.txt) the local backend stays unconfigured; cloud providers still work
+FASTER_WHISPER_AVAILABLE = importlib.util.find_spec('faster_whisper') is not None
+
+logger = logging.getLogger(__name__)
+
+# Whisper's context is 30 s; shorter clips are padded and decoded together
+BATCH_MAX_SECONDS = 30.0
+# Transcripts of clips the model thinks are silent are dropped
+NO_SPEECH_THRESHOLD = 0.6
+
+
+class LocalSTTService:
+    """
+    Speech-to-text on the local CPU with a Whisper-class model
+    (faster-whisper / CTranslate2, int8 by default).
+
+    The model is loaded once, when the service is created or (with
+    ``preload=False``) when ``load`` is called, e.g. from the service warmup
+    thread; until then the router skips this provider. Clips are queued
+    for a micro-batcher: each inference worker takes the oldest clip, waits
+    up to ``LOCAL_STT_BATCH_WAIT_MS`` for more to arrive (up to
+    ``LOCAL_STT_BATCH_SIZE``), and decodes them in one encoder/decoder call.
+    Clips longer than 30 s run alone through the regular long-form
+    transcription. Workers times threads per worker matches the CPU cores.
+
+    Configuration (environment):
+    - ``LOCAL_STT_ENABLED``: load the model at startup (default false)
+    - ``LOCAL_STT_MODEL``: model size or path (default base.en)
+    - ``LOCAL_STT_COMPUTE_TYPE``: CTranslate2 compute type (default int8)
+    - ``LOCAL_STT_LANGUAGE``: language for multilingual models (default en)
+    - ``LOCAL_STT_WORKERS``: concurrent inference calls (default 1, or 2 on 8+ cores)
+    - ``LOCAL_STT_THREADS``: CPU threads per inference call (default cores / workers)
+    - ``LOCAL_STT_BATCH_SIZE``: most clips per inference call (default 8)
+    - ``LOCAL_STT_BATCH_WAIT_MS``: how long a batch waits for more clips (default 25)
+    - ``LOCAL_STT_BEAM_SIZE``: decoding beam size (default 1, greedy)
+    """
+
+    def __init__(self, model_name: Optional[str] = None, enabled: Optional[bool] = None,
+                 batch_size: Optional[int] = None, batch_wait_ms: Optional[float] = None,
+                 workers: Optional[int] = None, threads: Optional[int] = None, preload: bool = True):
+        self.enabled = enabled if enabled is not None else os.getenv('LOCAL_STT_ENABLED', 'false').lower() == 'true'
+        self.model_name = model_name or os.getenv('LOCAL_STT_MODEL', 'base.en')
+        self.compute_type = os.getenv('LOCAL_STT_COMPUTE_TYPE', 'int8')
+        self.language = os.getenv('LOCAL_STT_LANGUAGE', 'en')
+        self.batch_size = batch_size or int(os.getenv('LOCAL_STT_BATCH_SIZE', 8))
+        self.batch_wait = (batch_wait_ms if batch_wait_ms is not None
+                           else float(os.getenv('LOCAL_STT_BATCH_WAIT_MS', 25))) / 1000
+        self.beam_size = int(os.getenv('LOCAL_STT_BEAM_SIZE', 1))
+        cores = os.cpu_count() or 1
+        self.workers = workers or int(os.getenv('LOCAL_STT_WORKERS', 2 if cores >= 8 else 1))
+        self.threads = threads or int(os.getenv('LOCAL_STT_THREADS', max(1, cores // self.workers)))
+        self.ffmpeg = os.getenv('STT_FFMPEG') or shutil.which('ffmpeg')
+
+        self.model = None
+        self.load_seconds = None
+        self._queue: "queue.Queue[Tuple[np.ndarray, Future]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.clips = 0
+        self.audio_seconds = 0.0
+        self.inference_seconds = 0.0
+        self.batch_histogram: Dict[int, int] = {}
+
+        if self.enabled and preload:
+            self.load()
+
+    def load(self):
+        """Load the model, warm it up and start the batch workers (once)"""
+        if self.model is not None:
+            return
+        if not FASTER_WHISPER_AVAILABLE:
+            logger.warning("⚠️  LOCAL_STT_ENABLED is set but faster-whisper is not installed "
+                           "(pip install -r requirements-local-stt.txt)")
+            return
+        from faster_whisper import WhisperModel
+        from faster_whisper.tokenizer import Tokenizer
+        from faster_whisper.transcribe import get_suppressed_tokens
+
+        start = time.perf_counter()
+        self.model = WhisperModel(self.model_name, device="cpu", compute_type=self.compute_type,
+                                  cpu_threads=self.threads, num_workers=self.workers)
+        self.tokenizer = Tokenizer(self.model.hf_tokenizer, self.model.model.is_multilingual,
+                                   task="transcribe", language=self.language)
+        self.prompt = self.model.get_prompt(self.tokenizer, [], without_timestamps=True)
+        self.suppress_tokens = list(get_suppressed_tokens(self.tokenizer, [-1]))
+        # The first call allocates buffers and picks kernels; pay for it before the first user
+        self._infer([np.zeros(TARGET_RATE, dtype=np.float32)], record=False)
+        self.load_seconds = time.perf_counter() - start
+
+        for index in range(self.workers):
+            threading.Thread(target=self._worker, name=f"local-stt-{index}", daemon=True).start()
+        logger.info(f"✅ Local STT model '{self.model_name}' ({self.compute_type}) loaded in "
+                    f"{self.load_seconds:.1f}s: {self.workers} worker(s) x {self.threads} threads, "
+                    f"batches of up to {self.batch_size}")
+
+    def is_configured(self):
+        """Check if the local model is loaded"""
+        return self.model is not None
+
+    def submit(self, samples: np.ndarray) -> Future:
+        """Queue 16 kHz mono float32 samples; the future resolves to the transcript"""
+        future = Future()
+        self._queue.put((samples, future))
+        return future
+
+    def submit_bytes(self, audio_bytes: bytes, mimetype: Optional[str] = None) -> Future:
+        samples, rate = decode_audio(audio_bytes, mimetype, self.ffmpeg)
+        return self.submit(resample(samples, rate))
+
+    def transcribe_audio_bytes(self, audio_bytes, mimetype='audio/wav', request_log=None):
+        """
+        Transcribe audio bytes on the local model (same interface as the
+        cloud services: errors come back as text)
+        """
+        if not self.is_configured():
+            return "Mock transcription: Please set LOCAL_STT_ENABLED and install faster-whisper"
+        try:
+            if request_log is not None:
+                with request_log.stage('local_stt'):
+                    text = self.submit_bytes(audio_bytes, mimetype).result()
+                request_log.update(chars=len(text))
+            else:
+                text = self.submit_bytes(audio_bytes, mimetype).result()
+        except Exception as e:
+            if request_log is not None:
+                request_log.fail(e)
+            logger.error(f"Error transcribing audio locally: {e}")
+            return f"Error transcribing audio: {str(e)}"
+        if not text.strip():
+            return "I couldn't hear anything clearly. Please try speaking again."
+        return text
+
+    def _worker(self):
+        while True:
+            batch = [self._queue.get()]
+            if len(batch[0][0]) / TARGET_RATE <= BATCH_MAX_SECONDS:
+                deadline = time.monotonic() + self.batch_wait
+                while len(batch) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    try:
+                        item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if len(item[0]) / TARGET_RATE > BATCH_MAX_SECONDS:
+                        # Long clips are transcribed on their own, after this batch
+                        self._queue.put(item)
+                        break
+                    batch.append(item)
+
+            # Clips whose callers gave up (e.g. a lost hedge) are skipped
+            batch = [(samples, future) for samples, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                texts = self._infer([samples for samples, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), text in zip(batch, texts):
+                future.set_result(text)
+
+    def _infer(self, clips: List[np.ndarray], record: bool = True) -> List[str]:
+        from faster_whisper.audio import pad_or_trim
+        start = time.perf_counter()
+        with stage_timer('local_stt'):
+            if len(clips) == 1 and len(clips[0]) / TARGET_RATE > BATCH_MAX_SECONDS:
+                segments, _ = self.model.transcribe(clips[0], language=self.language if
+                                                    self.model.model.is_multilingual else None,
+                                                    beam_size=self.beam_size, vad_filter=False)
+                texts = ["".join(segment.text for segment in segments).strip()]
+            else:
+                features = np.stack([pad_or_trim(self.model.feature_extractor(clip)[..., :-1]) for clip in clips])
+                results = self.model.model.generate(
+                    self.model.encode(features),
+                    [list(self.prompt) for _ in clips],
+                    beam_size=self.beam_size,
+                    max_length=self.model.max_length,
+                    suppress_blank=True,
+                    suppress_tokens=self.suppress_tokens,
+                    return_no_speech_prob=True
+                )
+                texts = []
+                for result in results:
+                    if result.no_speech_prob > NO_SPEECH_THRESHOLD:
+                        texts.append("")
+                        continue
+                    tokens = [token for token in result.sequences_ids[0] if token < self.tokenizer.eot]
+                    texts.append(self.tokenizer.decode(tokens).strip())
+        elapsed = time.perf_counter() - start
+        if not record:
+            return texts
+        with self._lock:
+            self.batches += 1
+            self.clips += len(clips)
+            self.audio_seconds += sum(len(clip) for clip in clips) / TARGET_RATE
+            self.inference_seconds += elapsed
+            self.batch_histogram[len(clips)] = self.batch_histogram.get(len(clips), 0) + 1
+        return texts
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "configured": self.is_configured(),
+                "model": self.model_name,
+                "compute_type": self.compute_type,
+                "workers": self.workers,
+                "threads": self.threads,
+                "load_seconds": round(self.load_seconds, 2) if self.load_seconds is not None else None,
+                "queued": self._queue.qsize(),
+                "batches": self.batches,
+                "clips": self.clips,
+                "mean_batch_size": round(self.clips / self.batches, 2) if self.batches else None,
+                "batch_sizes": dict(sorted(self.batch_histogram.items())),
+                "real_time_factor": round(self.inference_seconds / self.audio_seconds, 3)
+                if self.audio_seconds else None
+            }
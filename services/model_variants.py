@@ -0,0 +1,96 @@
+import os
+import json
+import logging
+from typing import Any, Dict, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+# Variant names from lightest to heaviest
+QUALITY_ORDER = ("low", "medium", "high")
+SLOW_CONNECTIONS = {"slow-2g", "2g", "3g"}
+
+
+def parse_capabilities(args: Mapping[str, str]) -> Dict[str, Any]:
+    """
+    Client-reported capabilities from query parameters: ``maxTextureSize``,
+    ``deviceMemory`` (GB), ``connection`` (Network Information effectiveType),
+    ``saveData``, ``draco`` (1 if the client has a Draco decoder) and an
+    explicit ``quality`` override
+    """
+    def number(name, cast):
+        try:
+            return cast(args[name]) if args.get(name) else None
+        except ValueError:
+            return None
+
+    return {
+        "max_texture_size": number("maxTextureSize", int),
+        "device_memory": number("deviceMemory", float),
+        "connection": (args.get("connection") or "").lower() or None,
+        "save_data": args.get("saveData") in ("1", "true"),
+        "draco": args.get("draco") in ("1", "true"),
+        "quality": (args.get("quality") or "").lower() or None
+    }
+
+
+class ModelVariants:
+    """
+    Picks an optimized VRM variant (written by ``optimize_vrm.py``) for a
+    client. The client's capabilities give a quality tier; the best variant
+    at or below that tier that the client can load (texture size limit,
+    Draco support) is chosen. Clients that report nothing get the original
+    model.
+
+    Configuration (environment):
+    - ``VRM_VARIANTS_MANIFEST``: variant manifest (default static/models/lod/manifest.json)
+    """
+
+    def __init__(self, manifest_path: Optional[str] = None):
+        self.manifest_path = manifest_path or os.getenv('VRM_VARIANTS_MANIFEST',
+                                                        os.path.join('static', 'models', 'lod', 'manifest.json'))
+        self.models: Dict[str, Dict[str, Any]] = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                self.models = json.load(f).get("models", {})
+        except FileNotFoundError:
+            self.models = {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable VRM variant manifest {self.manifest_path}: {e}")
+            self.models = {}
+
+    @staticmethod
+    def tier(capabilities: Dict[str, Any]) -> Optional[str]:
+        """Quality tier for a client, or None to serve the original model"""
+        quality = capabilities.get("quality")
+        if quality in QUALITY_ORDER or quality == "original":
+            return None if quality == "original" else quality
+        memory = capabilities.get("device_memory")
+        connection = capabilities.get("connection")
+        if memory is None and connection is None and capabilities.get("max_texture_size") is None:
+            return None
+        if capabilities.get("save_data") or connection in SLOW_CONNECTIONS or (memory is not None and memory <= 2):
+            return "low"
+        if memory is not None and memory >= 8:
+            return "high"
+        return "medium"
+
+    def select(self, model: str, capabilities: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Manifest entry (plus ``name``) of the variant to serve, or None for the original"""
+        tier = self.tier(capabilities)
+        variants = self.models.get(model, {}).get("variants", {})
+        if tier is None or not variants:
+            return None
+        max_texture = capabilities.get("max_texture_size")
+        for name in reversed(QUALITY_ORDER[:QUALITY_ORDER.index(tier) + 1]):
+            entry = variants.get(name)
+            if entry is None:
+                continue
+            if entry.get("draco") and not capabilities.get("draco"):
+                continue
+            if max_texture and entry.get("stats", {}).get("max_texture", entry.get("max_texture", 0)) > max_texture:
+                continue
+            return {"name": name, **entry}
+        return None
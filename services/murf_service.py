@@ -1,35 +1,69 @@
 import os
-import time
-import requests
 from murf import Murf
+from services.http_client import get_http_client
+from services.audio_store import AudioStore, audio_id_for
+from services.lipsync import LipSyncService
+from services.metrics import stage_timer
+from services.health_service import DependencyNotConfigured
+
+# Murf returns MP3 by default; part of the audio ID so other formats never collide
+AUDIO_FORMAT = "mp3"
 
 class MurfService:
-    def __init__(self):
+    def __init__(self, audio_store=None, lipsync=None):
         # The murf SDK will automatically use the MURF_API_KEY environment variable
         self.client = Murf()
+        self.http = get_http_client()
+        self.audio_store = audio_store or AudioStore()
+        self.lipsync = lipsync or LipSyncService(self.audio_store)
 
     def synthesize_speech(self, text, voice_id="en-US-terrell"):
         """
-        Convert text to speech using Murf AI SDK
+        Convert text to speech using Murf AI SDK and return the audio ID of
+        the stored clip. Identical (text, voice) requests reuse the stored
+        clip without calling Murf.
         """
+        audio_id = audio_id_for(text, voice_id, AUDIO_FORMAT)
+        
+        if self.audio_store.contains(audio_id):
+            return audio_id
+        
         try:
-            audio_res = self.client.text_to_speech.generate(
-                text=text,
-                voice_id=voice_id
-            )
-            audio_url = audio_res.audio_file  # This is a URL to the audio file
-            # Download the audio file
-            response = requests.get(audio_url)
-            response.raise_for_status()
-            # Save the audio file to static/audio
-            filename = f"static/audio/speech_{int(time.time())}.mp3"
-            os.makedirs(os.path.dirname(filename), exist_ok=True)
-            with open(filename, "wb") as f:
-                f.write(response.content)
-            return filename
+            # Concurrent requests for the same clip wait here for one synthesis
+            with self.audio_store.key_lock(audio_id):
+                if self.audio_store.contains(audio_id):
+                    return audio_id
+                
+                with stage_timer('tts_generate'):
+                    audio_res = self.client.text_to_speech.generate(
+                        text=text,
+                        voice_id=voice_id
+                    )
+                audio_url = audio_res.audio_file  # This is a URL to the audio file
+                # Download the audio file
+                with stage_timer('tts_download'):
+                    response = self.http.get(audio_url)
+                    response.raise_for_status()
+                # Save the audio file to the audio store under its content hash
+                self.audio_store.store(audio_id, response.content, AUDIO_FORMAT)
+                # Start the lip-sync analysis while the caller builds its response
+                self.lipsync.submit(audio_id)
+                return audio_id
         except Exception as e:
             print(f"Unexpected error in MURF speech synthesis: {e}")
             return None
+        finally:
+            self.audio_store.release_key_lock(audio_id)
+
+    def check_health(self):
+        """
+        Health check for the background prober: lists voices (no synthesis)
+        and raises if Murf cannot be reached
+        """
+        if not os.getenv('MURF_API_KEY'):
+            raise DependencyNotConfigured("MURF_API_KEY not set")
+        voices = self.client.text_to_speech.voices()
+        return {"voices": len(voices)}
 
     def get_available_voices(self):
         """
@@ -2,13 +2,50 @@ import os
 import json
 import time
 import requests
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional
+from services.http_client import get_http_client
+from services.history_store import ConversationHistoryStore
+from services.response_cache import ResponseCache
+from services.metrics import RAG_FALLBACKS, STAGE_LATENCY, stage_timer
+from services.health_service import DependencyNotConfigured
+from services.circuit_breaker import AdaptiveTimeout, CircuitBreaker, CircuitOpenError
+
+# Session used when a caller does not identify itself
+DEFAULT_SESSION = "default"
+
+class FallbackResponse(str):
+    """
+    Marker type for answers produced locally instead of by the RAG endpoint.
+    An empty FallbackResponse in a stream marks an answer cut short by an error.
+    """
+
+class RAGEndpointError(Exception):
+    """
+    The RAG endpoint answered with a server error (counts against the breaker)
+    """
+
+class DocumentUploadError(Exception):
+    """
+    The RAG endpoint rejected a document upload
+    """
+    
+    def __init__(self, status_code: int, body: str = ""):
+        super().__init__(f"RAG endpoint returned {status_code}: {body}")
+        self.status_code = status_code
+        # Throttling and server errors are worth retrying; other 4xx are not
+        self.retryable = status_code == 429 or status_code >= 500
 
 class RAGService:
     def __init__(self):
         self.rag_endpoint = os.getenv('RAG_ENDPOINT_URL')
         self.rag_api_key = os.getenv('RAG_API_KEY')
-        self.conversation_history = []
+        self.conversation_history = ConversationHistoryStore()
+        self.http = get_http_client()
+        self.response_cache = ResponseCache()
+        
+        # Fail fast while the endpoint is down; per-call timeouts follow observed latency
+        self.breaker = CircuitBreaker("rag")
+        self.timeouts = AdaptiveTimeout("rag")
         
         # Validate RAG endpoint configuration
         if not self.rag_endpoint:
@@ -16,22 +53,229 @@ class RAGService:
         else:
             print(f"✅ RAG endpoint configured: {self.rag_endpoint}")
     
-    def process_query(self, query: str) -> str:
+    def process_query(self, query: str, session_id: Optional[str] = None, use_cache: bool = True) -> str:
         """
         Process user query through external RAG endpoint
         """
+        session_id = session_id or DEFAULT_SESSION
+        
         # Add to conversation history
-        self.conversation_history.append({"role": "user", "content": query, "timestamp": time.time()})
+        self.conversation_history.append(session_id, "user", query)
         
-        # Send to external RAG endpoint
-        response = self._call_rag_endpoint(query)
+        history = self.conversation_history.get(session_id, limit=5)
+        response = self._answer(query, history, use_cache)
         
         # Add response to conversation history
-        self.conversation_history.append({"role": "assistant", "content": response, "timestamp": time.time()})
+        self.conversation_history.append(session_id, "assistant", response)
         
         return response
     
-    def _call_rag_endpoint(self, query: str) -> str:
+    def answer_query(self, query: str, session_id: Optional[str] = None, use_cache: bool = True) -> str:
+        """
+        Answer a query in the context of a session without recording it in the
+        conversation history (used for speculative dispatch). Call
+        ``record_turn`` once the answer is actually used.
+        """
+        history = self.conversation_history.get(session_id or DEFAULT_SESSION, limit=4)
+        history.append({"role": "user", "content": query, "timestamp": time.time()})
+        return self._answer(query, history, use_cache)
+    
+    def record_turn(self, query: str, response: str, session_id: Optional[str] = None):
+        """
+        Add a user query and its answer to the conversation history
+        """
+        session_id = session_id or DEFAULT_SESSION
+        self.conversation_history.append(session_id, "user", query)
+        self.conversation_history.append(session_id, "assistant", response)
+    
+    def _answer(self, query: str, history: List[Dict[str, Any]], use_cache: bool = True) -> str:
+        """
+        Answer from the cache or the RAG endpoint; ``history`` ends with the query
+        """
+        # Answer repeated questions from the cache; the key covers the history
+        # before this query, not the query itself
+        cache_key = self.response_cache.make_key(query, history[:-1])
+        response = self.response_cache.get(cache_key) if use_cache else None
+        
+        if response is None:
+            # Send to external RAG endpoint
+            response = self._call_rag_endpoint(query, history)
+            
+            # Fallback answers are never cached
+            if not isinstance(response, FallbackResponse):
+                self.response_cache.put(cache_key, response)
+        
+        return response
+    
+    def stream_query(self, query: str, session_id: Optional[str] = None) -> Iterator[str]:
+        """
+        Process user query through external RAG endpoint, yielding the answer
+        incrementally as the endpoint produces it
+        """
+        session_id = session_id or DEFAULT_SESSION
+        
+        # Add to conversation history
+        self.conversation_history.append(session_id, "user", query)
+        
+        history = self.conversation_history.get(session_id, limit=5)
+        cache_key = self.response_cache.make_key(query, history[:-1])
+        cached = self.response_cache.get(cache_key)
+        
+        if cached is not None:
+            parts = [cached]
+            yield cached
+        else:
+            parts = []
+            fallback = False
+            for part in self._stream_rag_endpoint(query, history):
+                if isinstance(part, FallbackResponse):
+                    fallback = True
+                if not part:
+                    continue
+                parts.append(part)
+                yield part
+            
+            # Only complete answers from the endpoint are cached
+            if not fallback:
+                self.response_cache.put(cache_key, "".join(parts))
+        
+        # Add response to conversation history
+        self.conversation_history.append(session_id, "assistant", "".join(parts))
+    
+    def _stream_rag_endpoint(self, query: str, history: Optional[List[Dict[str, Any]]] = None) -> Iterator[str]:
+        """
+        Call external RAG endpoint in streaming mode. Server-sent events and
+        chunked plain text are consumed as they arrive; a regular JSON body is
+        yielded whole so non-streaming endpoints keep working.
+        """
+        if not self.rag_endpoint:
+            yield self._generate_fallback_response(query)
+            return
+        
+        payload = {
+            "user_query": query,
+            "history": history or [],  # Last 5 messages of this session for context
+            "response_mode": "summary",
+            "max_tokens": 500,
+            "temperature": 0.7,
+            "stream": True
+        }
+        
+        headers = {
+            "Content-Type": "application/json",
+            "Accept": "text/event-stream, application/json, text/plain"
+        }
+        
+        if self.rag_api_key:
+            headers["Authorization"] = f"Bearer {self.rag_api_key}"
+        
+        produced = False
+        settled = False
+        started = time.perf_counter()
+        try:
+            self.breaker.acquire()
+            with self.http.post(
+                self.rag_endpoint,
+                json=payload,
+                headers=headers,
+                timeout=self.timeouts.current(),
+                stream=True
+            ) as response:
+                if response.status_code >= 500:
+                    raise RAGEndpointError(f"{response.status_code} - {response.text}")
+                if response.status_code != 200:
+                    print(f"❌ RAG endpoint error: {response.status_code} - {response.text}")
+                    yield self._generate_fallback_response(query)
+                    return
+                
+                content_type = response.headers.get('Content-Type', '')
+                if 'text/event-stream' in content_type:
+                    parts = self._iter_sse_text(response)
+                elif 'application/json' in content_type:
+                    try:
+                        parts = iter([self._extract_response_text(response.json())])
+                    except json.JSONDecodeError:
+                        parts = iter([response.text])
+                else:
+                    if response.encoding is None:
+                        response.encoding = 'utf-8'
+                    parts = response.iter_content(chunk_size=None, decode_unicode=True)
+                
+                for part in parts:
+                    if part:
+                        if not produced:
+                            # The breaker and timeouts judge streams by time to first token
+                            first_token = time.perf_counter() - started
+                            STAGE_LATENCY.observe(first_token, stage='rag_first_token')
+                            self.timeouts.observe(first_token)
+                            self.breaker.record_success(first_token)
+                            settled = True
+                        produced = True
+                        yield part
+                STAGE_LATENCY.observe(time.perf_counter() - started, stage='rag_call')
+        
+        except CircuitOpenError as e:
+            settled = True
+            print(f"⚡ RAG endpoint skipped: {e}")
+            yield self._generate_fallback_response(query)
+        except requests.exceptions.Timeout:
+            settled = self._settle_failure(settled)
+            print("❌ RAG endpoint timeout")
+            yield self._generate_fallback_response(query) if not produced else FallbackResponse()
+        except requests.exceptions.ConnectionError:
+            settled = self._settle_failure(settled)
+            print("❌ RAG endpoint connection error")
+            yield self._generate_fallback_response(query) if not produced else FallbackResponse()
+        except Exception as e:
+            settled = self._settle_failure(settled)
+            print(f"❌ RAG endpoint error: {e}")
+            yield self._generate_fallback_response(query) if not produced else FallbackResponse()
+        finally:
+            if not settled:
+                # Empty answer, client error, or the consumer stopped early
+                self.breaker.release()
+    
+    def _settle_failure(self, settled: bool) -> bool:
+        """
+        Count a failed streaming call against the breaker unless it already
+        produced a verdict
+        """
+        if not settled:
+            self.breaker.record_failure()
+        return True
+    
+    def _iter_sse_text(self, response) -> Iterator[str]:
+        """
+        Yield text deltas from a server-sent events response
+        """
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith('data:'):
+                continue
+            
+            data = line[5:]
+            if data.startswith(' '):
+                data = data[1:]
+            if data.strip() == '[DONE]':
+                break
+            
+            try:
+                event = json.loads(data)
+            except json.JSONDecodeError:
+                # Plain text event payload
+                yield data
+                continue
+            
+            if isinstance(event, dict):
+                # Token-level streams usually send "delta" or "token"; events
+                # without any text field (e.g. status or usage) are skipped
+                for field in ('delta', 'token', 'response', 'answer', 'text', 'content', 'message'):
+                    if isinstance(event.get(field), str):
+                        yield event[field]
+                        break
+            else:
+                yield self._extract_response_text(event)
+    
+    def _call_rag_endpoint(self, query: str, history: Optional[List[Dict[str, Any]]] = None) -> str:
         """
         Call external RAG endpoint
         """
@@ -42,7 +286,7 @@ class RAGService:
             # Prepare request payload
             payload = {
                 "user_query": query,
-                "history": self.conversation_history[-5:],  # Last 5 messages for context
+                "history": history or [],  # Last 5 messages of this session for context
                 "response_mode": "summary",
                 "max_tokens": 500,
                 "temperature": 0.7
@@ -57,40 +301,22 @@ class RAGService:
             if self.rag_api_key:
                 headers["Authorization"] = f"Bearer {self.rag_api_key}"
             
-            # Make request to RAG endpoint
-            response = requests.post(
-                self.rag_endpoint,
-                json=payload,
-                headers=headers,
-                timeout=120  # 30 second timeout
-            )
+            # Make request to RAG endpoint; the read timeout adapts to observed
+            # latency and the connect timeout comes from the shared client
+            with self.breaker.call(), stage_timer('rag_call'), self.timeouts.track() as timeout:
+                response = self.http.post(
+                    self.rag_endpoint,
+                    json=payload,
+                    headers=headers,
+                    timeout=timeout
+                )
+                if response.status_code >= 500:
+                    raise RAGEndpointError(f"{response.status_code} - {response.text}")
             
             # Check if request was successful
             if response.status_code == 200:
                 try:
-                    result = response.json()
-                    
-                    # Handle different response formats
-                    if isinstance(result, dict):
-                        # Try different possible response field names
-                        if 'response' in result:
-                            return result['response']
-                        elif 'answer' in result:
-                            return result['answer']
-                        elif 'text' in result:
-                            return result['text']
-                        elif 'content' in result:
-                            return result['content']
-                        elif 'message' in result:
-                            return result['message']
-                        else:
-                            # If no standard field, return the entire response as string
-                            return str(result)
-                    elif isinstance(result, str):
-                        return result
-                    else:
-                        return str(result)
-                        
+                    return self._extract_response_text(response.json())
                 except json.JSONDecodeError:
                     # If response is not JSON, treat as plain text
                     return response.text
@@ -98,6 +324,9 @@ class RAGService:
                 print(f"❌ RAG endpoint error: {response.status_code} - {response.text}")
                 return self._generate_fallback_response(query)
                 
+        except CircuitOpenError as e:
+            print(f"⚡ RAG endpoint skipped: {e}")
+            return self._generate_fallback_response(query)
         except requests.exceptions.Timeout:
             print("❌ RAG endpoint timeout")
             return self._generate_fallback_response(query)
@@ -108,6 +337,23 @@ class RAGService:
             print(f"❌ RAG endpoint error: {e}")
             return self._generate_fallback_response(query)
     
+    def _extract_response_text(self, result: Any) -> str:
+        """
+        Pull the answer text out of a decoded RAG response body
+        """
+        # Handle different response formats
+        if isinstance(result, dict):
+            # Try different possible response field names
+            for field in ('response', 'answer', 'text', 'content', 'message'):
+                if field in result:
+                    return result[field]
+            # If no standard field, return the entire response as string
+            return str(result)
+        elif isinstance(result, str):
+            return result
+        else:
+            return str(result)
+    
     def _generate_fallback_response(self, query: str) -> str:
         """
         Generate fallback response when RAG endpoint is unavailable
@@ -121,7 +367,8 @@ class RAGService:
         ]
         
         import random
-        return random.choice(fallback_responses)
+        RAG_FALLBACKS.inc()
+        return FallbackResponse(random.choice(fallback_responses))
     
     def add_document(self, content: str, metadata: Dict[str, Any] = None) -> str:
         """
@@ -132,53 +379,70 @@ class RAGService:
             return "error"
         
         try:
-            # Prepare payload for document addition
-            payload = {
-                "action": "add_document",
-                "content": content,
-                "metadata": metadata or {"type": "user_added", "tags": []}
-            }
-            
-            headers = {
-                "Content-Type": "application/json"
-            }
-            
-            if self.rag_api_key:
-                headers["Authorization"] = f"Bearer {self.rag_api_key}"
-            
-            response = requests.post(
-                self.rag_endpoint,
-                json=payload,
-                headers=headers,
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                doc_id = result.get('document_id', 'unknown')
-                print(f"✅ Document added successfully: {doc_id}")
-                return doc_id
-            else:
-                print(f"❌ Failed to add document: {response.status_code}")
-                return "error"
-                
+            doc_id = self.upload_document(content, metadata)
+            print(f"✅ Document added successfully: {doc_id}")
+            return doc_id
+        
+        except DocumentUploadError as e:
+            print(f"❌ Failed to add document: {e.status_code}")
+            return "error"
         except Exception as e:
             print(f"❌ Error adding document: {e}")
             return "error"
     
-    def get_conversation_history(self, limit: int = 10) -> List[Dict[str, Any]]:
+    def upload_document(self, content: str, metadata: Dict[str, Any] = None, timeout: float = 30) -> str:
+        """
+        Upload one document to the RAG endpoint and return its document ID.
+        Raises ``DocumentUploadError`` on a non-200 answer and lets network
+        errors propagate, so bulk ingestion can decide what to retry.
+        """
+        if not self.rag_endpoint:
+            raise DependencyNotConfigured("RAG_ENDPOINT_URL not set")
+        
+        # Prepare payload for document addition
+        payload = {
+            "action": "add_document",
+            "content": content,
+            "metadata": metadata or {"type": "user_added", "tags": []}
+        }
+        
+        headers = {
+            "Content-Type": "application/json"
+        }
+        
+        if self.rag_api_key:
+            headers["Authorization"] = f"Bearer {self.rag_api_key}"
+        
+        response = self.http.post(
+            self.rag_endpoint,
+            json=payload,
+            headers=headers,
+            timeout=timeout
+        )
+        
+        if response.status_code != 200:
+            raise DocumentUploadError(response.status_code, response.text[:200])
+        try:
+            return response.json().get('document_id', 'unknown')
+        except (json.JSONDecodeError, AttributeError):
+            return 'unknown'
+    
+    def get_conversation_history(self, limit: int = 10, session_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """
-        Get recent conversation history
+        Get recent conversation history for a session
         """
-        return self.conversation_history[-limit:] if self.conversation_history else []
+        return self.conversation_history.get(session_id or DEFAULT_SESSION, limit=limit)
     
-    def clear_conversation_history(self):
+    def clear_conversation_history(self, session_id: Optional[str] = None):
         """
-        Clear conversation history
+        Clear conversation history for a session, or for every session if none is given
         """
-        self.conversation_history = []
+        if session_id is None:
+            self.conversation_history.clear_all()
+        else:
+            self.conversation_history.clear(session_id)
     
-    def test_rag_endpoint(self) -> bool:
+    def test_rag_endpoint(self, timeout: float = 10) -> bool:
         """
         Test if RAG endpoint is working
         """
@@ -186,29 +450,46 @@ class RAGService:
             return False
         
         try:
-            test_payload = {
-                "query": "test",
-                "conversation_history": [],
-                "max_tokens": 10,
-                "temperature": 0.1
-            }
-            
-            headers = {
-                "Content-Type": "application/json"
-            }
-            
-            if self.rag_api_key:
-                headers["Authorization"] = f"Bearer {self.rag_api_key}"
-            
-            response = requests.post(
-                self.rag_endpoint,
-                json=test_payload,
-                headers=headers,
-                timeout=10
-            )
-            
-            return response.status_code == 200
+            return self._probe_endpoint(timeout).status_code == 200
             
         except Exception as e:
             print(f"❌ RAG endpoint test failed: {e}")
-            return False 
\ No newline at end of file
+            return False
+    
+    def check_health(self, timeout: float = 5) -> Dict[str, Any]:
+        """
+        Health check for the background prober: details when the endpoint
+        answers 200, otherwise raises
+        """
+        if not self.rag_endpoint:
+            raise DependencyNotConfigured("RAG_ENDPOINT_URL not set; using fallback responses")
+        
+        response = self._probe_endpoint(timeout)
+        if response.status_code != 200:
+            raise Exception(f"RAG endpoint returned {response.status_code}")
+        return {"url": self.rag_endpoint}
+    
+    def _probe_endpoint(self, timeout: float):
+        """
+        Send a minimal test query to the RAG endpoint
+        """
+        test_payload = {
+            "query": "test",
+            "conversation_history": [],
+            "max_tokens": 10,
+            "temperature": 0.1
+        }
+        
+        headers = {
+            "Content-Type": "application/json"
+        }
+        
+        if self.rag_api_key:
+            headers["Authorization"] = f"Bearer {self.rag_api_key}"
+        
+        return self.http.post(
+            self.rag_endpoint,
+            json=test_payload,
+            headers=headers,
+            timeout=timeout
+        ) 
\ No newline at end of file
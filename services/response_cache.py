@@ -0,0 +1,208 @@
+import os
+import re
+import time
+import hashlib
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    return _WHITESPACE.sub(" ", _PUNCTUATION.sub(" ", query.lower())).strip()
+
+
+def history_fingerprint(history: Optional[List[Dict[str, Any]]]) -> str:
+    """Short stable hash of the role/content pairs of a history slice"""
+    if not history:
+        return ""
+    digest = hashlib.sha1()
+    for message in history:
+        digest.update(message.get("role", "").encode("utf-8"))
+        digest.update(b"\x00")
+        digest.update(normalize_query(message.get("content", "")).encode("utf-8"))
+        digest.update(b"\x01")
+    return digest.hexdigest()[:16]
+
+
+class ResponseCache:
+    """
+    LRU + TTL cache for RAG answers with an optional SQLite disk tier.
+
+    Configuration (environment):
+    - ``RAG_CACHE_ENABLED``: turn the cache on/off (default true)
+    - ``RAG_CACHE_MAX_ENTRIES``: in-memory entries (default 512)
+    - ``RAG_CACHE_TTL``: seconds an answer stays valid (default 3600)
+    - ``RAG_CACHE_KEY_HISTORY``: include a fingerprint of the session history
+      in the key (default false)
+    - ``RAG_CACHE_PATH``: SQLite file for the disk tier (disabled when unset)
+    - ``RAG_CACHE_DISK_MAX_ENTRIES``: rows kept in the disk tier (default 10000);
+      expired and surplus rows (oldest first) are deleted every
+      ``RAG_CACHE_DISK_SWEEP_SECONDS`` (default 60) on the next write
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[float] = None,
+                 key_history: Optional[bool] = None, disk_path: Optional[str] = None,
+                 enabled: Optional[bool] = None, disk_max_entries: Optional[int] = None):
+        self.enabled = enabled if enabled is not None else os.getenv('RAG_CACHE_ENABLED', 'true').lower() == 'true'
+        self.max_entries = max_entries or int(os.getenv('RAG_CACHE_MAX_ENTRIES', 512))
+        self.ttl = ttl or float(os.getenv('RAG_CACHE_TTL', 3600))
+        self.key_history = key_history if key_history is not None else os.getenv('RAG_CACHE_KEY_HISTORY', 'false').lower() == 'true'
+        self.disk_path = disk_path if disk_path is not None else os.getenv('RAG_CACHE_PATH')
+        self.disk_max_entries = disk_max_entries or int(os.getenv('RAG_CACHE_DISK_MAX_ENTRIES', 10000))
+        self.disk_sweep_interval = float(os.getenv('RAG_CACHE_DISK_SWEEP_SECONDS', 60))
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        # SQLite calls take their own lock so memory hits never wait on disk I/O
+        self._db_lock = threading.Lock()
+        self._db = None
+        self._last_sweep = 0.0
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+        self.stores = 0
+        self.disk_evictions = 0
+
+        if self.enabled and self.disk_path:
+            self._open_disk()
+
+    def make_key(self, query: str, history: Optional[List[Dict[str, Any]]] = None) -> str:
+        key = normalize_query(query)
+        if self.key_history:
+            key = f"{key}|{history_fingerprint(history)}"
+        return key
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                response, created = entry
+                if now - created <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return response
+                del self._entries[key]
+                self.expired += 1
+
+        row = None
+        if self._db is not None:
+            with self._db_lock:
+                try:
+                    row = self._db.execute(
+                        "SELECT response, created FROM rag_cache WHERE key = ? AND created >= ?",
+                        (key, now - self.ttl)
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    logger.warning(f"RAG cache disk read failed: {e}")
+
+        with self._lock:
+            if row is not None:
+                response, created = row
+                self._store_memory(key, response, created)
+                self.disk_hits += 1
+                return response
+            self.misses += 1
+            return None
+
+    def put(self, key: str, response: str):
+        if not self.enabled or not isinstance(response, str) or not response:
+            return
+        created = time.time()
+        with self._lock:
+            self._store_memory(key, response, created)
+            self.stores += 1
+        if self._db is None:
+            return
+        with self._db_lock:
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO rag_cache (key, response, created) VALUES (?, ?, ?)",
+                    (key, response, created)
+                )
+                if created - self._last_sweep >= self.disk_sweep_interval:
+                    self._sweep_disk(created)
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"RAG cache disk write failed: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM rag_cache")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "disk_tier": bool(self._db is not None),
+                "disk_max_entries": self.disk_max_entries,
+                "disk_evictions": self.disk_evictions,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expired": self.expired,
+                "stores": self.stores,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0
+            }
+
+    def _store_memory(self, key: str, response: str, created: float):
+        self._entries[key] = (response, created)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _sweep_disk(self, now: float):
+        """Delete expired rows, then the oldest rows beyond ``disk_max_entries`` (caller holds ``_db_lock``)"""
+        self._last_sweep = now
+        removed = self._db.execute("DELETE FROM rag_cache WHERE created < ?", (now - self.ttl,)).rowcount
+        removed += self._db.execute(
+            "DELETE FROM rag_cache WHERE key IN "
+            "(SELECT key FROM rag_cache ORDER BY created DESC LIMIT -1 OFFSET ?)",
+            (self.disk_max_entries,)
+        ).rowcount
+        if removed:
+            self.disk_evictions += removed
+            logger.debug(f"RAG cache disk tier: removed {removed} expired or surplus rows")
+
+    def _open_disk(self):
+        try:
+            directory = os.path.dirname(self.disk_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.disk_path, check_same_thread=False)
+            # WAL keeps commits cheap and lets other processes read while one writes
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS rag_cache (key TEXT PRIMARY KEY, response TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS rag_cache_created ON rag_cache (created)")
+            self._sweep_disk(time.time())
+            self._db.commit()
+            logger.info(f"RAG response cache disk tier: {self.disk_path}")
+        except sqlite3.Error as e:
+            logger.warning(f"RAG cache disk tier unavailable ({self.disk_path}): {e}")
+            self._db = None
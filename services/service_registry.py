@@ -0,0 +1,141 @@
+import os
+import time
+import logging
+import importlib
+import threading
+from typing import Any, Callable, Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+def import_string(path: str) -> Any:
+    """Resolve ``"package.module:attribute"``, importing the module"""
+    module_name, _, attribute = path.partition(':')
+    module = importlib.import_module(module_name)
+    return getattr(module, attribute) if attribute else module
+
+
+class LazyService:
+    """
+    Stand-in for a registered service: the first attribute access builds the
+    service (or waits for the warmup thread to finish building it)
+    """
+
+    __slots__ = ("_registry", "_name")
+
+    def __init__(self, registry: "ServiceRegistry", name: str):
+        object.__setattr__(self, "_registry", registry)
+        object.__setattr__(self, "_name", name)
+
+    def __getattr__(self, attribute):
+        return getattr(self._registry.get(self._name), attribute)
+
+    def __setattr__(self, attribute, value):
+        setattr(self._registry.get(self._name), attribute, value)
+
+    def __repr__(self):
+        state = "ready" if self._registry.is_ready(self._name) else "not initialized"
+        return f"<LazyService {self._name} ({state})>"
+
+
+class ServiceRegistry:
+    """
+    Named services that are built on first use instead of at import.
+
+    A factory is a callable or a ``"module:Class"`` string; with a string,
+    the module (and the SDK it wraps) is only imported when the service is
+    built. Each service is built once, under its own lock, and the time it
+    took is recorded. ``warmup`` builds every service on a background
+    thread so the first request rarely pays for it, while the server starts
+    accepting connections right away. A service whose build failed is
+    retried on its next use.
+
+    Configuration (environment):
+    - ``SERVICE_WARMUP``: build services on a background thread at startup
+      (default true); false builds each one on first use
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, tuple] = {}
+        self._instances: Dict[str, Any] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.init_seconds: Dict[str, float] = {}
+        self.init_threads: Dict[str, str] = {}
+        self.errors: Dict[str, str] = {}
+        self.warmup_enabled = os.getenv('SERVICE_WARMUP', 'true').lower() == 'true'
+        self._warmup_thread: Optional[threading.Thread] = None
+
+    def register(self, name: str, factory: Union[str, Callable[..., Any]], **kwargs) -> LazyService:
+        """Register a service (``kwargs`` are passed to the factory) and return its lazy stand-in"""
+        with self._lock:
+            self._factories[name] = (factory, kwargs)
+            self._locks[name] = threading.Lock()
+        return LazyService(self, name)
+
+    def lazy(self, name: str) -> LazyService:
+        return LazyService(self, name)
+
+    def names(self) -> List[str]:
+        return list(self._factories)
+
+    def is_ready(self, name: str) -> bool:
+        return name in self._instances
+
+    def get(self, name: str) -> Any:
+        """The service instance, built now if nobody has built it yet"""
+        if name in self._instances:
+            return self._instances[name]
+        with self._locks[name]:
+            if name in self._instances:
+                return self._instances[name]
+            factory, kwargs = self._factories[name]
+            start = time.perf_counter()
+            try:
+                if isinstance(factory, str):
+                    factory = import_string(factory)
+                instance = factory(**kwargs)
+            except Exception as e:
+                self.errors[name] = f"{type(e).__name__}: {e}"
+                logger.error(f"❌ Service '{name}' failed to initialize: {e}")
+                raise
+            elapsed = time.perf_counter() - start
+            self.init_seconds[name] = elapsed
+            self.init_threads[name] = threading.current_thread().name
+            self.errors.pop(name, None)
+            self._instances[name] = instance
+            logger.info(f"🧩 Service '{name}' initialized in {elapsed * 1000:.0f} ms")
+            return instance
+
+    def warmup(self, names: Optional[List[str]] = None, background: bool = True) -> Optional[threading.Thread]:
+        """Build services in registration order, on a daemon thread unless ``background`` is false"""
+        names = names or self.names()
+
+        def run():
+            start = time.perf_counter()
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception:
+                    pass  # Logged by get(); the next use retries
+            logger.info(f"🔥 Service warmup finished in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        if not background:
+            run()
+            return None
+        if not self.warmup_enabled or self._warmup_thread is not None:
+            return self._warmup_thread
+        self._warmup_thread = threading.Thread(target=run, name="service-warmup", daemon=True)
+        self._warmup_thread.start()
+        return self._warmup_thread
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {
+                "ready": self.is_ready(name),
+                "init_ms": round(self.init_seconds[name] * 1000, 1) if name in self.init_seconds else None,
+                "thread": self.init_threads.get(name),
+                "error": self.errors.get(name)
+            }
+            for name in self._factories
+        }
@@ -0,0 +1,139 @@
+import os
+import uuid
+import atexit
+import pickle
+import socket
+import logging
+import tempfile
+from typing import Any, Dict, Optional
+
+try:
+    import socketio
+except ImportError:  # Flask-SocketIO pulls it in; only the queue classes need it here
+    socketio = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHANNEL = 'flask-socketio'
+LOCAL_SCHEME = 'local://'
+# Largest datagram a Unix socket accepts without raising net.core.wmem_max
+LOCAL_MAX_MESSAGE = 208 * 1024
+
+
+def message_queue_url() -> Optional[str]:
+    return os.getenv('SOCKETIO_MESSAGE_QUEUE') or None
+
+
+def socketio_options(write_only: bool = False) -> Dict[str, Any]:
+    """
+    Keyword arguments for ``SocketIO(app, ...)`` that let several server
+    processes share one set of clients: ``emit`` to a sid, room or everyone
+    is published on the message queue and delivered by whichever worker
+    holds the connection.
+
+    Configuration (environment):
+    - ``SOCKETIO_MESSAGE_QUEUE``: ``redis://host:6379/0`` (or any URL
+      Flask-SocketIO supports), or ``local://[directory]`` for workers on one
+      host without Redis (development and load tests); unset keeps the
+      single-process in-memory manager
+    - ``SOCKETIO_CHANNEL``: queue channel name (default flask-socketio)
+    - ``SOCKETIO_TRANSPORTS``: allowed transports (default polling,websocket);
+      ``websocket`` lets a load balancer without sticky sessions spread
+      connections over workers
+    """
+    options: Dict[str, Any] = {}
+    transports = os.getenv('SOCKETIO_TRANSPORTS')
+    if transports:
+        options['transports'] = [name.strip() for name in transports.split(',') if name.strip()]
+
+    url = message_queue_url()
+    if not url:
+        return options
+    channel = os.getenv('SOCKETIO_CHANNEL', DEFAULT_CHANNEL)
+    if url.startswith(LOCAL_SCHEME):
+        options['client_manager'] = LocalQueueManager(url, channel=channel, write_only=write_only)
+    else:
+        options['message_queue'] = url
+        options['channel'] = channel
+    logger.info(f"📨 Socket.IO message queue: {url} (channel {channel})")
+    return options
+
+
+def external_emitter(url: Optional[str] = None, channel: Optional[str] = None):
+    """
+    Write-only emitter for processes that are not Socket.IO servers
+    (scripts, batch jobs, load tests): ``external_emitter().emit(event,
+    data, to=sid)`` reaches the client through the worker that holds it
+    """
+    if socketio is None:
+        raise RuntimeError("python-socketio is not installed")
+    url = url or message_queue_url()
+    channel = channel or os.getenv('SOCKETIO_CHANNEL', DEFAULT_CHANNEL)
+    if not url:
+        raise RuntimeError("SOCKETIO_MESSAGE_QUEUE is not set")
+    if url.startswith(LOCAL_SCHEME):
+        return LocalQueueManager(url, channel=channel, write_only=True)
+    if url.startswith(('redis://', 'rediss://')):
+        return socketio.RedisManager(url, channel=channel, write_only=True)
+    return socketio.KombuManager(url, channel=channel, write_only=True)
+
+
+class LocalQueueManager(socketio.PubSubManager if socketio is not None else object):
+    """
+    Socket.IO pub/sub over Unix datagram sockets, for workers on one host
+    without a Redis server.
+
+    Every listening process binds ``<pid>-<id>.sock`` in the queue directory
+    (``local:///path``, default ``$TMPDIR/socketio-<channel>``); publishing
+    sends the pickled message to every socket there, including the sender's
+    own. Sockets of processes that have exited are removed by the next
+    publisher. Messages are limited to about 200 KB, so production
+    deployments should use Redis.
+    """
+
+    name = 'local'
+
+    def __init__(self, url: str = LOCAL_SCHEME, channel: str = DEFAULT_CHANNEL, write_only: bool = False,
+                 logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.directory = url[len(LOCAL_SCHEME):] or os.path.join(tempfile.gettempdir(), f"socketio-{channel}")
+        os.makedirs(self.directory, exist_ok=True)
+        self.sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.sender.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, LOCAL_MAX_MESSAGE * 2)
+        self.path = None
+
+    def _publish(self, data):
+        payload = pickle.dumps(data)
+        if len(payload) > LOCAL_MAX_MESSAGE:
+            logger.error(f"Socket.IO message of {len(payload)} bytes is too large for the local queue")
+            return
+        for name in os.listdir(self.directory):
+            if not name.endswith('.sock'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                self.sender.sendto(payload, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Nobody is listening any more: the worker exited without cleaning up
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            except OSError as e:
+                logger.warning(f"Local Socket.IO queue could not deliver to {name}: {e}")
+
+    def _listen(self):
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        self.path = os.path.join(self.directory, f"{os.getpid()}-{uuid.uuid4().hex[:8]}.sock")
+        listener.bind(self.path)
+        atexit.register(self._unlink)
+        while True:
+            yield listener.recv(LOCAL_MAX_MESSAGE)
+
+    def _unlink(self):
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
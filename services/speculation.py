@@ -0,0 +1,269 @@
+import os
+import time
+import heapq
+import logging
+import itertools
+import threading
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from services.response_cache import normalize_query
+
+logger = logging.getLogger(__name__)
+
+
+class Speculation:
+    """One speculative RAG query started from an interim transcript"""
+
+    __slots__ = ("text", "normalized", "future", "started_at", "claimed_at", "cancelled")
+
+    def __init__(self, text: str, future: Optional[Future] = None):
+        self.text = text
+        self.normalized = normalize_query(text)
+        self.future = future
+        self.started_at = time.monotonic()
+        self.claimed_at = None
+        # Checked by the worker right before the RAG call
+        self.cancelled = False
+
+
+class DeadlineScheduler:
+    """
+    One daemon thread that runs callbacks at monotonic deadlines, shared by
+    all dispatchers instead of a timer thread per transcript event
+    """
+
+    def __init__(self, name: str = "speculation-scheduler"):
+        self.name = name
+        self._cond = threading.Condition()
+        self._heap: List[tuple] = []
+        self._order = itertools.count()
+        self._thread: Optional[threading.Thread] = None
+
+    def call_at(self, deadline: float, callback: Callable[[], None]):
+        with self._cond:
+            heapq.heappush(self._heap, (deadline, next(self._order), callback))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._heap or self._heap[0][0] > time.monotonic():
+                    self._cond.wait(self._heap[0][0] - time.monotonic() if self._heap else None)
+                _, _, callback = heapq.heappop(self._heap)
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Speculation scheduler callback failed: {e}")
+
+
+_scheduler = DeadlineScheduler()
+
+
+class SpeculationStats:
+    """Process-wide speculation counters shared by all dispatchers"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = 0
+        self.hits = 0
+        self.misses = 0
+        self.unspeculated = 0
+        # Dropped before their RAG call started
+        self.cancelled = 0
+        # Dropped while their RAG call was running: the call completes and its answer is discarded
+        self.abandoned = 0
+        # Not started because the session already had too many calls running
+        self.throttled = 0
+        self.saved_total = 0.0
+
+    def record(self, field: str, saved: float = 0.0):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+            self.saved_total += saved
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            utterances = self.hits + self.misses + self.unspeculated
+            return {
+                "started": self.started,
+                "hits": self.hits,
+                "misses": self.misses,
+                "unspeculated": self.unspeculated,
+                "cancelled": self.cancelled,
+                "abandoned": self.abandoned,
+                "throttled": self.throttled,
+                "hit_rate": round(self.hits / utterances, 4) if utterances else 0.0,
+                "latency_saved_total_ms": round(self.saved_total * 1000, 1),
+                "latency_saved_avg_ms": round(self.saved_total / self.hits * 1000, 1) if self.hits else 0.0
+            }
+
+
+class SpeculativeDispatcher:
+    """
+    Starts a RAG query early once the live transcript has stopped changing.
+
+    Interim and final transcript events update the candidate utterance (final
+    segments so far plus the current interim hypothesis) and push its
+    deadline back; when the candidate has been unchanged for ``stable_ms`` a
+    speculative query is submitted. When the utterance is endpointed,
+    ``claim`` returns the speculation if its text matches the final
+    utterance after normalization; otherwise the speculation is discarded
+    and the caller issues a normal query.
+
+    A discarded query that has not started is cancelled. One already running
+    cannot be interrupted (the RAG call blocks its worker), so it is counted
+    as abandoned, and at most ``max_inflight`` calls run per session.
+
+    Configuration (environment):
+    - ``SPECULATION_STABLE_MS``: how long the transcript must be unchanged (default 400)
+    - ``SPECULATION_MAX_INFLIGHT``: speculative RAG calls running at once per session (default 2)
+    """
+
+    def __init__(self, query_fn: Callable[[str], str], executor: ThreadPoolExecutor,
+                 stats: SpeculationStats, stable_ms: Optional[float] = None,
+                 max_inflight: Optional[int] = None, scheduler: Optional[DeadlineScheduler] = None):
+        self.query_fn = query_fn
+        self.executor = executor
+        self.stats = stats
+        self.stable_ms = stable_ms or float(os.getenv('SPECULATION_STABLE_MS', 400))
+        self.max_inflight = max_inflight or int(os.getenv('SPECULATION_MAX_INFLIGHT', 2))
+        self.scheduler = scheduler or _scheduler
+
+        self._lock = threading.Lock()
+        self._finals: List[str] = []
+        self._interim = ""
+        # When the candidate becomes stable; None while there is nothing to speculate on
+        self._deadline: Optional[float] = None
+        self._scheduled = False
+        self._inflight = 0
+        self._speculation: Optional[Speculation] = None
+        self._closed = False
+
+    def on_interim(self, text: str):
+        with self._lock:
+            self._interim = text
+            self._reset_deadline()
+
+    def on_final(self, text: str):
+        with self._lock:
+            self._finals.append(text)
+            self._interim = ""
+            self._reset_deadline()
+
+    def claim(self, utterance: str) -> Optional[Speculation]:
+        """
+        Called at endpoint: return a matching speculation (whose future holds
+        the answer) or None, and reset for the next utterance
+        """
+        with self._lock:
+            self._deadline = None
+            speculation = self._speculation
+            self._speculation = None
+            self._finals = []
+            self._interim = ""
+
+        if speculation is None:
+            self.stats.record('unspeculated')
+            return None
+        if speculation.normalized != normalize_query(utterance):
+            self._discard(speculation)
+            self.stats.record('misses')
+            logger.info(f"🔮 Speculation missed: '{speculation.text}' != '{utterance}'")
+            return None
+
+        speculation.claimed_at = time.monotonic()
+        return speculation
+
+    def resolve(self, speculation: Speculation) -> str:
+        """Wait for a claimed speculation and record how much latency it saved"""
+        response, duration = speculation.future.result()
+        # Without speculation the query would have started at claim time and
+        # taken just as long
+        saved = min(duration, speculation.claimed_at - speculation.started_at)
+        self.stats.record('hits', max(saved, 0.0))
+        logger.info(f"🔮 Speculation hit, saved {saved * 1000:.0f} ms")
+        return response
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._deadline = None
+            speculation, self._speculation = self._speculation, None
+        if speculation is not None:
+            self._discard(speculation)
+
+    def _candidate(self) -> str:
+        return " ".join(self._finals + ([self._interim] if self._interim else [])).strip()
+
+    def _reset_deadline(self):
+        """Push the stability deadline back (caller holds the lock)"""
+        self._deadline = None
+        if self._closed:
+            return
+        candidate = self._candidate()
+        if not candidate:
+            return
+        # Already speculating on an equivalent text
+        if self._speculation is not None and self._speculation.normalized == normalize_query(candidate):
+            return
+        self._deadline = time.monotonic() + self.stable_ms / 1000.0
+        # One scheduler entry per dispatcher; it re-arms itself if the deadline moved
+        if not self._scheduled:
+            self._scheduled = True
+            self.scheduler.call_at(self._deadline, self._on_deadline)
+
+    def _on_deadline(self):
+        with self._lock:
+            self._scheduled = False
+            if self._closed or self._deadline is None:
+                return
+            if time.monotonic() < self._deadline:
+                self._scheduled = True
+                self.scheduler.call_at(self._deadline, self._on_deadline)
+                return
+            self._deadline = None
+            candidate = self._candidate()
+            if self._inflight >= self.max_inflight:
+                throttled = True
+            else:
+                throttled = False
+                # Transcript moved on; the old speculation can no longer match
+                replaced, self._speculation = self._speculation, Speculation(candidate)
+                self._inflight += 1
+                speculation = self._speculation
+                speculation.future = self.executor.submit(self._timed_query, speculation)
+
+        if throttled:
+            self.stats.record('throttled')
+            logger.info(f"🔮 Not speculating on '{candidate}': {self.max_inflight} calls already running")
+            return
+        # Outside the lock: a future that is already done runs the callback right here
+        speculation.future.add_done_callback(self._call_done)
+        if replaced is not None:
+            self._discard(replaced)
+        self.stats.record('started')
+        logger.info(f"🔮 Speculative RAG query: '{candidate}'")
+
+    def _call_done(self, future: Future):
+        with self._lock:
+            self._inflight -= 1
+
+    def _discard(self, speculation: Speculation):
+        """Cancel a speculation that will not be used, recording whether its RAG call still runs"""
+        speculation.cancelled = True
+        if speculation.future.cancel():
+            self.stats.record('cancelled')
+        else:
+            # Running or finished: the call cannot be recalled, its answer is thrown away
+            self.stats.record('abandoned')
+
+    def _timed_query(self, speculation: Speculation):
+        if speculation.cancelled:
+            raise CancelledError()
+        start = time.monotonic()
+        response = self.query_fn(speculation.text)
+        return response, time.monotonic() - start
@@ -0,0 +1,200 @@
+import os
+import glob
+import gzip
+import json
+import hashlib
+import logging
+import mimetypes
+from typing import Any, Dict, List, Optional
+
+try:
+    import brotli
+except ImportError:  # Brotli variants are skipped; gzip is always built
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+
+# Files under static/ that get fingerprinted; audio and the three.js source tree are left alone
+INCLUDE = ("*.js", "*.css", "js/*.js", "models/*", "models/lod/*.vrm")
+# ES module entry points whose relative imports must resolve next to the original file
+DEFAULT_EXCLUDE = ("js/main.js",)
+COMPRESSIBLE = {".js", ".css", ".json", ".svg", ".vrm", ".glb", ".gltf", ".wasm"}
+# A variant is only kept if it is at least this much smaller than the original
+MIN_SAVING = 0.05
+
+MIMETYPES = {
+    ".vrm": "model/gltf-binary",
+    ".glb": "model/gltf-binary",
+    ".gltf": "model/gltf+json",
+    ".wasm": "application/wasm"
+}
+
+# Preferred order when a client accepts several encodings
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def fingerprint(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def fingerprinted_name(filename: str, digest: str) -> str:
+    """js/three.min.js -> js/three.min.<first 10 hex chars>.js"""
+    stem, extension = os.path.splitext(filename)
+    return f"{stem}.{digest[:10]}{extension}"
+
+
+def build_assets(static_dir: str, out_dir: str, exclude: Optional[List[str]] = None,
+                 gzip_level: int = 9, brotli_quality: int = 11) -> Dict[str, Any]:
+    """
+    Copy static assets to ``out_dir`` under content-hashed names, write gzip
+    and Brotli variants next to them, and write the manifest. Files whose
+    hash is unchanged are not recompressed; stale outputs are removed.
+    """
+    exclude = list(DEFAULT_EXCLUDE if exclude is None else exclude)
+    previous = AssetManifest(out_dir).assets
+    assets: Dict[str, Dict[str, Any]] = {}
+    keep = {MANIFEST_NAME}
+
+    sources = sorted({os.path.relpath(path, static_dir).replace(os.sep, "/")
+                      for pattern in INCLUDE for path in glob.glob(os.path.join(static_dir, pattern))
+                      if os.path.isfile(path)})
+    for filename in sources:
+        if filename in exclude:
+            continue
+        with open(os.path.join(static_dir, filename), "rb") as f:
+            data = f.read()
+        digest = fingerprint(data)
+        path = fingerprinted_name(filename, digest)
+        target = os.path.join(out_dir, path)
+        keep.add(path)
+
+        entry = previous.get(filename)
+        if entry and entry["sha256"] == digest and os.path.exists(target) and \
+                all(os.path.exists(target + ext) for ext in _variant_exts(entry)):
+            keep.update(path + ext for ext in _variant_exts(entry))
+            assets[filename] = entry
+            continue
+
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        _write(target, data)
+        encodings = {}
+        if os.path.splitext(filename)[1].lower() in COMPRESSIBLE:
+            variants = [("gzip", ".gz", gzip.compress(data, gzip_level, mtime=0))]
+            if brotli is not None:
+                variants.insert(0, ("br", ".br", brotli.compress(data, quality=brotli_quality)))
+            for encoding, ext, compressed in variants:
+                if len(compressed) <= len(data) * (1 - MIN_SAVING):
+                    _write(target + ext, compressed)
+                    keep.add(path + ext)
+                    encodings[encoding] = len(compressed)
+        assets[filename] = {"path": path, "sha256": digest, "size": len(data), "encodings": encodings}
+        logger.info(f"Built {filename} -> {path} {encodings}")
+
+    # Drop outputs of files that changed or disappeared
+    for root, _, files in os.walk(out_dir):
+        for name in files:
+            rel = os.path.relpath(os.path.join(root, name), out_dir).replace(os.sep, "/")
+            if rel not in keep:
+                os.unlink(os.path.join(root, name))
+
+    manifest = {"version": 1, "brotli": brotli is not None, "assets": assets}
+    _write(os.path.join(out_dir, MANIFEST_NAME), json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8"))
+    return manifest
+
+
+def _variant_exts(entry: Dict[str, Any]) -> List[str]:
+    return [ext for encoding, ext in ENCODINGS if encoding in entry.get("encodings", {})]
+
+
+def _write(path: str, data: bytes):
+    temp_path = path + ".part"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """``"gzip, br;q=0.8, *;q=0"`` -> ``{"gzip": 1.0, "br": 0.8, "*": 0.0}``"""
+    accepted = {}
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+class ResolvedAsset:
+    """The file to send for one fingerprinted URL and Accept-Encoding"""
+
+    __slots__ = ("path", "mimetype", "encoding", "etag")
+
+    def __init__(self, path: str, mimetype: str, encoding: Optional[str], etag: str):
+        self.path = path
+        self.mimetype = mimetype
+        self.encoding = encoding
+        self.etag = etag
+
+
+class AssetManifest:
+    """
+    Maps logical static filenames (``js/three.min.js``) to fingerprinted URLs
+    under ``url_prefix`` and picks the precompressed variant a client
+    accepts. Without a built manifest, ``url`` returns None and callers fall
+    back to the plain static URL.
+
+    Configuration (environment):
+    - ``ASSET_DIST_DIR``: build output directory (default static/dist)
+    """
+
+    def __init__(self, dist_dir: Optional[str] = None, url_prefix: str = "/assets"):
+        self.dist_dir = dist_dir or os.getenv('ASSET_DIST_DIR', os.path.join('static', 'dist'))
+        self.url_prefix = url_prefix.rstrip("/")
+        self.assets: Dict[str, Dict[str, Any]] = {}
+        self._by_path: Dict[str, Dict[str, Any]] = {}
+        self.load()
+
+    def load(self):
+        path = os.path.join(self.dist_dir, MANIFEST_NAME)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable asset manifest {path}: {e}")
+            return
+        self.assets = manifest.get("assets", {})
+        self._by_path = {entry["path"]: entry for entry in self.assets.values()}
+        logger.info(f"Asset manifest: {len(self.assets)} fingerprinted files")
+
+    def url(self, filename: str) -> Optional[str]:
+        entry = self.assets.get(filename)
+        return f"{self.url_prefix}/{entry['path']}" if entry else None
+
+    def resolve(self, path: str, accept_encoding: str = "") -> Optional[ResolvedAsset]:
+        entry = self._by_path.get(path)
+        if entry is None:
+            return None
+        extension = os.path.splitext(path)[1].lower()
+        mimetype = MIMETYPES.get(extension) or mimetypes.guess_type(path)[0] or "application/octet-stream"
+        full_path = os.path.join(self.dist_dir, path)
+
+        accepted = parse_accept_encoding(accept_encoding)
+        wildcard = accepted.get("*", 0.0)
+        for encoding, ext in ENCODINGS:
+            if encoding in entry["encodings"] and accepted.get(encoding, wildcard) > 0:
+                return ResolvedAsset(full_path + ext, mimetype, encoding, f"{entry['sha256'][:16]}-{encoding}")
+        return ResolvedAsset(full_path, mimetype, None, entry["sha256"][:16])
+
@@ -0,0 +1,121 @@
+import os
+import re
+import queue
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from services.audio_store import audio_url
+
+logger = logging.getLogger(__name__)
+
+# A sentence ends at ., ! or ? (optionally followed by closing quotes or
+# brackets) and must be followed by whitespace before we cut it
+SENTENCE_END = re.compile(r'[.!?]+["\')\]]*\s+')
+
+
+class SentenceSegmenter:
+    """
+    Incrementally cut streamed text into sentences.
+
+    Fragments shorter than ``min_chars`` are held back and merged with the
+    next sentence, so abbreviations and one-word replies don't become their
+    own TTS request.
+    """
+
+    def __init__(self, min_chars: int = 20):
+        self.min_chars = min_chars
+        self.buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        """Add streamed text and return any sentences that are now complete"""
+        self.buffer += text
+        sentences = []
+        start = 0
+        for match in SENTENCE_END.finditer(self.buffer):
+            candidate = self.buffer[start:match.end()].strip()
+            if len(candidate) < self.min_chars:
+                continue
+            sentences.append(candidate)
+            start = match.end()
+        self.buffer = self.buffer[start:]
+        return sentences
+
+    def flush(self) -> List[str]:
+        """Return whatever text is left once the stream has ended"""
+        rest = self.buffer.strip()
+        self.buffer = ""
+        return [rest] if rest else []
+
+
+class StreamingChatPipeline:
+    """
+    Stream a RAG answer into per-sentence TTS chunks.
+
+    The RAG stream is consumed on a background thread; each complete sentence
+    is handed to a small TTS worker pool as soon as it is cut, while the caller
+    iterates over the finished chunks strictly in sentence order.
+    """
+
+    def __init__(self, rag_service, murf_service, vrm_builder: Callable[[str], Any],
+                 max_workers: Optional[int] = None, min_sentence_chars: Optional[int] = None):
+        self.rag_service = rag_service
+        self.murf_service = murf_service
+        self.vrm_builder = vrm_builder
+        self.min_sentence_chars = min_sentence_chars or int(os.getenv('STREAM_MIN_SENTENCE_CHARS', 20))
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or int(os.getenv('STREAM_TTS_WORKERS', 3)),
+            thread_name_prefix='stream-tts'
+        )
+
+    def run(self, query: str, session_id: Optional[str] = None,
+            text: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield ``{"index", "text", "audioId", "audio", "vrmData"}`` dicts in
+        sentence order. When ``text`` is given (an answer obtained ahead of
+        time) it is segmented instead of streaming a new RAG answer.
+        """
+        pending = queue.Queue()
+        done = object()
+
+        def produce():
+            segmenter = SentenceSegmenter(self.min_sentence_chars)
+            index = 0
+            try:
+                parts = [text] if text is not None else self.rag_service.stream_query(query, session_id)
+                for part in parts:
+                    for sentence in segmenter.feed(part):
+                        pending.put(self.executor.submit(self._synthesize, index, sentence))
+                        index += 1
+                for sentence in segmenter.flush():
+                    pending.put(self.executor.submit(self._synthesize, index, sentence))
+                    index += 1
+            except Exception as e:
+                logger.error(f"Streaming RAG pipeline error: {e}")
+                pending.put(e)
+            finally:
+                pending.put(done)
+
+        threading.Thread(target=produce, name='stream-rag', daemon=True).start()
+
+        while True:
+            item = pending.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item.result()
+
+    def _synthesize(self, index: int, sentence: str) -> Dict[str, Any]:
+        """Convert one sentence to speech and VRM state"""
+        audio_id = self.murf_service.synthesize_speech(sentence)
+        vrm_data = self.vrm_builder(sentence)
+        # Analysis started when the clip was stored; wait here, off the request thread
+        vrm_data.lip_sync = self.murf_service.lipsync.track(audio_id)
+        return {
+            "index": index,
+            "text": sentence,
+            "audioId": audio_id,
+            "audio": audio_url(audio_id),
+            "vrmData": vrm_data.to_dict()
+        }
@@ -0,0 +1,122 @@
+import os
+import json
+import time
+import random
+import logging
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+# Structured per-request records go to their own logger so they can be routed
+# (or silenced) independently of the service loggers
+record_logger = logging.getLogger("stt")
+
+STT_LOG_MODES = ("verbose", "structured")
+
+
+class LazyJSON:
+    """
+    Log argument that defers ``json.dumps`` until the record is actually
+    formatted, so payloads below the active log level cost nothing
+    """
+
+    __slots__ = ("payload", "indent")
+
+    def __init__(self, payload: Any, indent: Optional[int] = 2):
+        self.payload = payload
+        self.indent = indent
+
+    def __str__(self) -> str:
+        return json.dumps(self.payload, indent=self.indent, default=str)
+
+
+class STTRequestLog:
+    """
+    Stage timings and fields for one speech-to-text request.
+
+    In structured mode ``finish`` emits everything as a single compact JSON
+    line on the ``stt`` logger; in verbose mode the banner logs are written
+    instead and the record is dropped.
+    """
+
+    def __init__(self, owner: "STTLogger", route: str, **fields):
+        self.owner = owner
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.fields: Dict[str, Any] = {"route": route, **fields}
+        self.finished = False
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a block as one stage (repeated stages accumulate)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage(name, time.perf_counter() - start)
+
+    def add_stage(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds * 1000
+
+    def update(self, **fields):
+        self.fields.update(fields)
+
+    def fail(self, error: BaseException):
+        self.fields["error"] = f"{type(error).__name__}: {error}"
+
+    def finish(self, status: Optional[str] = None):
+        """
+        Emit the record once (later calls are ignored). The status defaults to
+        ``error`` if a failure was recorded, otherwise ``ok``.
+        """
+        if self.finished:
+            return
+        self.finished = True
+        if not self.owner.structured or not record_logger.isEnabledFor(logging.INFO):
+            return
+
+        status = status or ("error" if "error" in self.fields else "ok")
+        record = {"event": "stt", "status": status, **self.fields}
+        record["total_ms"] = round((time.perf_counter() - self.started) * 1000, 2)
+        record["stages"] = {name: round(ms, 2) for name, ms in self.stages.items()}
+        record_logger.info(json.dumps(record, separators=(",", ":"), default=str))
+
+
+class STTLogger:
+    """
+    Logging policy for the speech-to-text path.
+
+    Configuration (environment):
+    - ``STT_LOG_MODE``: ``verbose`` for the multi-line request/response
+      banners, or ``structured`` for one compact JSON record per request
+      (default verbose)
+    - ``STT_LOG_DUMP_SAMPLE_RATE``: fraction of Deepgram responses whose full
+      JSON is dumped; dumps are only built when DEBUG is enabled (default 1.0)
+    """
+
+    def __init__(self, mode: Optional[str] = None, dump_sample_rate: Optional[float] = None):
+        mode = (mode or os.getenv('STT_LOG_MODE', 'verbose')).lower()
+        if mode not in STT_LOG_MODES:
+            raise ValueError(f"STT_LOG_MODE must be one of {', '.join(STT_LOG_MODES)}, got '{mode}'")
+        self.mode = mode
+        if dump_sample_rate is None:
+            dump_sample_rate = float(os.getenv('STT_LOG_DUMP_SAMPLE_RATE', 1.0))
+        self.dump_sample_rate = min(max(dump_sample_rate, 0.0), 1.0)
+
+    @property
+    def verbose(self) -> bool:
+        return self.mode == "verbose"
+
+    @property
+    def structured(self) -> bool:
+        return self.mode == "structured"
+
+    def request(self, route: str, **fields) -> STTRequestLog:
+        return STTRequestLog(self, route, **fields)
+
+    def dump_response(self, log: logging.Logger, response: Any, title: str = "Full Response Structure"):
+        """Dump a full response at DEBUG, subject to sampling"""
+        if not log.isEnabledFor(logging.DEBUG):
+            return
+        if self.dump_sample_rate < 1.0 and random.random() >= self.dump_sample_rate:
+            return
+        log.debug("%s:\n%s", title, LazyJSON(response))
@@ -0,0 +1,410 @@
+import os
+import math
+import time
+import random
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from services.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+# Providers report failures as text (the UI shows it); the router treats these as errors
+ERROR_PREFIX = "Error transcribing audio"
+
+STT_PROVIDER_REQUESTS = get_metrics().counter(
+    "vrmchat_stt_provider_requests_total",
+    "Speech-to-text attempts by provider and outcome (win, lost, error, cancelled)",
+    ("provider", "outcome")
+)
+
+
+class STTProviderError(Exception):
+    """A provider answered with an error instead of a transcript"""
+
+
+class STTProvider(ABC):
+    """
+    One speech-to-text backend behind the router, with its own circuit
+    breaker and a rolling window of latencies and outcomes.
+
+    Subclasses implement ``is_configured`` and ``start``, which begins a
+    transcription and returns a future for the transcript (raising
+    ``STTProviderError`` for provider errors).
+    """
+
+    name = "provider"
+
+    def __init__(self, window: int = 100, ewma_alpha: float = 0.2, error_window: float = 60.0,
+                 min_outcomes: int = 5):
+        self.breaker = CircuitBreaker(f"stt_{self.name}")
+        self.ewma_alpha = ewma_alpha
+        self.error_window = error_window
+        self.min_outcomes = min_outcomes
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self._outcomes = deque(maxlen=window)
+        self.ewma = None
+
+        self.calls = 0
+        self.wins = 0
+        self.errors = 0
+        self.cancelled = 0
+
+    @abstractmethod
+    def is_configured(self) -> bool:
+        ...
+
+    @abstractmethod
+    def start(self, data: bytes, mimetype: str, request_log=None) -> Future:
+        ...
+
+    def healthy(self, max_error_rate: float) -> bool:
+        return self.breaker.state != "open" and self.error_rate() <= max_error_rate
+
+    def error_rate(self) -> float:
+        """Share of failed calls in the last ``error_window`` seconds (0 until ``min_outcomes`` calls)"""
+        cutoff = time.monotonic() - self.error_window
+        with self._lock:
+            recent = [ok for at, ok in self._outcomes if at >= cutoff]
+        if len(recent) < self.min_outcomes:
+            return 0.0
+        return recent.count(False) / len(recent)
+
+    def latency_percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            ordered = sorted(self._latencies)
+        if not ordered:
+            return None
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+    def record(self, seconds: float, ok: bool):
+        with self._lock:
+            self._outcomes.append((time.monotonic(), ok))
+            if ok:
+                self._latencies.append(seconds)
+                self.ewma = seconds if self.ewma is None else \
+                    self.ewma_alpha * seconds + (1 - self.ewma_alpha) * self.ewma
+            else:
+                self.errors += 1
+
+    def stats(self) -> Dict[str, Any]:
+        def ms(value):
+            return round(value * 1000, 1) if value is not None else None
+
+        with self._lock:
+            samples = len(self._latencies)
+            stats = {
+                "configured": self.is_configured(),
+                "calls": self.calls,
+                "wins": self.wins,
+                "errors": self.errors,
+                "cancelled": self.cancelled,
+                "samples": samples,
+                "ewma_ms": ms(self.ewma)
+            }
+        stats.update({
+            "error_rate": round(self.error_rate(), 3),
+            "p50_ms": ms(self.latency_percentile(0.5)),
+            "p90_ms": ms(self.latency_percentile(0.9)),
+            "p99_ms": ms(self.latency_percentile(0.99)),
+            "breaker": self.breaker.stats()["state"]
+        })
+        return stats
+
+
+class DeepgramProvider(STTProvider):
+    """Deepgram prerecorded API; runs on the service's asyncio runtime, so losing attempts are cancelled"""
+
+    name = "deepgram"
+
+    def __init__(self, service, **kwargs):
+        self.service = service
+        super().__init__(**kwargs)
+
+    def is_configured(self) -> bool:
+        return self.service.is_configured()
+
+    def start(self, data: bytes, mimetype: str, request_log=None) -> Future:
+        async def transcribe():
+            text = await self.service._transcribe(data, time.time(), mimetype, request_log)
+            if text.startswith(ERROR_PREFIX):
+                raise STTProviderError(text)
+            return text
+        return self.service.runtime.submit(transcribe())
+
+
+class WhisperProvider(STTProvider):
+    """
+    OpenAI Whisper API. Calls block a worker thread and cannot be
+    interrupted: a losing attempt is abandoned and its result discarded.
+    """
+
+    name = "whisper"
+
+    def __init__(self, service, workers: int = 4, **kwargs):
+        self.service = service
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='stt-whisper')
+        super().__init__(**kwargs)
+
+    def is_configured(self) -> bool:
+        return self.service.is_configured()
+
+    def start(self, data: bytes, mimetype: str, request_log=None) -> Future:
+        def transcribe():
+            text = self.service.transcribe_audio_bytes(data, mimetype)
+            if text.startswith(ERROR_PREFIX):
+                raise STTProviderError(text)
+            return text
+        return self.executor.submit(transcribe)
+
+
+class LocalProvider(STTProvider):
+    """Local CPU model; attempts still queued for the micro-batcher are cancelled when they lose"""
+
+    name = "local"
+
+    def __init__(self, service, **kwargs):
+        self.service = service
+        super().__init__(**kwargs)
+
+    def is_configured(self) -> bool:
+        return self.service.is_configured()
+
+    def start(self, data: bytes, mimetype: str, request_log=None) -> Future:
+        try:
+            return self.service.submit_bytes(data, mimetype)
+        except Exception as e:
+            future = Future()
+            future.set_exception(STTProviderError(f"{ERROR_PREFIX}: {e}"))
+            return future
+
+
+class STTRouter:
+    """
+    Routes each transcription to the fastest healthy provider.
+
+    A provider is healthy while its circuit is not open and its recent error
+    rate is at most ``STT_ROUTER_MAX_ERROR_RATE``; among healthy providers the
+    lowest latency EWMA wins (providers without samples are tried in
+    ``STT_PROVIDERS`` order). A small fraction of requests
+    (``STT_ROUTER_EXPLORE``) goes to another healthy provider so its latency
+    estimate stays current. If the chosen provider fails, the next one is
+    tried.
+
+    With hedging on, a second provider is started when the first has not
+    answered within its ``STT_HEDGE_PERCENTILE`` latency; the first
+    transcript wins and the other attempt is cancelled.
+
+    Configuration (environment):
+    - ``STT_PROVIDERS``: providers in preference order (default deepgram,whisper,local);
+      the ``order`` argument overrides it
+    - ``STT_ROUTER_MAX_ERROR_RATE``: error rate above which a provider is skipped (default 0.5)
+    - ``STT_ROUTER_EXPLORE``: fraction of requests sent to a non-preferred provider (default 0.05)
+    - ``STT_HEDGE_ENABLED``: start a backup request for slow calls (default false)
+    - ``STT_HEDGE_PERCENTILE``: latency percentile that triggers the hedge (default 0.9)
+    - ``STT_HEDGE_MIN_MS``: lower bound on the hedge delay (default 300)
+    - ``STT_HEDGE_INITIAL_MS``: hedge delay until 10 latencies are known (default 2000)
+    """
+
+    def __init__(self, providers: List[STTProvider], hedge: Optional[bool] = None,
+                 order: Optional[List[str]] = None):
+        if order is None:
+            order = [name.strip() for name in os.getenv('STT_PROVIDERS', 'deepgram,whisper,local').split(',')
+                     if name.strip()]
+        by_name = {provider.name: provider for provider in providers}
+        unknown = [name for name in order if name not in by_name]
+        if unknown:
+            raise ValueError(f"STT_PROVIDERS names unknown providers: {', '.join(unknown)}")
+        self.providers = [by_name[name] for name in order]
+        self.max_error_rate = float(os.getenv('STT_ROUTER_MAX_ERROR_RATE', 0.5))
+        self.explore = float(os.getenv('STT_ROUTER_EXPLORE', 0.05))
+        self.hedge = hedge if hedge is not None else os.getenv('STT_HEDGE_ENABLED', 'false').lower() == 'true'
+        self.hedge_percentile = float(os.getenv('STT_HEDGE_PERCENTILE', 0.9))
+        self.hedge_min = float(os.getenv('STT_HEDGE_MIN_MS', 300)) / 1000
+        self.hedge_initial = float(os.getenv('STT_HEDGE_INITIAL_MS', 2000)) / 1000
+
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+        # Providers may wrap lazily built services: nothing touches them until
+        # the first request, so constructing the router stays cheap
+        self._announced = False
+
+    def _announce(self):
+        if self._announced:
+            return
+        self._announced = True
+        configured = [provider.name for provider in self.providers if provider.is_configured()]
+        logger.info(f"🎙️ STT providers: {', '.join(configured) or 'none configured (mock)'}"
+                    f"{' with hedging' if self.hedge else ''}")
+
+    def configured(self) -> bool:
+        self._announce()
+        return any(provider.is_configured() for provider in self.providers)
+
+    def ranked(self) -> List[STTProvider]:
+        """Configured providers, healthy ones first, fastest first"""
+        configured = [provider for provider in self.providers if provider.is_configured()]
+        healthy = [provider for provider in configured if provider.healthy(self.max_error_rate)]
+        # Unknown latency sorts ahead of known so new providers get measured, in preference order
+        healthy.sort(key=lambda provider: provider.ewma if provider.ewma is not None else 0.0)
+        if len(healthy) > 1 and random.random() < self.explore:
+            healthy.insert(0, healthy.pop(random.randrange(1, len(healthy))))
+        return healthy + [provider for provider in configured if provider not in healthy]
+
+    def hedge_delay(self, provider: STTProvider) -> float:
+        with provider._lock:
+            samples = len(provider._latencies)
+        if samples < 10:
+            return self.hedge_initial
+        return max(self.hedge_min, provider.latency_percentile(self.hedge_percentile))
+
+    def transcribe(self, data: bytes, mimetype: str = 'audio/wav', request_log=None) -> Tuple[str, Dict[str, Any]]:
+        """
+        Transcribe with the best provider; returns the transcript and a
+        summary (``provider``, ``hedged``, ``attempts``). If every provider
+        fails, the last error is raised (``STTProviderError`` or
+        ``CircuitOpenError``).
+        """
+        self._announce()
+        with self._lock:
+            self.requests += 1
+        candidates = self.ranked()
+        if not candidates:
+            raise STTProviderError("No speech-to-text provider is configured")
+
+        running: Dict[Future, Tuple[STTProvider, float]] = {}
+        launched: List[str] = []
+        attempts: List[Dict[str, Any]] = []
+        hedged = False
+        last_error: Optional[BaseException] = None
+
+        def launch() -> bool:
+            nonlocal last_error
+            while candidates:
+                provider = candidates.pop(0)
+                try:
+                    provider.breaker.acquire()
+                except CircuitOpenError as e:
+                    attempts.append({"provider": provider.name, "outcome": "circuit_open"})
+                    last_error = e
+                    continue
+                with provider._lock:
+                    provider.calls += 1
+                started = time.monotonic()
+                try:
+                    future = provider.start(data, mimetype, request_log)
+                except Exception as e:
+                    # E.g. its executor or event loop is shut down: settle it here so the breaker slot is freed
+                    elapsed = time.monotonic() - started
+                    self._settle(provider, elapsed, "error")
+                    attempts.append({"provider": provider.name, "outcome": "error",
+                                     "ms": round(elapsed * 1000, 1), "error": str(e)[:200]})
+                    last_error = e
+                    logger.warning(f"STT provider {provider.name} could not start: {e}")
+                    continue
+                launched.append(provider.name)
+                running[future] = (provider, started)
+                return True
+            return False
+
+        if not launch():
+            raise last_error
+
+        try:
+            while running:
+                timeout = None
+                if self.hedge and not hedged and candidates and len(running) == 1:
+                    provider, started = next(iter(running.values()))
+                    timeout = max(0.0, started + self.hedge_delay(provider) - time.monotonic())
+                done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+
+                if not done:
+                    # The primary is slower than usual: race a second provider
+                    if launch():
+                        hedged = True
+                        with self._lock:
+                            self.hedged += 1
+                    continue
+
+                for future in done:
+                    provider, started = running.pop(future)
+                    elapsed = time.monotonic() - started
+                    try:
+                        text = future.result()
+                    except Exception as e:
+                        self._settle(provider, elapsed, "error")
+                        attempts.append({"provider": provider.name, "outcome": "error",
+                                         "ms": round(elapsed * 1000, 1), "error": str(e)[:200]})
+                        last_error = e
+                        logger.warning(f"STT provider {provider.name} failed after {elapsed:.2f}s: {e}")
+                        continue
+
+                    self._settle(provider, elapsed, "win")
+                    attempts.append({"provider": provider.name, "outcome": "win", "ms": round(elapsed * 1000, 1)})
+                    if hedged and provider.name != launched[0]:
+                        with self._lock:
+                            self.hedge_wins += 1
+                    if request_log is not None:
+                        request_log.update(stt_provider=provider.name, stt_hedged=hedged)
+                    return text, {"provider": provider.name, "hedged": hedged, "attempts": attempts}
+
+                if not running and launch():
+                    with self._lock:
+                        self.failovers += 1
+        finally:
+            # Cancel (or abandon) attempts that lost the race
+            for future, (provider, started) in running.items():
+                future.add_done_callback(self._loser_callback(provider, started))
+                future.cancel()
+                attempts.append({"provider": provider.name, "outcome": "cancelled"})
+
+        raise last_error or STTProviderError("All speech-to-text providers failed")
+
+    def _settle(self, provider: STTProvider, elapsed: float, outcome: str):
+        ok = outcome in ("win", "lost")
+        if ok:
+            provider.breaker.record_success(elapsed)
+        else:
+            provider.breaker.record_failure()
+        provider.record(elapsed, ok)
+        if outcome == "win":
+            with provider._lock:
+                provider.wins += 1
+        STT_PROVIDER_REQUESTS.inc(provider=provider.name, outcome=outcome)
+
+    def _loser_callback(self, provider: STTProvider, started: float):
+        def settle(future: Future):
+            if future.cancelled():
+                provider.breaker.release()
+                with provider._lock:
+                    provider.cancelled += 1
+                STT_PROVIDER_REQUESTS.inc(provider=provider.name, outcome="cancelled")
+                return
+            # An abandoned attempt that finished anyway still tells us its latency
+            self._settle(provider, time.monotonic() - started, "error" if future.exception() else "lost")
+        return settle
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            router = {
+                "requests": self.requests,
+                "hedging": self.hedge,
+                "hedged": self.hedged,
+                "hedge_wins": self.hedge_wins,
+                "failovers": self.failovers
+            }
+        return {
+            **router,
+            "providers": {provider.name: {**provider.stats(),
+                                          "hedge_delay_ms": round(self.hedge_delay(provider) * 1000, 1)}
+                          for provider in self.providers}
+        }
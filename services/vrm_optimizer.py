@@ -0,0 +1,496 @@
+import io
+import json
+import time
+import struct
+import logging
+from typing import Any, Dict, List, Optional, Set
+
+import numpy as np
+
+try:
+    import DracoPy
+except ImportError:  # Draco variants are skipped; texture and stripping passes still run
+    DracoPy = None
+
+logger = logging.getLogger(__name__)
+
+GLB_MAGIC = b"glTF"
+JSON_CHUNK = 0x4E4F534A
+BIN_CHUNK = 0x004E4942
+DRACO_EXTENSION = "KHR_draco_mesh_compression"
+
+COMPONENT_DTYPES = {5120: np.int8, 5121: np.uint8, 5122: np.int16, 5123: np.uint16, 5125: np.uint32, 5126: np.float32}
+TYPE_SIZES = {"SCALAR": 1, "VEC2": 2, "VEC3": 3, "VEC4": 4, "MAT2": 4, "MAT3": 9, "MAT4": 16}
+
+# Attributes stored inside the Draco buffer (by Draco attribute type);
+# everything else (joints, weights, morph targets) stays a plain accessor
+DRACO_ATTRIBUTE_TYPES = {0: "POSITION", 1: "NORMAL", 3: "TEXCOORD_0"}
+
+# JSON keys whose integer values are node indices, in the core spec and in
+# the VRM 0.x ("VRM") and 1.0 ("VRMC_vrm", "VRMC_springBone") extensions
+NODE_KEYS = {"node", "nodes", "children", "joints", "skeleton", "bone", "bones", "firstPersonBone", "center"}
+# Of those, the ones that only describe the hierarchy (a node referenced
+# only this way can be dropped when it has no content)
+STRUCTURAL_KEYS = {"nodes", "children"}
+
+# Rough cost model for the load-time estimate
+BUFFER_PARSE_MB_PER_S = 500.0
+
+
+class OptimizationError(Exception):
+    """Raised for models this tool cannot rewrite (e.g. external buffers)"""
+
+
+class GLBModel:
+    """
+    A binary glTF (.glb / .vrm) held as its JSON plus one bytes object per
+    bufferView, so passes can replace or add views freely; ``dumps`` lays
+    the binary chunk out again and drops views nothing references.
+    """
+
+    def __init__(self, gltf: Dict[str, Any], views: List[bytes]):
+        self.gltf = gltf
+        self.views = views
+
+    @classmethod
+    def loads(cls, data: bytes) -> "GLBModel":
+        magic, version, length = struct.unpack_from("<4sII", data, 0)
+        if magic != GLB_MAGIC or version != 2:
+            raise OptimizationError("not a glTF 2.0 binary (GLB/VRM) file")
+        offset, gltf, binary = 12, None, b""
+        while offset < length:
+            chunk_length, chunk_type = struct.unpack_from("<II", data, offset)
+            chunk = data[offset + 8:offset + 8 + chunk_length]
+            if chunk_type == JSON_CHUNK:
+                gltf = json.loads(chunk.decode("utf-8"))
+            elif chunk_type == BIN_CHUNK and not binary:
+                binary = chunk
+            offset += 8 + chunk_length
+        if gltf is None:
+            raise OptimizationError("GLB has no JSON chunk")
+
+        buffers = gltf.get("buffers", [])
+        if len(buffers) > 1 or any("uri" in buffer for buffer in buffers):
+            raise OptimizationError("only self-contained GLB files with a single buffer are supported")
+        views = []
+        for view in gltf.get("bufferViews", []):
+            start = view.get("byteOffset", 0)
+            views.append(binary[start:start + view["byteLength"]])
+        return cls(gltf, views)
+
+    @classmethod
+    def load(cls, path: str) -> "GLBModel":
+        with open(path, "rb") as f:
+            return cls.loads(f.read())
+
+    def add_view(self, data: bytes, **fields) -> int:
+        self.gltf.setdefault("bufferViews", []).append({"buffer": 0, "byteLength": len(data), **fields})
+        self.views.append(data)
+        return len(self.views) - 1
+
+    def add_accessor(self, array: Optional[np.ndarray], accessor_type: str, count: int,
+                     component_type: int, **fields) -> int:
+        """Append an accessor; ``array`` None means the data lives elsewhere (Draco)"""
+        accessor = {"componentType": component_type, "count": count, "type": accessor_type, **fields}
+        if array is not None:
+            accessor["bufferView"] = self.add_view(np.ascontiguousarray(array).tobytes())
+        self.gltf.setdefault("accessors", []).append(accessor)
+        return len(self.gltf["accessors"]) - 1
+
+    def read_accessor(self, index: int) -> np.ndarray:
+        accessor = self.gltf["accessors"][index]
+        if "sparse" in accessor:
+            raise OptimizationError(f"sparse accessor {index} is not supported")
+        dtype = np.dtype(COMPONENT_DTYPES[accessor["componentType"]])
+        components = TYPE_SIZES[accessor["type"]]
+        count = accessor["count"]
+        if "bufferView" not in accessor:
+            return np.zeros((count, components), dtype=dtype)
+        view = self.gltf["bufferViews"][accessor["bufferView"]]
+        data = self.views[accessor["bufferView"]]
+        stride = view.get("byteStride") or dtype.itemsize * components
+        array = np.ndarray((count, components), dtype=dtype, buffer=data,
+                           offset=accessor.get("byteOffset", 0), strides=(stride, dtype.itemsize))
+        return array.copy()
+
+    def dumps(self) -> bytes:
+        gltf = self.gltf
+        used = _referenced_views(gltf)
+        remap, binary = {}, bytearray()
+        views = []
+        for index, view in enumerate(gltf.get("bufferViews", [])):
+            if index not in used:
+                continue
+            binary.extend(b"\x00" * (-len(binary) % 4))
+            view = dict(view, byteOffset=len(binary), byteLength=len(self.views[index]))
+            binary.extend(self.views[index])
+            remap[index] = len(views)
+            views.append(view)
+        binary.extend(b"\x00" * (-len(binary) % 4))
+        _remap_views(gltf, remap)
+        gltf["bufferViews"] = views
+        self.views = [self.views[index] for index in sorted(remap)]
+        if views:
+            gltf["buffers"] = [{"byteLength": len(binary)}]
+
+        payload = json.dumps(gltf, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        payload += b" " * (-len(payload) % 4)
+        chunks = struct.pack("<II", len(payload), JSON_CHUNK) + payload
+        if views:
+            chunks += struct.pack("<II", len(binary), BIN_CHUNK) + bytes(binary)
+        return struct.pack("<4sII", GLB_MAGIC, 2, 12 + len(chunks)) + chunks
+
+
+def _walk_views(gltf: Dict[str, Any]):
+    """Yield (container, key) for every bufferView reference"""
+    for accessor in gltf.get("accessors", []):
+        if "bufferView" in accessor:
+            yield accessor, "bufferView"
+        sparse = accessor.get("sparse")
+        if sparse:
+            yield sparse["indices"], "bufferView"
+            yield sparse["values"], "bufferView"
+    for image in gltf.get("images", []):
+        if "bufferView" in image:
+            yield image, "bufferView"
+    for mesh in gltf.get("meshes", []):
+        for primitive in mesh.get("primitives", []):
+            draco = primitive.get("extensions", {}).get(DRACO_EXTENSION)
+            if draco:
+                yield draco, "bufferView"
+
+
+def _referenced_views(gltf: Dict[str, Any]) -> Set[int]:
+    return {container[key] for container, key in _walk_views(gltf)}
+
+
+def _remap_views(gltf: Dict[str, Any], remap: Dict[int, int]):
+    for container, key in _walk_views(gltf):
+        container[key] = remap[container[key]]
+
+
+def _walk_node_refs(value):
+    """Yield (container, key, structural) for every node reference in a JSON value"""
+    if isinstance(value, dict):
+        for key, child in value.items():
+            if key in NODE_KEYS and isinstance(child, int):
+                yield value, key, key in STRUCTURAL_KEYS
+            elif key in NODE_KEYS and isinstance(child, list) and child and all(isinstance(i, int) for i in child):
+                for position in range(len(child)):
+                    yield child, position, key in STRUCTURAL_KEYS
+            else:
+                yield from _walk_node_refs(child)
+    elif isinstance(value, list):
+        for child in value:
+            yield from _walk_node_refs(child)
+
+
+def strip_animations(model: GLBModel) -> int:
+    """Drop glTF animations (the client plays its own clips)"""
+    return len(model.gltf.pop("animations", []))
+
+
+def strip_unused_nodes(model: GLBModel) -> int:
+    """
+    Remove nodes that no scene reaches and nothing references, and empty
+    leaf nodes (no mesh, camera, skin, extensions or children) that nothing
+    but the hierarchy references, e.g. export helpers and leftover bone
+    tips. Node indices are remapped throughout the JSON, including the VRM
+    extensions.
+    """
+    gltf = model.gltf
+    nodes = gltf.get("nodes", [])
+    if not nodes:
+        return 0
+
+    referenced = set()
+    for container, key, structural in _walk_node_refs({k: v for k, v in gltf.items() if k != "nodes"}):
+        if not structural:
+            referenced.add(container[key])
+    for node in nodes:
+        for container, key, structural in _walk_node_refs(node.get("extensions", {})):
+            if not structural:
+                referenced.add(container[key])
+    # VRM 0.x uses -1 for "no node"
+    referenced = {index for index in referenced if index >= 0}
+
+    # Nodes something points at (skin joints, VRM bones, ...) are kept with
+    # their subtrees even when no scene reaches them, so every reference
+    # still has a node to be remapped to
+    reachable = set()
+    stack = [root for scene in gltf.get("scenes", []) for root in scene.get("nodes", [])]
+    stack.extend(referenced)
+    while stack:
+        index = stack.pop()
+        if index not in reachable:
+            reachable.add(index)
+            stack.extend(nodes[index].get("children", []))
+
+    keep = set(reachable)
+    changed = True
+    while changed:
+        changed = False
+        for index in list(keep):
+            node = nodes[index]
+            has_children = any(child in keep for child in node.get("children", []))
+            if has_children or index in referenced or any(k in node for k in ("mesh", "camera", "skin", "extensions")):
+                continue
+            keep.discard(index)
+            changed = True
+
+    if len(keep) == len(nodes):
+        return 0
+    remap = {old: new for new, old in enumerate(sorted(keep))}
+    gltf["nodes"] = [nodes[index] for index in sorted(keep)]
+    for node in gltf["nodes"]:
+        if "children" in node:
+            node["children"] = [remap[child] for child in node["children"] if child in remap]
+            if not node["children"]:
+                del node["children"]
+    for scene in gltf.get("scenes", []):
+        scene["nodes"] = [remap[root] for root in scene.get("nodes", []) if root in remap]
+    for container, key, structural in list(_walk_node_refs({k: v for k, v in gltf.items() if k != "nodes"})):
+        if structural:
+            continue
+        value = container[key]
+        # VRM 0.x uses -1 for "no node"
+        if value >= 0:
+            container[key] = remap[value]
+    for node in gltf["nodes"]:
+        for container, key, structural in list(_walk_node_refs(node.get("extensions", {}))):
+            if not structural and container[key] >= 0:
+                container[key] = remap[container[key]]
+    return len(nodes) - len(keep)
+
+
+def prune_accessors(model: GLBModel) -> int:
+    """Drop accessors nothing references anymore (e.g. after stripping animations)"""
+    gltf = model.gltf
+    accessors = gltf.get("accessors", [])
+    refs = []
+    for mesh in gltf.get("meshes", []):
+        for primitive in mesh.get("primitives", []):
+            refs.append((primitive, "indices"))
+            refs.extend((primitive["attributes"], name) for name in primitive["attributes"])
+            for target in primitive.get("targets", []):
+                refs.extend((target, name) for name in target)
+    for skin in gltf.get("skins", []):
+        refs.append((skin, "inverseBindMatrices"))
+    for animation in gltf.get("animations", []):
+        for sampler in animation.get("samplers", []):
+            refs.extend(((sampler, "input"), (sampler, "output")))
+    refs = [(container, key) for container, key in refs if key in container]
+
+    used = sorted({container[key] for container, key in refs})
+    if len(used) == len(accessors):
+        return 0
+    remap = {old: new for new, old in enumerate(used)}
+    for container, key in refs:
+        container[key] = remap[container[key]]
+    gltf["accessors"] = [accessors[index] for index in used]
+    return len(accessors) - len(used)
+
+
+def downscale_textures(model: GLBModel, max_size: int, jpeg_quality: Optional[int] = None) -> Dict[str, int]:
+    """
+    Downscale embedded images to at most ``max_size`` pixels per side and
+    recompress them. With ``jpeg_quality``, images without any transparent
+    pixel are re-encoded as JPEG.
+    """
+    from PIL import Image
+
+    stats = {"images": 0, "resized": 0, "to_jpeg": 0, "bytes_before": 0, "bytes_after": 0}
+    for image in model.gltf.get("images", []):
+        if "bufferView" not in image:
+            continue
+        original = model.views[image["bufferView"]]
+        stats["images"] += 1
+        stats["bytes_before"] += len(original)
+        picture = Image.open(io.BytesIO(original))
+        picture.load()
+        source_format = picture.format
+        if picture.mode not in ("RGB", "RGBA", "L"):
+            # Palette and grey+alpha images: make any transparency an explicit alpha band
+            picture = picture.convert("RGBA")
+
+        resized = max(picture.size) > max_size
+        if resized:
+            scale = max_size / max(picture.size)
+            picture = picture.resize((max(1, round(picture.width * scale)), max(1, round(picture.height * scale))),
+                                     Image.LANCZOS)
+            stats["resized"] += 1
+
+        opaque = "A" not in picture.getbands() or picture.getchannel("A").getextrema()[0] == 255
+        output = io.BytesIO()
+        if jpeg_quality and opaque:
+            picture.convert("RGB").save(output, "JPEG", quality=jpeg_quality, optimize=True)
+            mimetype = "image/jpeg"
+        elif source_format == "JPEG":
+            picture.convert("RGB").save(output, "JPEG", quality=jpeg_quality or 90, optimize=True)
+            mimetype = "image/jpeg"
+        else:
+            picture.save(output, "PNG", optimize=True)
+            mimetype = "image/png"
+
+        data = output.getvalue()
+        if resized or len(data) < len(original):
+            model.views[image["bufferView"]] = data
+            if mimetype != image.get("mimeType"):
+                stats["to_jpeg"] += mimetype == "image/jpeg"
+                image["mimeType"] = mimetype
+        stats["bytes_after"] += len(model.views[image["bufferView"]])
+    return stats
+
+
+def draco_compress(model: GLBModel, quantization_bits: int = 14, compression_level: int = 7) -> Dict[str, int]:
+    """
+    Compress triangle primitives with KHR_draco_mesh_compression.
+
+    Each primitive keeps only the vertices its indices use. Position, normal
+    and UV go into the Draco buffer (order preserved), while skin weights and
+    morph targets are rewritten as plain accessors over the same vertices,
+    so primitives that shared one vertex buffer stay consistent.
+    """
+    if DracoPy is None:
+        raise OptimizationError("DracoPy is not installed")
+    gltf = model.gltf
+    stats = {"primitives": 0, "skipped": 0}
+    for mesh in gltf.get("meshes", []):
+        for primitive in mesh.get("primitives", []):
+            if primitive.get("mode", 4) != 4 or "indices" not in primitive or "POSITION" not in primitive["attributes"] \
+                    or DRACO_EXTENSION in primitive.get("extensions", {}):
+                stats["skipped"] += 1
+                continue
+            try:
+                _compress_primitive(model, primitive, quantization_bits, compression_level)
+                stats["primitives"] += 1
+            except OptimizationError as e:
+                logger.warning(f"Leaving a primitive of mesh '{mesh.get('name', '')}' uncompressed: {e}")
+                stats["skipped"] += 1
+
+    if stats["primitives"]:
+        for key in ("extensionsUsed", "extensionsRequired"):
+            extensions = gltf.setdefault(key, [])
+            if DRACO_EXTENSION not in extensions:
+                extensions.append(DRACO_EXTENSION)
+    return stats
+
+
+def _compress_primitive(model: GLBModel, primitive: Dict[str, Any], quantization_bits: int, compression_level: int):
+    accessors = model.gltf["accessors"]
+    indices = model.read_accessor(primitive["indices"]).reshape(-1)
+    used, faces = np.unique(indices, return_inverse=True)
+    faces = faces.reshape(-1, 3).astype(np.uint32)
+
+    attributes = {name: model.read_accessor(index)[used] for name, index in primitive["attributes"].items()}
+    compressed = {name for name in DRACO_ATTRIBUTE_TYPES.values() if name in attributes
+                  and accessors[primitive["attributes"][name]]["componentType"] == 5126}
+    encoded = DracoPy.encode(
+        attributes["POSITION"].astype(np.float64), faces,
+        quantization_bits=quantization_bits, compression_level=compression_level, preserve_order=True,
+        normals=attributes["NORMAL"].astype(np.float64) if "NORMAL" in compressed else None,
+        tex_coord=attributes["TEXCOORD_0"].astype(np.float64) if "TEXCOORD_0" in compressed else None,
+        normal_quantization_bits=10, tex_coord_quantization_bits=12
+    )
+    decoded = DracoPy.decode(encoded)
+    if len(decoded.points) != len(used) or len(decoded.faces) != len(faces):
+        raise OptimizationError("Draco changed the vertex or face count")
+    ids = {DRACO_ATTRIBUTE_TYPES[a["attribute_type"]]: a["unique_id"] for a in decoded.attributes
+           if a["attribute_type"] in DRACO_ATTRIBUTE_TYPES}
+
+    new_attributes = {}
+    for name, values in attributes.items():
+        old = accessors[primitive["attributes"][name]]
+        extra = {"normalized": True} if old.get("normalized") else {}
+        if name == "POSITION":
+            extra.update(min=values.min(axis=0).tolist(), max=values.max(axis=0).tolist())
+        new_attributes[name] = model.add_accessor(None if name in compressed else values, old["type"],
+                                                  len(used), old["componentType"], **extra)
+    primitive["attributes"] = new_attributes
+
+    targets = []
+    for target in primitive.get("targets", []):
+        new_target = {}
+        for name, index in target.items():
+            values = model.read_accessor(index)[used]
+            old = accessors[index]
+            extra = {"min": values.min(axis=0).tolist(), "max": values.max(axis=0).tolist()} if name == "POSITION" else {}
+            new_target[name] = model.add_accessor(values, old["type"], len(used), old["componentType"], **extra)
+        targets.append(new_target)
+    if targets:
+        primitive["targets"] = targets
+
+    index_type = 5123 if len(used) < 65536 else 5125
+    primitive["indices"] = model.add_accessor(None, "SCALAR", len(faces) * 3, index_type)
+    primitive.setdefault("extensions", {})[DRACO_EXTENSION] = {
+        "bufferView": model.add_view(encoded),
+        "attributes": {name: ids[name] for name in compressed}
+    }
+
+
+def model_stats(data: bytes, bandwidth_mbps: float = 20.0) -> Dict[str, Any]:
+    """
+    Size and an estimated load cost of a GLB: download time at
+    ``bandwidth_mbps``, plus measured image decode and Draco decode time and
+    a flat rate for parsing the remaining buffers
+    """
+    from PIL import Image
+
+    model = GLBModel.loads(data)
+    gltf = model.gltf
+    image_views = {image["bufferView"] for image in gltf.get("images", []) if "bufferView" in image}
+    draco_views = {primitive["extensions"][DRACO_EXTENSION]["bufferView"]
+                   for mesh in gltf.get("meshes", []) for primitive in mesh.get("primitives", [])
+                   if DRACO_EXTENSION in primitive.get("extensions", {})}
+
+    start = time.perf_counter()
+    pixels, max_texture = 0, 0
+    for index in image_views:
+        picture = Image.open(io.BytesIO(model.views[index]))
+        picture.load()
+        pixels += picture.width * picture.height
+        max_texture = max(max_texture, *picture.size)
+    image_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    if DracoPy is not None:
+        for index in draco_views:
+            DracoPy.decode(model.views[index])
+    draco_ms = (time.perf_counter() - start) * 1000
+
+    buffer_bytes = sum(len(view) for index, view in enumerate(model.views)
+                       if index not in image_views and index not in draco_views)
+    buffer_ms = buffer_bytes / (BUFFER_PARSE_MB_PER_S * 1e6) * 1000
+    download_ms = len(data) * 8 / (bandwidth_mbps * 1e6) * 1000
+
+    triangles = 0
+    for mesh in gltf.get("meshes", []):
+        for primitive in mesh.get("primitives", []):
+            if "indices" in primitive:
+                triangles += gltf["accessors"][primitive["indices"]]["count"] // 3
+    return {
+        "size": len(data),
+        "nodes": len(gltf.get("nodes", [])),
+        "animations": len(gltf.get("animations", [])),
+        "triangles": triangles,
+        "texture_pixels": pixels,
+        "max_texture": max_texture,
+        "download_ms": round(download_ms, 1),
+        "decode_ms": round(image_ms + draco_ms + buffer_ms, 1),
+        "estimated_load_ms": round(download_ms + image_ms + draco_ms + buffer_ms, 1)
+    }
+
+
+def optimize(data: bytes, max_texture: Optional[int] = None, jpeg_quality: Optional[int] = None,
+             draco: bool = False, strip: bool = True) -> bytes:
+    """Produce one optimized variant of a GLB/VRM file"""
+    model = GLBModel.loads(data)
+    if strip:
+        strip_animations(model)
+        strip_unused_nodes(model)
+    if max_texture:
+        downscale_textures(model, max_texture, jpeg_quality)
+    if draco:
+        draco_compress(model)
+    prune_accessors(model)
+    return model.dumps()
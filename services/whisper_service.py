@@ -1,12 +1,29 @@
 import os
-import requests
-import tempfile
+import logging
+import mimetypes
 from openai import OpenAI
 
+logger = logging.getLogger(__name__)
+
+# Whisper infers the format from the upload's file name
+EXTENSIONS = {
+    "audio/wav": ".wav",
+    "audio/webm": ".webm",
+    "audio/ogg": ".ogg",
+    "audio/flac": ".flac",
+    "audio/mpeg": ".mp3",
+    "audio/mp4": ".m4a"
+}
+
 class WhisperService:
     def __init__(self):
         self.api_key = os.getenv('OPENAI_API_KEY')
-        self.client = OpenAI(api_key=self.api_key) if self.api_key else None
+        self.timeout = float(os.getenv('WHISPER_TIMEOUT', 60))
+        self.client = OpenAI(api_key=self.api_key, timeout=self.timeout, max_retries=0) if self.api_key else None
+    
+    def is_configured(self):
+        """Check if Whisper is properly configured"""
+        return self.client is not None and self.api_key != 'your_openai_api_key_here'
     
     def transcribe_audio(self, audio_file_path):
         """
@@ -23,29 +40,24 @@ class WhisperService:
                 )
                 return transcript.text
         except Exception as e:
-            print(f"Error transcribing audio: {e}")
+            logger.error(f"Error transcribing audio with Whisper: {e}")
             return f"Error transcribing audio: {str(e)}"
     
-    def transcribe_audio_bytes(self, audio_bytes):
+    def transcribe_audio_bytes(self, audio_bytes, mimetype='audio/wav'):
         """
-        Transcribe audio bytes using OpenAI Whisper API
+        Transcribe audio bytes using OpenAI Whisper API (sent from memory,
+        named after ``mimetype`` so Whisper decodes the right format)
         """
         if not self.client:
             return "Mock transcription: Please set OPENAI_API_KEY environment variable"
         
+        extension = EXTENSIONS.get(mimetype) or mimetypes.guess_extension(mimetype or '') or ".wav"
         try:
-            # Create temporary file
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-                temp_file.write(audio_bytes)
-                temp_file_path = temp_file.name
-            
-            # Transcribe
-            result = self.transcribe_audio(temp_file_path)
-            
-            # Clean up
-            os.unlink(temp_file_path)
-            
-            return result
+            transcript = self.client.audio.transcriptions.create(
+                model="whisper-1",
+                file=(f"audio{extension}", audio_bytes, mimetype)
+            )
+            return transcript.text
         except Exception as e:
-            print(f"Error transcribing audio bytes: {e}")
-            return f"Error transcribing audio: {str(e)}" 
\ No newline at end of file
+            logger.error(f"Error transcribing audio bytes with Whisper: {e}")
+            return f"Error transcribing audio: {str(e)}"
@@ -12,6 +12,10 @@ let isListening = false;
 let isConversationMode = false;
 let aiSpeaking = false;
 let conversationAudio = null;
+let streamingMessage = null;
+let streamingAudioQueue = [];
+let lipSyncTracks = {};  // audio URL -> server-computed lip-sync track
+let liveStreaming = false;
 
 // DOM elements
 const connectionStatus = document.getElementById('connection-status');
@@ -71,7 +75,13 @@ function createParticle(container) {
 
 // Socket.IO initialization
 function initializeSocket() {
-    socket = io();
+    // WebSocket first: it needs no sticky sessions across server workers
+    socket = io({ transports: ['websocket', 'polling'] });
+    
+    socket.on('connect_error', () => {
+        // WebSocket blocked (e.g. by a proxy): fall back to long-polling
+        socket.io.opts.transports = ['polling', 'websocket'];
+    });
     
     socket.on('connect', () => {
         console.log('Connected to server');
@@ -93,6 +103,47 @@ function initializeSocket() {
         handleAIResponse(data);
     });
     
+    socket.on('response_chunk', (data) => {
+        console.log('Received response chunk:', data);
+        handleAIResponseChunk(data);
+    });
+    
+    socket.on('response_end', (data) => {
+        console.log('Response stream finished:', data);
+        handleAIResponseEnd(data);
+    });
+    
+    socket.on('busy', (data) => {
+        console.warn('Server busy:', data);
+        addSystemMessage(`⏳ ${data.message} (try again in ${data.retryAfter}s)`);
+    });
+    
+    socket.on('transcript_interim', (data) => {
+        voiceStatus.textContent = `🎤 ${data.text}`;
+    });
+    
+    socket.on('transcript_final', (data) => {
+        currentTranscription = currentTranscription ? `${currentTranscription} ${data.text}` : data.text;
+        voiceStatus.textContent = `🎤 ${currentTranscription}`;
+    });
+    
+    socket.on('voice_turn', (data) => {
+        // The server has already sent this utterance to the RAG pipeline
+        currentTranscription = '';
+        addUserMessage(data.text);
+    });
+    
+    socket.on('audio_stream_closed', () => {
+        if (!isListening) {
+            resetVoiceUI();
+        }
+    });
+    
+    socket.on('lipsync', (data) => {
+        // Track that finished after its response was sent
+        rememberLipSync(data.audio, data.lipSync);
+    });
+    
     socket.on('vrm_listening', (data) => {
         console.log('VRM listening state:', data);
         updateVRMState(data.vrmData);
@@ -130,6 +181,27 @@ async function initializeLookingGlass() {
     }
 }
 
+const DRACO_DECODER_PATH = '/static/three.js-master/examples/jsm/libs/draco/';
+
+// Device and network hints the server uses to pick a model variant
+function modelCapabilities(dracoSupported) {
+    const params = new URLSearchParams();
+    const gl = document.createElement('canvas').getContext('webgl');
+    if (gl) {
+        params.set('maxTextureSize', gl.getParameter(gl.MAX_TEXTURE_SIZE));
+    }
+    if (navigator.deviceMemory) {
+        params.set('deviceMemory', navigator.deviceMemory);
+    }
+    const connection = navigator.connection;
+    if (connection) {
+        if (connection.effectiveType) params.set('connection', connection.effectiveType);
+        if (connection.saveData) params.set('saveData', '1');
+    }
+    params.set('draco', dracoSupported ? '1' : '0');
+    return params.toString();
+}
+
 // Load VRM model
 async function loadVRMModel() {
     try {
@@ -142,8 +214,10 @@ async function loadVRMModel() {
             throw new Error('GLTFLoader not available');
         }
         
-        const response = await fetch('/api/vrm-model');
+        const dracoSupported = typeof THREE.DRACOLoader !== 'undefined';
+        const response = await fetch('/api/vrm-model?' + modelCapabilities(dracoSupported));
         const vrmData = await response.json();
+        console.log(`Using ${vrmData.variant} VRM model`);
         
         // Initialize Three.js scene
         const scene = new THREE.Scene();
@@ -155,6 +229,11 @@ async function loadVRMModel() {
         
         // Load VRM model
         const loader = new THREE.GLTFLoader();
+        if (dracoSupported) {
+            const dracoLoader = new THREE.DRACOLoader();
+            dracoLoader.setDecoderPath(DRACO_DECODER_PATH);
+            loader.setDRACOLoader(dracoLoader);
+        }
         loader.load(vrmData.modelUrl, (gltf) => {
             vrmModel = gltf.scene;
             scene.add(vrmModel);
@@ -233,6 +312,40 @@ function updateVRMState(vrmData) {
     }
 }
 
+// VRM vowel blend shapes (VRM 0.x and 1.0 names) per lip-sync viseme code
+const VISEME_SHAPES = { A: ['A', 'aa'], I: ['I', 'ih'], U: ['U', 'ou'], E: ['E', 'ee'], O: ['O', 'oh'] };
+
+// Open the VRM mouth in the given viseme shape (0-1); '-' closes it
+function updateVRMMouth(open, viseme) {
+    if (!vrmModel) return;
+    
+    if (!vrmModel.userData.mouthTargets) {
+        const targets = [];
+        vrmModel.traverse((object) => {
+            if (!object.morphTargetDictionary || !object.morphTargetInfluences) return;
+            Object.entries(VISEME_SHAPES).forEach(([code, names]) => {
+                names.forEach((name) => {
+                    const index = object.morphTargetDictionary[name];
+                    if (index !== undefined) {
+                        targets.push({ influences: object.morphTargetInfluences, index: index, code: code });
+                    }
+                });
+            });
+        });
+        vrmModel.userData.mouthTargets = targets;
+    }
+    
+    vrmModel.userData.mouthTargets.forEach((target) => {
+        target.influences[target.index] = target.code === viseme ? open : 0;
+    });
+}
+
+function rememberLipSync(audioUrl, track) {
+    if (audioUrl && track) {
+        lipSyncTracks[audioUrl] = track;
+    }
+}
+
 // Update VRM expression
 function updateVRMExpression(expression) {
     if (!vrmModel) return;
@@ -313,12 +426,22 @@ function setupMediaRecorder(stream) {
     
     mediaRecorder.ondataavailable = (event) => {
         if (event.data.size > 0) {
+            if (liveStreaming) {
+                // Forward mic frames as they are produced
+                event.data.arrayBuffer().then(buffer => socket.emit('audio_stream_chunk', buffer));
+                return;
+            }
             audioChunks.push(event.data);
             console.log(`Audio chunk collected: ${event.data.size} bytes`);
         }
     };
     
     mediaRecorder.onstop = () => {
+        if (liveStreaming) {
+            liveStreaming = false;
+            socket.emit('audio_stream_stop');
+            return;
+        }
         if (audioChunks.length > 0) {
             const audioBlob = new Blob(audioChunks, { type: options.mimeType });
             console.log(`Recording complete: ${audioBlob.size} bytes, type: ${audioBlob.type}`);
@@ -367,6 +490,16 @@ function startVoiceRecording() {
     // Notify server
     socket.emit('speech_start');
     
+    if (document.getElementById('live-transcription').checked) {
+        // Stream 250 ms frames; the server answers each endpointed utterance
+        liveStreaming = true;
+        socket.emit('audio_stream_start', { mimetype: mediaRecorder.mimeType });
+        voiceStatus.textContent = 'Listening... Click to stop';
+        mediaRecorder.start(250);
+        console.log('Started live voice streaming');
+        return;
+    }
+    
     // Start continuous recording (no time slicing)
     mediaRecorder.start();
     
@@ -592,11 +725,57 @@ function handleAIResponse(data) {
     // Update VRM state
     if (data.vrmData) {
         updateVRMState(data.vrmData);
+        rememberLipSync(data.audio, data.vrmData.lipSync);
     }
     
     // Play audio if available
     if (data.audio) {
-        playAudio(data.audio);
+        playAudio(data.audio, null, data.vrmData && data.vrmData.timeline);
+    }
+}
+
+// Handle one sentence of a streamed AI response
+function handleAIResponseChunk(data) {
+    if (data.index === 0) {
+        if (data.source === 'voice_transcription') {
+            addSystemMessage('🤖 RAG pipeline response streaming');
+        }
+        streamingMessage = addAIMessage(data.content);
+        streamingAudioQueue = [];
+    } else if (streamingMessage) {
+        streamingMessage.querySelector('.message-content').append(' ' + data.content);
+        scrollToBottom();
+    }
+    
+    // Update VRM state
+    if (data.vrmData) {
+        updateVRMState(data.vrmData);
+        rememberLipSync(data.audio, data.vrmData.lipSync);
+    }
+    
+    // Queue audio so sentences play back to back
+    if (data.audio) {
+        const timeline = data.vrmData && data.vrmData.timeline;
+        if (aiSpeaking && conversationAudio) {
+            streamingAudioQueue.push({ audio: data.audio, timeline: timeline });
+        } else {
+            playAudio(data.audio, playNextStreamedAudio, timeline);
+        }
+    }
+}
+
+// Handle the end of a streamed AI response
+function handleAIResponseEnd(data) {
+    if (!streamingMessage && data.content) {
+        addAIMessage(data.content);
+    }
+    streamingMessage = null;
+}
+
+function playNextStreamedAudio() {
+    if (streamingAudioQueue.length > 0) {
+        const next = streamingAudioQueue.shift();
+        playAudio(next.audio, playNextStreamedAudio, next.timeline);
     }
 }
 
@@ -616,6 +795,7 @@ function addAIMessage(message) {
     messageDiv.innerHTML = `<div class="message-content"><i class="fas fa-robot"></i> ${escapeHtml(message)}</div>`;
     chatMessages.appendChild(messageDiv);
     scrollToBottom();
+    return messageDiv;
 }
 
 // Add system message to chat
@@ -628,7 +808,7 @@ function addSystemMessage(message) {
 }
 
 // Play audio with interruption capability
-function playAudio(audioUrl) {
+function playAudio(audioUrl, onFinished, timeline) {
     // Stop any previous audio
     if (conversationAudio) {
         conversationAudio.pause();
@@ -645,6 +825,45 @@ function playAudio(audioUrl) {
     voiceStatus.textContent = 'AI Speaking... Click to interrupt';
     voiceBtn.classList.add('ai-speaking');
     
+    // Step through the per-sentence expression keyframes as the audio plays
+    if (timeline && timeline.length > 1) {
+        let keyframe = -1;
+        conversationAudio.ontimeupdate = (event) => {
+            const audio = event.target;
+            if (!audio.duration) return;
+            const progress = audio.currentTime / audio.duration;
+            let next = keyframe;
+            while (next + 1 < timeline.length && timeline[next + 1].at <= progress) {
+                next++;
+            }
+            if (next !== keyframe && next >= 0) {
+                keyframe = next;
+                updateVRMState({
+                    animations: { current: timeline[next].animation },
+                    expressions: { current: timeline[next].expression }
+                });
+            }
+        };
+    }
+    
+    // Drive the mouth from the lip-sync track, which may arrive after playback starts
+    const audio = conversationAudio;
+    function driveMouth() {
+        if (conversationAudio !== audio || audio.paused || audio.ended) {
+            updateVRMMouth(0, '-');
+            return;
+        }
+        const track = lipSyncTracks[audioUrl];
+        if (track) {
+            const frame = Math.floor(audio.currentTime * track.fps);
+            if (frame < track.mouth.length) {
+                updateVRMMouth(track.mouth[frame] / 100, track.visemes[frame]);
+            }
+        }
+        requestAnimationFrame(driveMouth);
+    }
+    audio.onplaying = () => requestAnimationFrame(driveMouth);
+    
     conversationAudio.play().then(() => {
         console.log('AI audio started playing');
     }).catch(error => {
@@ -655,15 +874,23 @@ function playAudio(audioUrl) {
     
     // Listen for audio end
     conversationAudio.onended = () => {
+        delete lipSyncTracks[audioUrl];
         aiSpeaking = false;
         resetVoiceUI();
         conversationAudio = null;
+        if (onFinished) {
+            onFinished();
+        }
     };
     
     // Listen for audio pause (interruption)
     conversationAudio.onpause = () => {
         aiSpeaking = false;
         resetVoiceUI();
+        // An interruption drops the rest of a streamed answer
+        if (conversationAudio && !conversationAudio.ended) {
+            streamingAudioQueue = [];
+        }
     };
 }
 
@@ -1,5 +1,6 @@
 import * as THREE from '../three.js-master/build/three.module.js';
 import { GLTFLoader } from '../three.js-master/examples/jsm/loaders/GLTFLoader.js';
+import { DRACOLoader } from '../three.js-master/examples/jsm/loaders/DRACOLoader.js';
 import { VRButton } from "../three.js-master/examples/jsm/webxr/VRButton.js";
 import {
   LookingGlassWebXRPolyfill,
@@ -30,9 +31,32 @@ try {
 // Load model
 console.log("🎯 Starting VRM model load...");
 
+const dracoLoader = new DRACOLoader();
+dracoLoader.setDecoderPath('/static/three.js-master/examples/jsm/libs/draco/');
 const loader = new GLTFLoader();
-loader.load(
-  '/static/assets/AvatarSample_C.vrm',
+loader.setDRACOLoader(dracoLoader);
+
+// Ask the server for the model variant that suits this device and connection
+async function modelUrl() {
+  const params = new URLSearchParams({ draco: '1' });
+  params.set('maxTextureSize', renderer.capabilities.maxTextureSize);
+  if (navigator.deviceMemory) params.set('deviceMemory', navigator.deviceMemory);
+  const connection = navigator.connection;
+  if (connection && connection.effectiveType) params.set('connection', connection.effectiveType);
+  if (connection && connection.saveData) params.set('saveData', '1');
+  try {
+    const response = await fetch(`/api/vrm-model?${params}`);
+    const vrmData = await response.json();
+    console.log(`🗜️ Using ${vrmData.variant} VRM model`);
+    return vrmData.modelUrl;
+  } catch (error) {
+    console.log('⚠️ Model variant lookup failed, loading the original:', error.message);
+    return '/static/assets/AvatarSample_C.vrm';
+  }
+}
+
+modelUrl().then((url) => loader.load(
+  url,
   function (gltf) {
     console.log('✅ VRM model loaded successfully:', gltf);
     const model = gltf.scene;
@@ -48,7 +72,7 @@ loader.load(
   function (error) {
     console.error('❌ Error loading VRM model:', error);
   }
-);
+));
 
 // Lighting
 const light = new THREE.DirectionalLight(0xffffff, 1);
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Tests for per-route admission control: bounded concurrency, a bounded wait
+queue and fast rejection
+"""
+
+import os
+import time
+import threading
+
+from services.admission_service import AdmissionController, AdmissionLimiter, AdmissionRejected
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.005)
+
+
+def rejection(limiter):
+    try:
+        limiter.acquire()
+    except AdmissionRejected as e:
+        return e
+    return None
+
+
+def test_queued_request_gets_the_next_free_slot():
+    limiter = AdmissionLimiter("chat", max_concurrent=1, max_queue=1, queue_timeout=2)
+    limiter.acquire()
+    waited = []
+    waiter = threading.Thread(target=lambda: waited.append(limiter.acquire()))
+    waiter.start()
+    wait_for(lambda: limiter.waiting == 1)
+
+    time.sleep(0.05)
+    limiter.release(0.05)
+    waiter.join(2)
+    assert waited and waited[0] >= 0.05
+    stats = limiter.stats()
+    assert stats["in_flight"] == 1 and stats["queue_depth"] == 0 and stats["admitted"] == 2
+
+
+def test_full_queue_is_rejected_immediately():
+    limiter = AdmissionLimiter("chat", max_concurrent=1, max_queue=1, queue_timeout=2)
+    limiter.acquire()
+    waiter = threading.Thread(target=limiter.acquire)
+    waiter.start()
+    wait_for(lambda: limiter.waiting == 1)
+
+    start = time.monotonic()
+    error = rejection(limiter)
+    assert error is not None and error.reason == "queue full"
+    assert time.monotonic() - start < 0.1
+    assert error.retry_after >= 1
+    limiter.release()
+    waiter.join(2)
+    assert limiter.stats()["rejected"] == 1
+
+
+def test_wait_times_out():
+    limiter = AdmissionLimiter("tts", max_concurrent=1, max_queue=4, queue_timeout=0.05)
+    limiter.acquire()
+    error = rejection(limiter)
+    assert error is not None and error.reason == "queue timeout"
+    stats = limiter.stats()
+    assert stats["timed_out"] == 1 and stats["queue_depth"] == 0 and stats["in_flight"] == 1
+
+
+def test_slot_releases_on_error():
+    limiter = AdmissionLimiter("stt", max_concurrent=1, max_queue=0)
+    try:
+        with limiter.slot():
+            raise RuntimeError("handler failed")
+    except RuntimeError:
+        pass
+    with limiter.slot():
+        assert limiter.active == 1
+    assert limiter.active == 0 and limiter.completed == 2
+
+
+def test_controller_reads_route_limits_from_environment():
+    os.environ["ADMISSION_TESTROUTE_MAX_CONCURRENT"] = "3"
+    os.environ["ADMISSION_TESTROUTE_QUEUE_TIMEOUT"] = "0.5"
+    try:
+        controller = AdmissionController()
+        limiter = controller.register("testroute", max_concurrent=1, max_queue=2)
+    finally:
+        del os.environ["ADMISSION_TESTROUTE_MAX_CONCURRENT"]
+        del os.environ["ADMISSION_TESTROUTE_QUEUE_TIMEOUT"]
+    assert (limiter.max_concurrent, limiter.max_queue, limiter.queue_timeout) == (3, 2, 0.5)
+    assert set(controller.stats()) == {"testroute"}
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
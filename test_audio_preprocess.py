@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Tests for speech-to-text audio preprocessing: container sniffing and the
+energy VAD that trims silence
+"""
+
+import io
+import wave
+
+import numpy as np
+
+from services.audio_preprocess import AudioPreprocessor, TARGET_RATE, read_wav, sniff_mimetype
+
+
+def make_wav(seconds_silence, seconds_tone, rate=TARGET_RATE, width=2):
+    """A 440 Hz tone with the same amount of near-silence before and after it"""
+    rng = np.random.default_rng(0)
+    silence = rng.normal(0, 1e-4, int(rate * seconds_silence))
+    t = np.arange(int(rate * seconds_tone)) / rate
+    samples = np.concatenate([silence, 0.3 * np.sin(2 * np.pi * 440 * t), silence])
+    if width == 1:
+        pcm = np.clip(np.rint(samples * 127 + 128), 0, 255).astype(np.uint8)
+    else:
+        pcm = np.clip(np.rint(samples * 32767), -32768, 32767).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(width)
+        wav.setframerate(rate)
+        wav.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+def test_sniff_mimetype():
+    assert sniff_mimetype(make_wav(0, 0.1)) == "audio/wav"
+    assert sniff_mimetype(b"\x1aE\xdf\xa3" + b"\x00" * 16) == "audio/webm"
+    assert sniff_mimetype(b"OggS\x00\x02" + b"\x00" * 16) == "audio/ogg"
+    assert sniff_mimetype(b"fLaC\x00\x00\x00\x22") == "audio/flac"
+    assert sniff_mimetype(b"ID3\x04\x00") == "audio/mpeg"
+    assert sniff_mimetype(b"\xff\xfb\x90\x64") == "audio/mpeg"
+    assert sniff_mimetype(b"\x00\x00\x00\x20ftypM4A ") == "audio/mp4"
+    # RIFF is also used by AVI and WebP: only RIFF/WAVE is audio
+    assert sniff_mimetype(b"RIFF\x24\x00\x00\x00AVI LIST") is None
+    assert sniff_mimetype(b"RIFF\x24\x00\x00\x00WEBPVP8 ") is None
+    assert sniff_mimetype(b"hello world") is None
+    assert sniff_mimetype(b"") is None
+
+
+def test_trims_silence_around_a_tone():
+    data = make_wav(1.0, 1.0)
+    prepared = AudioPreprocessor(enabled=True, codec="wav", padding_ms=200, min_trim_ms=250).process(data, "audio/wav")
+    assert prepared.action == "trimmed"
+    assert prepared.mimetype == "audio/wav"
+    assert abs(prepared.seconds_in - 3.0) < 1e-6
+    # The tone plus 200 ms of padding on each side, to within a 20 ms frame
+    assert abs(prepared.seconds_out - 1.4) <= 0.04
+    samples, rate = read_wav(prepared.data)
+    assert rate == TARGET_RATE and abs(len(samples) / rate - prepared.seconds_out) < 1e-6
+    assert len(prepared.data) < len(data)
+
+
+def test_silent_clip_is_flagged():
+    prepared = AudioPreprocessor(enabled=True, codec="wav").process(make_wav(0.5, 0), "audio/wav")
+    assert prepared.silent and prepared.action == "silent"
+    assert prepared.data == b"" and prepared.seconds_out == 0.0
+
+
+def test_small_trim_passes_the_upload_through():
+    # 8-bit audio re-encodes larger; 2 x 100 ms of trim is below STT_MIN_TRIM_MS
+    data = make_wav(0.3, 1.0, width=1)
+    prepared = AudioPreprocessor(enabled=True, codec="wav", padding_ms=200, min_trim_ms=250).process(data, "audio/x-wav")
+    assert prepared.action == "passthrough"
+    assert prepared.data is data and prepared.mimetype == "audio/wav"
+    assert prepared.seconds_out == prepared.seconds_in
+
+    # With a lower threshold the same trim is worth sending
+    prepared = AudioPreprocessor(enabled=True, codec="wav", padding_ms=200, min_trim_ms=100).process(data, "audio/x-wav")
+    assert prepared.action == "trimmed"
+
+
+def test_mislabelled_upload_uses_the_sniffed_type():
+    data = make_wav(0, 0.5)
+    prepared = AudioPreprocessor(enabled=False).process(data, "audio/webm;codecs=opus")
+    assert prepared.action == "disabled"
+    assert prepared.mimetype == "audio/wav" and prepared.declared_mimetype == "audio/webm"
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
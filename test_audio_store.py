@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Tests for the speech audio store janitor with two stores sharing one
+directory, the way server workers do
+"""
+
+import os
+import time
+import tempfile
+
+from services.audio_store import STALE_SECONDS, AudioStore, audio_id_for
+
+DAY = 24 * 3600
+
+
+def clip_id(n):
+    return audio_id_for(f"sentence {n}", "voice", "mp3")
+
+
+def make_workers(**kwargs):
+    directory = tempfile.mkdtemp(prefix="audio-store-test-")
+    return AudioStore(directory, **kwargs), AudioStore(directory, **kwargs)
+
+
+def age(store, audio_id, seconds, extension="mp3"):
+    """Pretend a file was last used ``seconds`` ago"""
+    path = store.path_for(audio_id, extension) if extension else audio_id
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+def test_sweep_keeps_sidecars_another_worker_just_wrote():
+    first, second = make_workers()
+    second.store(clip_id(1), b"audio")
+    assert second.store_sidecar(clip_id(1), "lipsync", b"{}")
+
+    first.sweep()
+    assert second.load_sidecar(clip_id(1), "lipsync") == b"{}"
+    assert os.path.exists(first.path_for(clip_id(1)))
+
+
+def test_clip_used_by_another_worker_is_not_expired():
+    first, second = make_workers(max_age=DAY)
+    first.store(clip_id(1), b"used elsewhere")
+    first.store(clip_id(2), b"unused")
+    age(first, clip_id(1), 2 * DAY)
+    age(first, clip_id(2), 2 * DAY)
+
+    # Only the second worker serves clip 1; its use refreshes the file
+    assert second.get(clip_id(1)) is not None
+    first.sweep()
+
+    assert os.path.exists(first.path_for(clip_id(1)))
+    assert not os.path.exists(first.path_for(clip_id(2)))
+    assert first.expired == 1
+    assert first.get(clip_id(2)) is None
+
+
+def test_size_quota_covers_every_worker():
+    first, second = make_workers(max_bytes=250)
+    for n in range(2):
+        first.store(clip_id(n), b"a" * 100)
+        age(first, clip_id(n), 60 * (10 - n))
+    second.store(clip_id(2), b"b" * 100)
+    # Each worker alone is under quota; together they are not
+    assert first.stats()["total_bytes"] == 200 and second.stats()["total_bytes"] == 100
+
+    first.sweep()
+    on_disk = [n for n in range(3) if os.path.exists(first.path_for(clip_id(n)))]
+    assert on_disk == [1, 2], on_disk
+    assert first.evictions == 1
+    # After a sweep the index covers the other worker's clips too
+    assert first.stats()["total_bytes"] == 200 and first.stats()["files"] == 2
+
+
+def test_old_orphan_sidecars_and_temp_files_are_removed():
+    store, _ = make_workers()
+    store.store(clip_id(1), b"audio")
+    store.store_sidecar(clip_id(1), "lipsync", b"{}")
+    os.unlink(store.path_for(clip_id(1)))
+    fresh = store.sidecar_path(clip_id(2), "lipsync")
+    with open(fresh, "wb") as f:
+        f.write(b"{}")
+    part = os.path.join(store.directory, ".audio_crashed.part")
+    with open(part, "wb") as f:
+        f.write(b"partial")
+    age(store, store.sidecar_path(clip_id(1), "lipsync"), STALE_SECONDS + 60, extension=None)
+    age(store, part, STALE_SECONDS + 60, extension=None)
+
+    store.sweep()
+    assert not os.path.exists(store.sidecar_path(clip_id(1), "lipsync"))
+    assert not os.path.exists(part)
+    # Might be a write whose clip another worker is about to index
+    assert os.path.exists(fresh)
+
+
+def test_one_worker_sweeps_at_a_time():
+    first, second = make_workers(max_age=DAY)
+    first.store(clip_id(1), b"audio")
+    age(first, clip_id(1), 2 * DAY)
+
+    with second._janitor_lock() as acquired:
+        assert acquired
+        first.sweep()
+        assert os.path.exists(first.path_for(clip_id(1)))
+    first.sweep()
+    assert not os.path.exists(first.path_for(clip_id(1)))
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Tests for batch speech-to-text input handling: zip expansion and limits
+"""
+
+import io
+import zipfile
+
+from services.batch_transcription import BatchInputError, collect_batch_files
+
+
+def make_zip(entries):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in entries.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def error_of(uploads, max_files=10, max_bytes=1024):
+    try:
+        collect_batch_files(uploads, max_files, max_bytes)
+    except BatchInputError as e:
+        return str(e)
+    return None
+
+
+def test_plain_files_and_zip_entries():
+    archive = make_zip({
+        "calls/one.wav": b"RIFF1",
+        "calls/two.wav": b"RIFF2",
+        "calls/": b"",
+        "calls/.DS_Store": b"junk",
+        "__MACOSX/calls/._one.wav": b"junk"
+    })
+    files = collect_batch_files([("single.wav", b"RIFF0"), ("batch.zip", archive)], 10, 1024)
+    assert files == [("single.wav", b"RIFF0"), ("calls/one.wav", b"RIFF1"), ("calls/two.wav", b"RIFF2")]
+
+
+def test_file_count_limit():
+    archive = make_zip({f"{index}.wav": b"x" for index in range(3)})
+    assert error_of([("a.wav", b"x"), ("batch.zip", archive)], max_files=3) == "batch has more than 3 files"
+    assert error_of([("batch.zip", archive)], max_files=3) is None
+
+
+def test_uncompressed_size_is_checked_before_extracting():
+    # Highly compressible: the archive is tiny, its content is not
+    archive = make_zip({"small.wav": b"x" * 100, "large.wav": b"\x00" * 4 * 1024 * 1024})
+    assert len(archive) < 64 * 1024
+
+    reads = []
+    original_read = zipfile.ZipFile.read
+    zipfile.ZipFile.read = lambda self, name, pwd=None: reads.append(name) or original_read(self, name, pwd)
+    try:
+        error = error_of([("batch.zip", archive)], max_bytes=1024 * 1024)
+    finally:
+        zipfile.ZipFile.read = original_read
+    assert error == "batch is larger than 1 MB"
+    assert reads == [], "nothing may be extracted from an archive over the limit"
+
+
+def test_bad_input():
+    assert error_of([]) == "no audio files in the batch"
+    assert error_of([("empty.zip", make_zip({"folder/": b""}))]) == "no audio files in the batch"
+    assert error_of([("broken.zip", b"PK\x03\x04not really a zip")]).startswith("broken.zip:")
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Tests for the circuit breaker state machine and the adaptive timeout
+"""
+
+import time
+
+from services.circuit_breaker import (
+    CLOSED, HALF_OPEN, OPEN, AdaptiveTimeout, CircuitBreaker, CircuitOpenError
+)
+
+
+def expire(breaker):
+    """Pretend the reset timeout has passed"""
+    breaker.opened_at -= breaker.reset_timeout
+
+
+def rejected(breaker):
+    try:
+        breaker.acquire()
+    except CircuitOpenError:
+        return True
+    return False
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("test_open", failure_threshold=3, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()  # Resets the streak
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert rejected(breaker)
+    assert breaker.stats()["rejected"] == 1 and breaker.stats()["times_opened"] == 1
+
+
+def test_half_open_probe_closes_on_success():
+    breaker = CircuitBreaker("test_close", failure_threshold=1, reset_timeout=30, half_open_trials=1)
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    expire(breaker)
+
+    breaker.acquire()  # The probe
+    assert breaker.state == HALF_OPEN
+    assert rejected(breaker), "only one probe at a time while half-open"
+    breaker.record_success(0.1)
+    assert breaker.state == CLOSED
+    breaker.acquire()
+
+
+def test_half_open_probe_reopens_on_failure():
+    breaker = CircuitBreaker("test_reopen", failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    expire(breaker)
+    breaker.acquire()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert rejected(breaker)
+    assert breaker.stats()["times_opened"] == 2
+
+
+def test_released_probe_frees_its_trial():
+    breaker = CircuitBreaker("test_release", failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    expire(breaker)
+    breaker.acquire()
+    breaker.release()
+    breaker.acquire()
+    assert breaker.state == HALF_OPEN
+
+
+def test_slow_calls_count_as_failures():
+    breaker = CircuitBreaker("test_slow", failure_threshold=2, slow_call_seconds=1.0)
+    breaker.record_success(0.5)
+    breaker.record_success(1.5)
+    assert breaker.state == CLOSED and breaker.consecutive_failures == 1
+    breaker.record_success(2.0)
+    assert breaker.state == OPEN
+    assert breaker.stats()["slow_calls"] == 2
+
+
+def test_call_context_records_outcome():
+    breaker = CircuitBreaker("test_call", failure_threshold=1, slow_call_seconds=10)
+    with breaker.call():
+        pass
+    assert breaker.successes == 1
+    try:
+        with breaker.call():
+            raise RuntimeError("backend down")
+    except RuntimeError:
+        pass
+    assert breaker.state == OPEN
+
+
+def test_adaptive_timeout_follows_latency():
+    timeout = AdaptiveTimeout("test_timeout", initial=30, minimum=1, maximum=60, percentile=0.9,
+                              multiplier=2.0, min_samples=10)
+    for _ in range(9):
+        timeout.observe(2.0)
+    assert timeout.current() == 30, "initial timeout until min_samples calls"
+    timeout.observe(2.0)
+    assert timeout.current() == 4.0
+
+    # The backend slows down past the breaker's slow-call threshold: the timeout follows, up to the maximum
+    for _ in range(20):
+        timeout.observe(25.0)
+    assert timeout.current() == 50.0
+    for _ in range(20):
+        timeout.observe(45.0)
+    assert timeout.current() == 60.0
+
+    # And comes back down to the minimum when it is fast again
+    for _ in range(200):
+        timeout.observe(0.1)
+    assert timeout.current() == 1.0
+
+
+def test_adaptive_timeout_records_deadline_hits():
+    timeout = AdaptiveTimeout("test_deadline", initial=0.01, minimum=0.01, maximum=5, min_samples=1)
+    try:
+        with timeout.track() as seconds:
+            assert seconds == 0.01
+            time.sleep(0.02)
+            raise TimeoutError()
+    except TimeoutError:
+        pass
+    stats = timeout.stats()
+    assert stats["deadline_hits"] == 1
+    # The timed-out call is recorded at its elapsed time, so the timeout grows
+    assert timeout.current() > 0.01
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
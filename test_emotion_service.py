@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Tests for the avatar expression classifier
+"""
+
+from services.emotion_service import EmotionClassifier
+
+LEXICON = {
+    "default": {"expression": "neutral", "animation": "talk"},
+    "expressions": {
+        "happy": {"animation": "talk", "keywords": {"happy": 1.0, "great": 1.0}},
+        "sad": {"animation": "talk", "keywords": {"sorry": 1.0, "can't": 1.0}},
+        "thinking": {"animation": "idle", "keywords": {"let me": 1.0, "on the other hand": 2.0}}
+    }
+}
+
+
+def expressions(result):
+    return [keyframe["expression"] for keyframe in result["timeline"]]
+
+
+def test_word_boundaries_and_case():
+    classifier = EmotionClassifier(LEXICON)
+    assert classifier.classify("I am unhappy about it.")["expression"] == "neutral"
+    assert classifier.classify("GREAT news!")["expression"] == "happy"
+
+
+def test_phrases_and_apostrophes():
+    classifier = EmotionClassifier(LEXICON)
+    result = classifier.classify("Let\n me see. On  the other hand, I can’t say.")
+    assert expressions(result) == ["thinking", "thinking"]
+    assert result["weight"] == 3.0
+
+
+def test_keywords_land_in_their_sentence():
+    classifier = EmotionClassifier(LEXICON)
+    text = "Hello there. I'm sorry! That is great?! Bye"
+    result = classifier.classify(text)
+    assert expressions(result) == ["neutral", "sad", "happy", "neutral"]
+    starts = [0, text.index("I'm"), text.index("That"), text.index("Bye")]
+    assert [keyframe["at"] for keyframe in result["timeline"]] == [round(start / len(text), 3) for start in starts]
+    assert [keyframe["at"] for keyframe in result["timeline"]] == [0.0, 0.302, 0.558, 0.93]
+
+
+def test_offsets_survive_unicode_lowercasing():
+    # "İ" lowercases to two characters; the sentence after it must still get the match
+    classifier = EmotionClassifier(LEXICON)
+    result = classifier.classify("İİİİİİİİİİ great. No.")
+    assert expressions(result) == ["happy", "neutral"]
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests for the bounded per-session conversation history
+"""
+
+import time
+
+from services.history_store import ConversationHistoryStore
+
+
+def contents(messages):
+    return [message["content"] for message in messages]
+
+
+def test_ring_buffer_keeps_latest_messages():
+    store = ConversationHistoryStore(max_messages=3, idle_ttl=60)
+    for index in range(5):
+        store.append("a", "user", f"m{index}")
+    assert contents(store.get("a")) == ["m2", "m3", "m4"]
+    assert contents(store.get("a", limit=2)) == ["m3", "m4"]
+    # Dropped messages no longer count towards the total size
+    assert store.stats()["total_chars"] == 6
+
+
+def test_sessions_are_isolated_and_clearable():
+    store = ConversationHistoryStore(idle_ttl=60)
+    store.append("a", "user", "hello")
+    store.append("b", "user", "bonjour")
+    store.clear("a")
+    assert store.get("a") == []
+    assert contents(store.get("b")) == ["bonjour"]
+    assert store.stats()["total_chars"] == len("bonjour")
+
+
+def test_idle_sessions_expire():
+    store = ConversationHistoryStore(idle_ttl=0.05)
+    store.append("idle", "user", "old")
+    time.sleep(0.1)
+    assert store.get("idle") == []
+    store.append("idle2", "user", "old")
+    time.sleep(0.1)
+    store.append("active", "user", "new")  # Appending sweeps idle sessions
+    stats = store.stats()
+    assert stats["sessions"] == 1 and stats["evicted_idle"] == 2 and stats["total_chars"] == 3
+
+
+def test_least_recently_used_sessions_are_evicted():
+    store = ConversationHistoryStore(idle_ttl=60, max_total_chars=10, max_sessions=100)
+    store.append("a", "user", "aaaa")
+    store.append("b", "user", "bbbb")
+    store.get("a")  # "b" is now the least recently used
+    store.append("c", "user", "cccc")
+    assert store.get("b") == []
+    assert contents(store.get("a")) == ["aaaa"] and contents(store.get("c")) == ["cccc"]
+    assert store.stats()["evicted_lru"] == 1
+
+    store = ConversationHistoryStore(idle_ttl=60, max_sessions=2)
+    for session_id in ("a", "b", "c"):
+        store.append(session_id, "user", "x")
+    assert store.stats()["sessions"] == 2 and store.get("a") == []
+
+
+def test_oversized_message_keeps_its_own_session():
+    store = ConversationHistoryStore(idle_ttl=60, max_total_chars=5)
+    store.append("a", "user", "a" * 20)
+    assert contents(store.get("a")) == ["a" * 20]
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
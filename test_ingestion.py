@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Tests for reading documents to ingest: records from JSONL files and the
+bulk API, and what happens to entries that are not documents
+"""
+
+import os
+import json
+import tempfile
+
+from services.ingestion import chunk_text, document_from_record, iter_documents
+
+
+def test_record_fields():
+    document = document_from_record({"id": 7, "text": "hello", "metadata": {"lang": "en"}}, "fallback")
+    assert (document.doc_id, document.content, document.metadata) == ("7", "hello", {"lang": "en"})
+    assert document_from_record({"content": "hi"}, "jobs:3").doc_id == "jobs:3"
+
+
+def test_entries_that_are_not_documents_raise_value_error():
+    for record in ["just text", ["a"], None, 3, {"content": ["a"]}, {"text": "hi", "metadata": "x"}]:
+        try:
+            document_from_record(record, "job:0")
+            assert False, f"accepted {record!r}"
+        except ValueError:
+            pass
+
+
+def test_jsonl_skips_bad_lines():
+    directory = tempfile.mkdtemp(prefix="ingest-test-")
+    path = os.path.join(directory, "docs.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"id": "a", "content": "first"}) + "\n")
+        f.write("not json\n")
+        f.write(json.dumps("a bare string") + "\n")
+        f.write("\n")
+        f.write(json.dumps({"content": "second"}) + "\n")
+
+    documents = list(iter_documents(path))
+    assert [(document.doc_id, document.content) for document in documents] == [
+        ("a", "first"), ("docs.jsonl:5", "second")]
+
+
+def test_chunks_respect_the_size_limit():
+    text = "\n\n".join(f"Paragraph {i}. " + "word " * 50 for i in range(20))
+    chunks = chunk_text(text, max_chars=500, overlap=50)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 500 for chunk in chunks)
+    assert chunk_text("   ") == []
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Tests for live transcription event handling: scripted Deepgram messages
+are fed through LocalLiveSession and the interim, final, utterance and
+closed events it reports are checked
+"""
+
+from services.live_transcription import LiveTranscriptionSession, LocalLiveSession
+
+
+def result(text, is_final=False, speech_final=False):
+    return {
+        "type": "Results",
+        "is_final": is_final,
+        "speech_final": speech_final,
+        "channel": {"alternatives": [{"transcript": text}]}
+    }
+
+
+def record(script=None, **kwargs):
+    events = []
+    session = LocalLiveSession(lambda event_type, payload: events.append((event_type, payload)),
+                               script=script, **kwargs)
+    return session, events
+
+
+def test_interim_and_final_results_are_reported_as_they_arrive():
+    session, events = record([result("what is"), result("what is the"), result("what is the weather", True)])
+    session.send(b"chunk")
+    session.send(b"chunk")
+    assert events == [("interim", {"text": "what is"}), ("interim", {"text": "what is the"})]
+
+    session.send(b"chunk")
+    assert events[-1] == ("final", {"text": "what is the weather", "speech_final": False})
+    # Finalized but not endpointed yet: no utterance
+    assert "utterance" not in [event_type for event_type, _ in events]
+
+
+def test_speech_final_reports_the_whole_utterance_once():
+    session, events = record([
+        result("hello", True),
+        result("there", True, speech_final=True),
+        result("", True, speech_final=True)
+    ])
+    for _ in range(3):
+        session.send(b"chunk")
+
+    assert [event for event in events if event[0] == "utterance"] == [("utterance", {"text": "hello there"})]
+    assert events[1] == ("final", {"text": "there", "speech_final": True})
+
+
+def test_utterance_end_flushes_pending_finals():
+    session, events = record([result("turn on", True), result("the lights", True), {"type": "UtteranceEnd"},
+                              {"type": "UtteranceEnd"}, result("thanks", True)])
+    for _ in range(5):
+        session.send(b"chunk")
+
+    assert [payload["text"] for event_type, payload in events if event_type == "utterance"] == [
+        "turn on the lights"]
+    assert session.final_parts == ["thanks"]
+
+
+def test_empty_interims_are_dropped():
+    session, events = record([result(""), result("   "), result("hi")])
+    for _ in range(3):
+        session.send(b"chunk")
+    assert events == [("interim", {"text": "hi"})]
+
+
+def test_finish_replays_the_rest_and_flushes_before_closing():
+    session, events = record([result("good", True), result("morning", True), result("never sent")])
+    session.send(b"chunk")
+    session.finish()
+
+    assert [event_type for event_type, _ in events] == ["final", "final", "interim", "utterance", "closed"]
+    assert events[3] == ("utterance", {"text": "good morning"})
+    assert session.closed
+
+
+def test_error_messages_are_reported():
+    session, events = record([{"type": "Error", "description": "Bad audio"}, {"type": "Error"}])
+    session.send(b"chunk")
+    session.send(b"chunk")
+    assert events == [("error", {"message": "Bad audio"}), ("error", {"message": "Unknown error"})]
+
+
+def test_unscripted_session_reports_the_fallback_text():
+    session, events = record(fallback_text="mock words")
+    session.send(b"chunk")
+    session.finish()
+    assert events == [
+        ("final", {"text": "mock words", "speech_final": True}),
+        ("utterance", {"text": "mock words"}),
+        ("closed", {})
+    ]
+
+
+def test_unscripted_session_without_audio_only_closes():
+    session, events = record()
+    session.finish()
+    assert events == [("closed", {})]
+
+
+def test_closed_session_ignores_audio():
+    session, events = record([result("late", True, speech_final=True)])
+    session.close()
+    session.send(b"chunk")
+    session.finish()
+    assert events == [] and session.bytes_sent == 0
+
+
+def test_callback_errors_do_not_break_the_stream():
+    seen = []
+
+    def on_event(event_type, payload):
+        seen.append(event_type)
+        if event_type == "final":
+            raise RuntimeError("client went away")
+
+    session = LocalLiveSession(on_event, script=[result("one", True, speech_final=True)])
+    session.send(b"chunk")
+    session.finish()
+    assert seen == ["final", "utterance", "closed"]
+
+
+def test_sessions_must_implement_the_stream_methods():
+    class Incomplete(LiveTranscriptionSession):
+        def send(self, chunk):
+            pass
+
+    try:
+        Incomplete(lambda event_type, payload: None)
+        assert False, "expected TypeError"
+    except TypeError:
+        pass
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Tests for the local speech-to-text micro-batcher, with a stub model in
+place of faster-whisper: which clips share an inference call, and that
+every transcript reaches the future of the clip it came from
+"""
+
+import threading
+
+import numpy as np
+
+from services.audio_preprocess import TARGET_RATE
+from services.local_stt import BATCH_MAX_SECONDS, LocalSTTService
+
+
+class StubModelSTT(LocalSTTService):
+    """Local STT whose model call records each batch and reads the clip's id back as its transcript"""
+
+    def __init__(self, fail=False, **kwargs):
+        super().__init__(enabled=False, workers=1, threads=1, **kwargs)
+        self.model = object()
+        self.fail = fail
+        self.calls = []
+
+    def _infer(self, clips, record=True):
+        self.calls.append([int(clip[0]) for clip in clips])
+        if self.fail:
+            raise RuntimeError("model crashed")
+        return [f"clip {int(clip[0])}" for clip in clips]
+
+    def start(self):
+        threading.Thread(target=self._worker, daemon=True).start()
+
+
+def clip(clip_id, seconds=1.0):
+    return np.full(int(seconds * TARGET_RATE), clip_id, dtype=np.float32)
+
+
+def test_queued_clips_share_one_inference_call():
+    service = StubModelSTT(batch_size=8, batch_wait_ms=50)
+    futures = [service.submit(clip(i)) for i in range(5)]
+    service.start()
+
+    assert [future.result(2) for future in futures] == [f"clip {i}" for i in range(5)]
+    assert service.calls == [[0, 1, 2, 3, 4]]
+
+
+def test_batches_are_capped_at_batch_size():
+    service = StubModelSTT(batch_size=3, batch_wait_ms=50)
+    futures = [service.submit(clip(i)) for i in range(7)]
+    service.start()
+
+    assert [future.result(2) for future in futures] == [f"clip {i}" for i in range(7)]
+    assert service.calls == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_clip_arriving_within_the_wait_joins_the_batch():
+    service = StubModelSTT(batch_size=8, batch_wait_ms=300)
+    service.start()
+    first = service.submit(clip(1))
+    second = service.submit(clip(2))
+
+    assert (first.result(2), second.result(2)) == ("clip 1", "clip 2")
+    assert service.calls == [[1, 2]]
+
+
+def test_long_clip_runs_alone_after_the_batch():
+    service = StubModelSTT(batch_size=8, batch_wait_ms=50)
+    short = service.submit(clip(1))
+    long = service.submit(clip(2, seconds=BATCH_MAX_SECONDS + 1))
+    later = service.submit(clip(3))
+    service.start()
+
+    assert (short.result(2), long.result(2), later.result(2)) == ("clip 1", "clip 2", "clip 3")
+    assert service.calls[0] == [1]
+    assert [2] in service.calls
+    assert [1, 2] not in service.calls and [2, 3] not in service.calls
+
+
+def test_cancelled_clips_are_skipped():
+    service = StubModelSTT(batch_size=8, batch_wait_ms=50)
+    futures = [service.submit(clip(i)) for i in range(4)]
+    futures[1].cancel()
+    futures[3].cancel()
+    service.start()
+
+    assert futures[0].result(2) == "clip 0"
+    assert futures[2].result(2) == "clip 2"
+    assert service.calls == [[0, 2]]
+
+
+def test_model_error_fails_every_clip_in_the_batch():
+    service = StubModelSTT(fail=True, batch_size=8, batch_wait_ms=50)
+    futures = [service.submit(clip(i)) for i in range(3)]
+    service.start()
+
+    for future in futures:
+        assert isinstance(future.exception(2), RuntimeError)
+    assert service.calls == [[0, 1, 2]]
+
+
+def test_worker_keeps_running_after_an_error():
+    service = StubModelSTT(fail=True, batch_size=8, batch_wait_ms=10)
+    service.start()
+    assert isinstance(service.submit(clip(1)).exception(2), RuntimeError)
+
+    service.fail = False
+    assert service.submit(clip(2)).result(2) == "clip 2"
+
+
+def test_transcribe_audio_bytes_needs_a_loaded_model():
+    service = LocalSTTService(enabled=False)
+    assert not service.is_configured()
+    assert service.transcribe_audio_bytes(b"audio").startswith("Mock transcription")
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Tests for the RAG response cache's SQLite disk tier
+"""
+
+import os
+import time
+import sqlite3
+import tempfile
+
+from services.response_cache import ResponseCache
+
+
+def disk_rows(path):
+    with sqlite3.connect(path) as db:
+        return db.execute("SELECT key FROM rag_cache ORDER BY created").fetchall()
+
+
+def test_disk_tier_survives_restart():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "cache.sqlite3")
+        ResponseCache(disk_path=path, enabled=True).put("hello", "Hi there")
+        cache = ResponseCache(disk_path=path, enabled=True)
+        assert cache.get("hello") == "Hi there"
+        assert cache.stats()["disk_hits"] == 1
+
+
+def test_disk_tier_keeps_newest_rows():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "cache.sqlite3")
+        cache = ResponseCache(disk_path=path, enabled=True, disk_max_entries=3)
+        cache.disk_sweep_interval = 0
+        for index in range(5):
+            cache.put(f"query {index}", f"answer {index}")
+        assert [key for key, in disk_rows(path)] == ["query 2", "query 3", "query 4"]
+        assert cache.stats()["disk_evictions"] == 2
+
+
+def test_disk_tier_drops_expired_rows():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "cache.sqlite3")
+        cache = ResponseCache(disk_path=path, enabled=True, ttl=60)
+        cache.put("old", "stale answer")
+        with sqlite3.connect(path) as db:
+            db.execute("UPDATE rag_cache SET created = ?", (time.time() - 120,))
+
+        # Expired rows are never served, and reopening sweeps them away
+        fresh = ResponseCache(disk_path=path, enabled=True, ttl=60)
+        assert fresh.get("old") is None
+        assert disk_rows(path) == []
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
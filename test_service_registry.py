@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Tests for lazily built services: registering them, and building the STT
+router on top of them, must not construct anything until first use
+"""
+
+import threading
+
+from services.service_registry import ServiceRegistry
+from services.stt_router import DeepgramProvider, LocalProvider, STTRouter, WhisperProvider
+
+
+class FakeService:
+    def __init__(self, built):
+        built.append(threading.current_thread().name)
+
+    def is_configured(self):
+        return True
+
+
+def make_registry(built):
+    registry = ServiceRegistry()
+    services = {name: registry.register(name, FakeService, built=built)
+                for name in ("deepgram", "whisper", "local_stt")}
+    return registry, services
+
+
+def test_register_builds_nothing():
+    built = []
+    registry, _ = make_registry(built)
+    assert built == []
+    assert not any(stat["ready"] for stat in registry.stats().values())
+
+
+def test_router_construction_builds_nothing():
+    built = []
+    registry, services = make_registry(built)
+    router = STTRouter([DeepgramProvider(services["deepgram"]), WhisperProvider(services["whisper"]),
+                        LocalProvider(services["local_stt"])])
+    assert built == [], f"STTRouter() built services: {built}"
+
+    # First use builds them, on the calling thread
+    assert router.configured()
+    assert len(built) == 3
+    assert registry.stats()["deepgram"]["thread"] == threading.current_thread().name
+
+
+def test_warmup_builds_on_its_own_thread():
+    built = []
+    registry, _ = make_registry(built)
+    registry.warmup_enabled = True
+    registry.warmup().join(5)
+    assert built == ["service-warmup"] * 3
+    assert all(stat["ready"] and stat["thread"] == "service-warmup" for stat in registry.stats().values())
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Tests for speculative RAG dispatch on live transcripts
+"""
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from services.speculation import DeadlineScheduler, SpeculationStats, SpeculativeDispatcher
+
+STABLE_MS = 50
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.005)
+
+
+class BlockingQuery:
+    """RAG stand-in whose calls block until released"""
+
+    def __init__(self, block=True):
+        self.calls = []
+        self.release = threading.Event()
+        if not block:
+            self.release.set()
+
+    def __call__(self, text):
+        self.calls.append(text)
+        self.release.wait(5)
+        return f"answer to {text}"
+
+
+def make_dispatcher(query, workers=2, max_inflight=2):
+    stats = SpeculationStats()
+    dispatcher = SpeculativeDispatcher(query, ThreadPoolExecutor(max_workers=workers), stats,
+                                       stable_ms=STABLE_MS, max_inflight=max_inflight,
+                                       scheduler=DeadlineScheduler())
+    return dispatcher, stats
+
+
+def test_speculates_once_transcript_is_stable():
+    query = BlockingQuery(block=False)
+    dispatcher, stats = make_dispatcher(query)
+    threads_before = threading.active_count()
+    for word in ["what", "what is", "what is the", "what is the weather"]:
+        dispatcher.on_interim(word)
+        time.sleep(STABLE_MS / 4000)
+    # Interim events do not start timer threads of their own
+    assert threading.active_count() <= threads_before + 1
+    assert query.calls == []
+    wait_for(lambda: stats.started == 1)
+
+    speculation = dispatcher.claim("What is the weather?")
+    assert speculation is not None
+    assert dispatcher.resolve(speculation) == "answer to what is the weather"
+    assert query.calls == ["what is the weather"]
+    assert stats.snapshot()["hits"] == 1
+
+
+def test_queued_speculation_is_cancelled():
+    query = BlockingQuery()
+    # One worker, kept busy, so the speculation never starts
+    dispatcher, stats = make_dispatcher(query, workers=1)
+    dispatcher.executor.submit(query, "busy")
+    dispatcher.on_interim("turn on the lights")
+    wait_for(lambda: stats.started == 1)
+
+    assert dispatcher.claim("turn off the lights") is None
+    query.release.set()
+    dispatcher.executor.shutdown(wait=True)
+    assert query.calls == ["busy"]
+    snapshot = stats.snapshot()
+    assert (snapshot["misses"], snapshot["cancelled"], snapshot["abandoned"]) == (1, 1, 0)
+
+
+def test_running_speculation_is_abandoned():
+    query = BlockingQuery()
+    dispatcher, stats = make_dispatcher(query)
+    dispatcher.on_interim("turn on the lights")
+    wait_for(lambda: query.calls == ["turn on the lights"])
+
+    assert dispatcher.claim("turn off the lights") is None
+    snapshot = stats.snapshot()
+    assert (snapshot["misses"], snapshot["cancelled"], snapshot["abandoned"]) == (1, 0, 1)
+    query.release.set()
+
+
+def test_running_calls_are_bounded_per_session():
+    query = BlockingQuery()
+    dispatcher, stats = make_dispatcher(query, workers=4, max_inflight=1)
+    dispatcher.on_interim("play some")
+    wait_for(lambda: len(query.calls) == 1)
+    dispatcher.on_interim("play some music")
+    wait_for(lambda: stats.throttled == 1)
+    assert query.calls == ["play some"]
+
+    # Once the running call returns, the next stable transcript speculates again
+    query.release.set()
+    wait_for(lambda: dispatcher._inflight == 0)
+    dispatcher.on_final("play some music please")
+    wait_for(lambda: stats.started == 2)
+    dispatcher.close()
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
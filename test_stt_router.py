@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Tests for the speech-to-text router: failover, hedging and settling the
+losing attempt, with fake providers whose futures the test completes
+"""
+
+import time
+import threading
+from concurrent.futures import Future
+
+from services.circuit_breaker import HALF_OPEN
+from services.stt_router import STTProvider, STTProviderError, STTRouter
+
+
+class FakeProvider(STTProvider):
+    """Returns a pending future per call; the test decides when and how it completes"""
+
+    def __init__(self, name, **kwargs):
+        self.name = name
+        self.futures = []
+        self.started = threading.Event()
+        self.started_at = None
+        super().__init__(**kwargs)
+
+    def is_configured(self):
+        return True
+
+    def start(self, data, mimetype, request_log=None):
+        future = Future()
+        self.futures.append(future)
+        self.started_at = time.monotonic()
+        self.started.set()
+        return future
+
+
+class BrokenProvider(FakeProvider):
+    """Fails before returning a future, like a provider whose executor has been shut down"""
+
+    def start(self, data, mimetype, request_log=None):
+        raise RuntimeError("cannot schedule new futures after shutdown")
+
+
+def make_router(hedge=False, hedge_delay=0.05):
+    primary, backup = FakeProvider("primary"), FakeProvider("backup")
+    router = STTRouter([primary, backup], hedge=hedge, order=["primary", "backup"])
+    router.explore = 0.0
+    router.hedge_initial = hedge_delay
+    return router, primary, backup
+
+
+def transcribe_in_thread(router):
+    result = {}
+
+    def run():
+        try:
+            result["value"] = router.transcribe(b"audio", "audio/wav")
+        except Exception as e:
+            result["error"] = e
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread, result
+
+
+def test_failover_on_error():
+    router, primary, backup = make_router()
+    thread, result = transcribe_in_thread(router)
+    assert primary.started.wait(2)
+    assert not backup.started.is_set()
+    primary.futures[0].set_exception(STTProviderError("Error transcribing audio: 500"))
+    assert backup.started.wait(2)
+    backup.futures[0].set_result("hello")
+    thread.join(2)
+
+    text, summary = result["value"]
+    assert text == "hello" and summary["provider"] == "backup" and not summary["hedged"]
+    assert [attempt["outcome"] for attempt in summary["attempts"]] == ["error", "win"]
+    assert router.failovers == 1
+    assert primary.errors == 1 and backup.wins == 1
+
+
+def test_all_providers_failing_raises_last_error():
+    router, primary, backup = make_router()
+    thread, result = transcribe_in_thread(router)
+    assert primary.started.wait(2)
+    primary.futures[0].set_exception(STTProviderError("first"))
+    assert backup.started.wait(2)
+    backup.futures[0].set_exception(STTProviderError("second"))
+    thread.join(2)
+    assert str(result["error"]) == "second"
+
+
+def test_hedge_fires_after_delay_and_loser_is_cancelled():
+    router, primary, backup = make_router(hedge=True, hedge_delay=0.1)
+    thread, result = transcribe_in_thread(router)
+    assert primary.started.wait(2)
+    # Nothing is raced before the hedge delay
+    assert not backup.started.wait(0.05)
+    assert backup.started.wait(2)
+    assert backup.started_at - primary.started_at >= 0.1
+
+    backup.futures[0].set_result("hedged answer")
+    thread.join(2)
+    text, summary = result["value"]
+    assert text == "hedged answer" and summary["provider"] == "backup" and summary["hedged"]
+    assert router.hedged == 1 and router.hedge_wins == 1
+
+    # The primary never started running, so it is cancelled outright
+    assert primary.futures[0].cancelled()
+    assert primary.cancelled == 1 and primary.errors == 0
+
+
+def test_running_loser_is_settled_as_lost():
+    router, primary, backup = make_router(hedge=True, hedge_delay=0.05)
+    thread, result = transcribe_in_thread(router)
+    assert primary.started.wait(2)
+    # Like a blocking Whisper call: already running, so it cannot be cancelled
+    primary.futures[0].set_running_or_notify_cancel()
+    assert backup.started.wait(2)
+    backup.futures[0].set_result("fast")
+    thread.join(2)
+    assert result["value"][0] == "fast"
+    assert not primary.futures[0].cancelled() and primary.cancelled == 0
+
+    # It finishes later: counted as a success with its latency, not a win
+    primary.futures[0].set_result("slow")
+    assert primary.stats()["samples"] == 1
+    assert primary.wins == 0 and primary.errors == 0
+    assert primary.breaker.stats()["successes"] == 1
+
+
+def test_cancelled_loser_releases_half_open_trial():
+    router, primary, backup = make_router(hedge=True, hedge_delay=0.05)
+    breaker = primary.breaker
+    breaker.half_open_trials = 1
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    breaker.opened_at -= breaker.reset_timeout  # Reset timeout has passed
+
+    thread, result = transcribe_in_thread(router)
+    assert primary.started.wait(2)
+    assert breaker.state == HALF_OPEN
+    assert backup.started.wait(2)
+    backup.futures[0].set_result("hello")
+    thread.join(2)
+    assert primary.futures[0].cancelled()
+
+    # The probe ended without a verdict: its trial slot is free again
+    breaker.acquire()
+    assert breaker.state == HALF_OPEN
+
+
+def test_provider_that_cannot_start_fails_over():
+    primary, backup = BrokenProvider("primary"), FakeProvider("backup")
+    router = STTRouter([primary, backup], order=["primary", "backup"])
+    router.explore = 0.0
+    thread, result = transcribe_in_thread(router)
+    assert backup.started.wait(2)
+    backup.futures[0].set_result("hello")
+    thread.join(2)
+
+    text, summary = result["value"]
+    assert text == "hello" and summary["provider"] == "backup"
+    assert [attempt["outcome"] for attempt in summary["attempts"]] == ["error", "win"]
+    assert primary.errors == 1 and primary.breaker.stats()["failures"] == 1
+
+
+def test_half_open_provider_that_cannot_start_gives_back_its_trial():
+    primary = BrokenProvider("primary")
+    router = STTRouter([primary], order=["primary"])
+    breaker = primary.breaker
+    breaker.half_open_trials = 1
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    breaker.opened_at -= breaker.reset_timeout
+
+    try:
+        router.transcribe(b"audio")
+        assert False, "expected the start error"
+    except RuntimeError as e:
+        assert "shutdown" in str(e)
+    # The failed start was the trial's verdict: the circuit is open again, not stuck half-open
+    assert breaker.state == "open"
+
+
+def test_provider_must_implement_start():
+    class Incomplete(STTProvider):
+        def is_configured(self):
+            return True
+
+    try:
+        Incomplete()
+        assert False, "expected TypeError"
+    except TypeError:
+        pass
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
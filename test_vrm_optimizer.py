@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Tests for the VRM optimizer's node stripping
+"""
+
+from services.vrm_optimizer import GLBModel, strip_unused_nodes
+
+
+def test_keeps_referenced_nodes_outside_the_scene():
+    # Joint 1 is referenced by the skin but no scene reaches it
+    model = GLBModel({
+        "scenes": [{"nodes": [0]}],
+        "nodes": [{"mesh": 0, "skin": 0}, {}],
+        "skins": [{"joints": [1]}]
+    }, [])
+    assert strip_unused_nodes(model) == 0
+    assert len(model.gltf["nodes"]) == 2
+    assert model.gltf["skins"][0]["joints"] == [1]
+
+
+def test_strips_and_remaps():
+    model = GLBModel({
+        "scenes": [{"nodes": [0]}],
+        "nodes": [
+            {"children": [1, 2]},
+            {},                                # empty leaf: dropped
+            {"mesh": 0, "skin": 0},
+            {"mesh": 1},                       # unreachable: dropped
+            {"children": [5]},                 # joint outside the scene, kept with its subtree
+            {"mesh": 2}
+        ],
+        "skins": [{"joints": [4], "skeleton": 4}],
+        "extensions": {"VRM": {"humanoid": {"humanBones": [{"bone": "hips", "node": 2},
+                                                          {"bone": "jaw", "node": -1}]}}}
+    }, [])
+    assert strip_unused_nodes(model) == 2
+    gltf = model.gltf
+    assert gltf["nodes"] == [{"children": [1]}, {"mesh": 0, "skin": 0}, {"children": [3]}, {"mesh": 2}]
+    assert gltf["skins"][0] == {"joints": [2], "skeleton": 2}
+    bones = gltf["extensions"]["VRM"]["humanoid"]["humanBones"]
+    assert [bone["node"] for bone in bones] == [1, -1]
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")